@@ -0,0 +1,87 @@
+"""Peak memory of merging one synthetic host file with many JS-heavy versions.
+
+Usage: python example/merge_memory_benchmark.py [versions] [js_chars]
+"""
+
+import json
+import multiprocessing
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from funread.legado.manage.download.sources.book import BookSourceProcessor
+from funread.legado.manage.source import SourceMergeRunner
+
+
+class LocalMerger:
+    """Stand-in for the LLM: returns a fresh copy of the first version, like a parsed reply."""
+
+    def merge_sources(self, source_type, hostname, versions):
+        return json.loads(json.dumps(versions[0]))
+
+
+def build_version(index: int, js_chars: int):
+    js = f"var v{index}=" + "a+b;" * (js_chars // 4)
+    return {
+        "md5_list": [f"md5-{index}"],
+        "source": {
+            "bookSourceName": f"source{index}",
+            "bookSourceUrl": "https://bench.example.com/",
+            "ruleSearch": {"url": f"/search/{index}?q={{{{key}}}}", "name": "h3@text"},
+            "ruleContent": {"content": f"@js:{js}"},
+            "ruleToc": {"chapterList": f"@js:{js[::-1]}"},
+        },
+    }
+
+
+def peak_rss_mib() -> float:
+    # ru_maxrss is reported in KiB on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def write_host_file(path: str, versions: int, js_chars: int) -> None:
+    store = BookSourceProcessor(path=path, cate1="book")
+    store._save_json_safely(
+        str(Path(store.path_bok) / "10000000-10000100" / "10000001.json"),
+        {
+            "available": True,
+            "merged": [],
+            "candidate": [build_version(index, js_chars) for index in range(versions)],
+            "final": False,
+            "url_id": 10000001,
+            "hostname": "bench.example.com",
+        },
+    )
+
+
+def main(versions: int = 500, js_chars: int = 20000) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        # Build the input in a child process so its peak does not count towards ours.
+        writer = multiprocessing.Process(target=write_host_file, args=(tmp, versions, js_chars))
+        writer.start()
+        writer.join()
+        store = BookSourceProcessor(path=tmp, cate1="book")
+        runner = SourceMergeRunner(
+            store=store,
+            merger=LocalMerger(),
+            max_prompt_chars=js_chars * 2 * 8 * 2,
+            use_cache=False,
+        )
+        base_rss = peak_rss_mib()
+        start = time.perf_counter()
+        stats = runner.run()
+        elapsed = time.perf_counter() - start
+    peak_rss = peak_rss_mib()
+    print(
+        f"versions={versions} js_chars={js_chars} stats={stats} elapsed={elapsed:.2f}s "
+        f"base_rss={base_rss:.1f}MiB peak_rss={peak_rss:.1f}MiB "
+        f"merge_rss={peak_rss - base_rss:.1f}MiB"
+    )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -3,40 +3,64 @@
 from .publish import UpdateEntrance, UpdateRssTask
 from .source import (
     SourceDetailRecord,
+    SourceDetailSequence,
     SourceIndexRecord,
     SourceListRecord,
+    SourceListStatusWriter,
     SyncLocalSourceRecordsTask,
     add_source_detail_url,
     add_source_list_url,
+    delete_source_detail_records,
+    delete_source_index_records,
+    fetch_source_list_payload,
+    get_source_list_record,
     init_source_db,
+    iter_source_index_rows,
     iter_source_list_data,
     list_source_detail_records,
     load_source_index_map,
     load_source_detail_url_map,
+    lookup_source_detail_ids,
+    lookup_source_index_records,
     replace_source_detail_records,
     replace_source_index_records,
+    claim_source_detail_ids,
+    reserve_source_detail_ids,
     upsert_source_index_records,
     upsert_source_detail_record,
+    upsert_source_detail_records,
     upsert_source_list_record,
 )
 
 __all__ = [
     "SourceDetailRecord",
+    "SourceDetailSequence",
     "SourceIndexRecord",
     "SourceListRecord",
+    "SourceListStatusWriter",
     "SyncLocalSourceRecordsTask",
     "UpdateEntrance",
     "UpdateRssTask",
     "add_source_detail_url",
     "add_source_list_url",
+    "delete_source_detail_records",
+    "delete_source_index_records",
+    "fetch_source_list_payload",
+    "get_source_list_record",
     "init_source_db",
+    "iter_source_index_rows",
     "iter_source_list_data",
     "list_source_detail_records",
     "load_source_index_map",
     "load_source_detail_url_map",
+    "lookup_source_detail_ids",
+    "lookup_source_index_records",
     "replace_source_detail_records",
     "replace_source_index_records",
+    "claim_source_detail_ids",
+    "reserve_source_detail_ids",
     "upsert_source_index_records",
     "upsert_source_detail_record",
+    "upsert_source_detail_records",
     "upsert_source_list_record",
 ]
@@ -1,6 +1,6 @@
 """Runtime context for source download tasks."""
 
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from fundrive.drives.github import GithubDrive
 
@@ -17,7 +17,9 @@ class SourceBuildContext:
         dir_path: str = "funread/legado/book/snapshot/20231011",
         source_type: str = "booksource",
         repo: str = DEFAULT_REPO,
+        remote_options: Optional[Dict[str, Any]] = None,
     ):
+        """``remote_options`` are passed to ``SourceRemoteManager``, e.g. ``upload_workers``."""
         self.repo_str = repo
         self.dir_path = dir_path
         self.source_type = source_type
@@ -28,6 +30,7 @@ class SourceBuildContext:
             context=self,
             initial_counter=INITIAL_COUNTER,
             min_upload_batch_size=MIN_UPLOAD_BATCH_SIZE,
+            **(remote_options or {}),
         )
         self.drive.login(
             repo_owner=self.repo_str.split("/")[0],
@@ -41,8 +44,8 @@ class SourceBuildContext:
             if key:
                 self._source_count_cache[str(key)] = count_text
 
-    def create_store(self, path: str):
-        return SourceStoreFactory.create(path=path, source_type=self.source_type)
+    def create_store(self, path: str, **kwargs):
+        return SourceStoreFactory.create(path=path, source_type=self.source_type, **kwargs)
 
     def format_file_size(self, size: Any) -> str:
         return self.report_builder.format_file_size(size)
@@ -56,11 +59,11 @@ class SourceBuildContext:
     def generate_html_report(self) -> str:
         return self.report_builder.generate_html_report()
 
-    def upload_single_batch(self, data: List[Dict[str, Any]], counter: int) -> None:
-        self.remote_manager.upload_single_batch(data, counter)
+    def upload_single_batch(self, data: List[Dict[str, Any]], counter: int) -> bool:
+        return self.remote_manager.upload_single_batch(data, counter)
 
     def upload_batch(self, data: List[Dict[str, Any]], counter: int) -> int:
         return self.remote_manager.upload_batch(data, counter)
 
-    def cleanup_stale_remote_batches(self, next_counter: int) -> None:
-        self.remote_manager.cleanup_stale_remote_batches(next_counter)
+    def cleanup_stale_remote_batches(self, next_counter: int) -> List[int]:
+        return self.remote_manager.cleanup_stale_remote_batches(next_counter)
@@ -5,11 +5,21 @@ from .constants import (
     DEFAULT_BACKUP_ID,
     DEFAULT_DIR_PATH,
     DEFAULT_REPO,
+    DOCUMENT_CACHE_SIZE,
     EXPORT_BATCH_SIZE,
+    EXPORT_PARTITION_MAX_PARTS,
+    EXPORT_PARTITION_SPAN,
     INITIAL_COUNTER,
     MAX_PICKLE_SIZE,
+    MAX_UPLOAD_BATCH_BYTES,
+    MD5_BLOOM_CAPACITY,
     MIN_UPLOAD_BATCH_SIZE,
     REQUEST_TIMEOUT,
+    SOURCE_LIST_FETCH_PER_HOST,
+    SOURCE_LIST_FETCH_WORKERS,
+    SOURCE_SCAN_CHUNK_SIZE,
+    UPLOAD_REQUESTS_PER_SECOND,
+    URL_ID_BLOCK_SIZE,
 )
 from .processor import SourceProcessor
 from .store import (
@@ -25,15 +35,25 @@ __all__ = [
     "DEFAULT_BACKUP_ID",
     "DEFAULT_DIR_PATH",
     "DEFAULT_REPO",
+    "DOCUMENT_CACHE_SIZE",
     "DownloadSourceDataTask",
     "DumpSourceBackupTask",
     "EXPORT_BATCH_SIZE",
+    "EXPORT_PARTITION_MAX_PARTS",
+    "EXPORT_PARTITION_SPAN",
     "INITIAL_COUNTER",
     "LoadSourceBackupTask",
     "LocalSourceStore",
     "MAX_PICKLE_SIZE",
+    "MAX_UPLOAD_BATCH_BYTES",
+    "MD5_BLOOM_CAPACITY",
     "MIN_UPLOAD_BATCH_SIZE",
     "REQUEST_TIMEOUT",
+    "SOURCE_LIST_FETCH_PER_HOST",
+    "SOURCE_LIST_FETCH_WORKERS",
+    "SOURCE_SCAN_CHUNK_SIZE",
+    "UPLOAD_REQUESTS_PER_SECOND",
+    "URL_ID_BLOCK_SIZE",
     "SourceProcessor",
     "SourceStoreTask",
 ]
@@ -0,0 +1,83 @@
+"""Persistent bloom filter for md5 membership checks."""
+
+import hashlib
+import json
+import math
+import os
+from datetime import datetime
+from typing import Iterable, Optional
+
+
+class BloomFilter:
+    """Fixed-size bloom filter over strings, saved as a JSON header line plus raw bits.
+
+    ``synced_at`` records up to when the filter reflects the database, so callers
+    can top it up with rows updated after that instead of rebuilding it.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.capacity = max(1, int(capacity))
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, int(round(self.num_bits / self.capacity * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+        self.synced_at: Optional[datetime] = None
+
+    @property
+    def is_saturated(self) -> bool:
+        return self.count > self.capacity
+
+    def _positions(self, key: str) -> Iterable[int]:
+        digest = hashlib.md5(key.encode("utf-8")).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (first + i * second) % self.num_bits
+
+    def add(self, key: str) -> None:
+        added = False
+        for position in self._positions(key):
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                self.bits[position >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+
+    def update(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            self.add(key)
+
+    def __contains__(self, key: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key)
+        )
+
+    def save(self, path: str) -> None:
+        header = {
+            "capacity": self.capacity,
+            "error_rate": self.error_rate,
+            "count": self.count,
+            "synced_at": self.synced_at.isoformat() if self.synced_at else None,
+        }
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(json.dumps(header).encode("utf-8") + b"\n")
+            f.write(bytes(self.bits))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BloomFilter":
+        with open(path, "rb") as f:
+            header = json.loads(f.readline().decode("utf-8"))
+            bits = f.read()
+        bloom = cls(capacity=header["capacity"], error_rate=header["error_rate"])
+        if len(bits) != len(bloom.bits):
+            raise ValueError(f"Corrupted bloom filter {path}")
+        bloom.bits = bytearray(bits)
+        bloom.count = int(header.get("count", 0))
+        if header.get("synced_at"):
+            bloom.synced_at = datetime.fromisoformat(header["synced_at"])
+        return bloom
@@ -0,0 +1,79 @@
+"""Write-back cache for per-host source documents."""
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Set
+
+from nltlog import getLogger
+
+
+logger = getLogger("funread")
+
+
+class SourceDocumentCache:
+    """Keep parsed ``<url_id>.json`` documents in memory and write them back lazily.
+
+    Documents are keyed by file path. Dirty documents are written when they are
+    evicted (least recently used first, once more than ``max_documents`` are held)
+    or when ``flush()`` is called.
+    """
+
+    def __init__(
+        self,
+        writer: Callable[[str, Dict[str, Any]], None],
+        max_documents: int = 256,
+    ):
+        self.writer = writer
+        self.max_documents = max(1, int(max_documents))
+        self._documents: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._dirty: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._documents
+
+    @property
+    def dirty_count(self) -> int:
+        return len(self._dirty)
+
+    def get(self, path: str, loader: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        document = self._documents.get(path)
+        if document is not None:
+            self._documents.move_to_end(path)
+            return document
+        document = loader()
+        self._documents[path] = document
+        self._evict()
+        return document
+
+    def mark_dirty(self, path: str) -> None:
+        if path in self._documents:
+            self._dirty.add(path)
+
+    def _write(self, path: str) -> None:
+        self.writer(path, self._documents[path])
+        self._dirty.discard(path)
+
+    def _evict(self) -> None:
+        while len(self._documents) > self.max_documents:
+            path = next(iter(self._documents))
+            if path in self._dirty:
+                self._write(path)
+            self._documents.pop(path)
+
+    def flush(self, path: Optional[str] = None) -> int:
+        """Write dirty documents (all of them, or just ``path``) and return how many."""
+        paths = [path] if path is not None else list(self._documents)
+        written = 0
+        for current in paths:
+            if current in self._dirty:
+                self._write(current)
+                written += 1
+        return written
+
+    def clear(self) -> None:
+        if self._dirty:
+            logger.warning(f"Dropping {len(self._dirty)} unsaved source documents")
+        self._documents.clear()
+        self._dirty.clear()
@@ -3,10 +3,20 @@
 DEFAULT_REPO = "farfarfun/funread-cache"
 DEFAULT_DIR_PATH = "funread/legado/snapshot/lasted"
 EXPORT_BATCH_SIZE = 500
+EXPORT_PARTITION_SPAN = 100
+EXPORT_PARTITION_MAX_PARTS = 10
 INITIAL_COUNTER = 1000
 MIN_UPLOAD_BATCH_SIZE = 20
+MAX_UPLOAD_BATCH_BYTES = 1024 * 1024
+UPLOAD_REQUESTS_PER_SECOND = 1.0
 
 DEFAULT_BACKUP_HOST = "https://farfarfun.github.com"
 DEFAULT_BACKUP_ID = 10000000
 REQUEST_TIMEOUT = 30
 MAX_PICKLE_SIZE = 1024 * 1024 * 100
+SOURCE_LIST_FETCH_WORKERS = 8
+SOURCE_LIST_FETCH_PER_HOST = 4
+DOCUMENT_CACHE_SIZE = 256
+URL_ID_BLOCK_SIZE = 100
+MD5_BLOOM_CAPACITY = 1000000
+SOURCE_SCAN_CHUNK_SIZE = 64
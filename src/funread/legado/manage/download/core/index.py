@@ -0,0 +1,187 @@
+"""Compact in-memory md5 index for local sources."""
+
+import sys
+from array import array
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+
+DIGEST_SIZE = 16
+
+
+class SourceMd5Index(MutableMapping):
+    """Map source md5s to their host with a few bytes per entry.
+
+    Hex md5s are stored as 16-byte digests in a sorted ``bytearray`` with the
+    url_id of each entry in a parallel ``array``; lookups bisect the digests.
+    New entries go to a small dict that is merged into the sorted arrays once it
+    grows past ``compact_threshold``. Hostnames are kept once per url_id, and
+    keys that are not lowercase hex md5s fall back to a plain dict.
+
+    Values read back as the same five-key record dicts ``load_source_index_map``
+    returns, so the index can stand in for a ``Dict[str, Dict[str, Any]]``.
+    """
+
+    def __init__(self, source_type: str = "", compact_threshold: int = 4096):
+        self.source_type = source_type
+        self.compact_threshold = max(1, int(compact_threshold))
+        self._digests = bytearray()
+        self._url_ids = array("q")
+        self._recent: Dict[bytes, int] = {}
+        self._fallback: Dict[str, int] = {}
+        self._hostnames: Dict[int, str] = {}
+
+    @classmethod
+    def from_rows(
+        cls,
+        rows: Iterable[Tuple[str, int, str]],
+        source_type: str = "",
+        compact_threshold: int = 4096,
+    ) -> "SourceMd5Index":
+        """Build an index from ``(md5, url_id, hostname)`` rows, ideally sorted by md5."""
+        index = cls(source_type=source_type, compact_threshold=compact_threshold)
+        for md5, url_id, hostname in rows:
+            digest = cls._to_digest(md5)
+            if (
+                digest is not None
+                and not index._recent
+                and digest > index._digests[-DIGEST_SIZE:]
+            ):
+                index._remember_hostname(int(url_id), hostname)
+                index._digests += digest
+                index._url_ids.append(int(url_id))
+            else:
+                index.add(md5, int(url_id), hostname)
+        index.compact()
+        return index
+
+    @staticmethod
+    def _to_digest(md5: str) -> Optional[bytes]:
+        if not isinstance(md5, str) or len(md5) != DIGEST_SIZE * 2:
+            return None
+        try:
+            digest = bytes.fromhex(md5)
+        except ValueError:
+            return None
+        return digest if digest.hex() == md5 else None
+
+    def _remember_hostname(self, url_id: int, hostname: str) -> None:
+        if hostname and self._hostnames.get(url_id) != hostname:
+            self._hostnames[url_id] = sys.intern(str(hostname))
+
+    def _position(self, digest: bytes) -> int:
+        lo, hi = 0, len(self._url_ids)
+        digests = self._digests
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = mid * DIGEST_SIZE
+            if digests[offset : offset + DIGEST_SIZE] < digest:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _find(self, digest: bytes) -> int:
+        position = self._position(digest)
+        offset = position * DIGEST_SIZE
+        if position < len(self._url_ids) and self._digests[offset : offset + DIGEST_SIZE] == digest:
+            return position
+        return -1
+
+    def _lookup_url_id(self, md5: str) -> Optional[int]:
+        digest = self._to_digest(md5)
+        if digest is None:
+            return self._fallback.get(md5)
+        url_id = self._recent.get(digest)
+        if url_id is not None:
+            return url_id
+        position = self._find(digest)
+        return self._url_ids[position] if position >= 0 else None
+
+    def add(self, md5: str, url_id: int, hostname: str = "") -> None:
+        self._remember_hostname(int(url_id), hostname)
+        digest = self._to_digest(md5)
+        if digest is None:
+            self._fallback[md5] = int(url_id)
+            return
+        position = self._find(digest)
+        if position >= 0:
+            self._url_ids[position] = int(url_id)
+            return
+        self._recent[digest] = int(url_id)
+        if len(self._recent) >= max(self.compact_threshold, len(self._url_ids) // 8):
+            self.compact()
+
+    def compact(self) -> None:
+        """Merge recently added digests into the sorted arrays."""
+        if not self._recent:
+            return
+        recent = sorted(self._recent.items())
+        self._recent = {}
+        digests = bytearray()
+        url_ids = array("q")
+        start = 0
+        for digest, url_id in recent:
+            position = self._position(digest)
+            digests += self._digests[start * DIGEST_SIZE : position * DIGEST_SIZE]
+            url_ids.extend(self._url_ids[start:position])
+            digests += digest
+            url_ids.append(url_id)
+            start = position
+        digests += self._digests[start * DIGEST_SIZE :]
+        url_ids.extend(self._url_ids[start:])
+        self._digests = digests
+        self._url_ids = url_ids
+
+    def record(self, md5: str, url_id: int) -> Dict[str, Any]:
+        return {
+            "md5": md5,
+            "source_type": self.source_type,
+            "url_id": url_id,
+            "hostname": self._hostnames.get(url_id, ""),
+            "cate1": (url_id // 100) * 100,
+        }
+
+    def __contains__(self, md5: object) -> bool:
+        return isinstance(md5, str) and self._lookup_url_id(md5) is not None
+
+    def __getitem__(self, md5: str) -> Dict[str, Any]:
+        url_id = self._lookup_url_id(md5) if isinstance(md5, str) else None
+        if url_id is None:
+            raise KeyError(md5)
+        return self.record(md5, url_id)
+
+    def __setitem__(self, md5: str, record: Dict[str, Any]) -> None:
+        self.add(md5, int(record["url_id"]), str(record.get("hostname") or ""))
+
+    def __delitem__(self, md5: str) -> None:
+        digest = self._to_digest(md5)
+        if digest is None:
+            del self._fallback[md5]
+            return
+        if self._recent.pop(digest, None) is not None:
+            return
+        position = self._find(digest)
+        if position < 0:
+            raise KeyError(md5)
+        offset = position * DIGEST_SIZE
+        del self._digests[offset : offset + DIGEST_SIZE]
+        del self._url_ids[position]
+
+    def __len__(self) -> int:
+        return len(self._url_ids) + len(self._recent) + len(self._fallback)
+
+    def __iter__(self) -> Iterator[str]:
+        for position in range(len(self._url_ids)):
+            offset = position * DIGEST_SIZE
+            yield self._digests[offset : offset + DIGEST_SIZE].hex()
+        for digest in list(self._recent):
+            yield digest.hex()
+        yield from list(self._fallback)
+
+    def clear(self) -> None:
+        self._digests = bytearray()
+        self._url_ids = array("q")
+        self._recent = {}
+        self._fallback = {}
+        self._hostnames = {}
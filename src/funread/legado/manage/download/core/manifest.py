@@ -0,0 +1,105 @@
+"""Persisted per-file metadata for the local source tree."""
+
+import json
+import os
+from typing import Any, Dict, Iterable, Optional
+
+from nltlog import getLogger
+
+
+logger = getLogger("funread")
+
+
+class SourceFileManifest:
+    """JSON-backed map from source files to metadata derived from their content.
+
+    Entries are keyed by the path relative to ``root`` and carry the file
+    fingerprint (``mtime_ns`` and ``size``) they were computed from, so callers
+    can reuse an entry as long as the file has not changed since.
+    """
+
+    def __init__(self, path: str, root: str):
+        self.path = path
+        self.root = root
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+
+    @staticmethod
+    def fingerprint(file_path: str) -> Optional[Dict[str, int]]:
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+    def key(self, file_path: str) -> str:
+        return os.path.relpath(file_path, self.root).replace(os.sep, "/")
+
+    def load(self) -> "SourceFileManifest":
+        self.entries = {}
+        self._dirty = False
+        if not os.path.exists(self.path):
+            return self
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self.entries = {
+                    key: value for key, value in data.items() if isinstance(value, dict)
+                }
+        except (IOError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignore unreadable manifest {self.path}: {e}")
+        return self
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+    def get(self, file_path: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(self.key(file_path))
+
+    def lookup(
+        self, file_path: str, fingerprint: Optional[Dict[str, int]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Return the entry for ``file_path`` only if it matches the current fingerprint."""
+        fingerprint = fingerprint or self.fingerprint(file_path)
+        entry = self.get(file_path)
+        if entry is None or fingerprint is None:
+            return None
+        if entry.get("mtime_ns") != fingerprint["mtime_ns"] or entry.get("size") != fingerprint[
+            "size"
+        ]:
+            return None
+        return entry
+
+    def update(
+        self,
+        file_path: str,
+        fingerprint: Optional[Dict[str, int]] = None,
+        **fields: Any,
+    ) -> Dict[str, Any]:
+        fingerprint = fingerprint or self.fingerprint(file_path) or {}
+        entry = dict(fields)
+        entry.update(fingerprint)
+        self.entries[self.key(file_path)] = entry
+        self._dirty = True
+        return entry
+
+    def discard(self, file_path: str) -> None:
+        if self.entries.pop(self.key(file_path), None) is not None:
+            self._dirty = True
+
+    def prune(self, file_paths: Iterable[str]) -> None:
+        """Drop entries for files that are no longer part of the tree."""
+        keep = {self.key(file_path) for file_path in file_paths}
+        stale = [key for key in self.entries if key not in keep]
+        for key in stale:
+            del self.entries[key]
+        if stale:
+            self._dirty = True
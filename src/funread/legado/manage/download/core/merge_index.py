@@ -0,0 +1,82 @@
+"""Per-file merge scheduling metadata for the local source tree."""
+
+import json
+from typing import Any, Dict, List, Optional
+
+from nltlog import getLogger
+
+from .manifest import SourceFileManifest
+from .scanner import SourceFileScanner
+
+
+logger = getLogger("funread")
+
+
+def _iter_version_sources(data: Dict[str, Any]):
+    for key in ("merged", "candidate"):
+        items = data.get(key, [])
+        if not isinstance(items, list):
+            continue
+        for item in items:
+            source = item.get("source")
+            if isinstance(source, dict):
+                yield source
+
+
+def merge_metadata(data: Dict[str, Any]) -> Dict[str, int]:
+    """Version count and total serialized source size of a host document."""
+    versions = 0
+    source_chars = 0
+    for source in _iter_version_sources(data):
+        versions += 1
+        source_chars += len(json.dumps(source, ensure_ascii=False))
+    return {"versions": versions, "source_chars": source_chars}
+
+
+class SourceMergeIndex(SourceFileManifest):
+    """Manifest of merge metadata per host file.
+
+    Each entry holds ``versions``, ``source_chars`` and ``merged_at`` next to the
+    file fingerprint. The store records an entry whenever it writes a document, so
+    the merge scheduler can order files without parsing them; entries whose
+    fingerprint no longer matches are refreshed with a parallel scan.
+    """
+
+    def record(
+        self, file_path: str, data: Dict[str, Any], merged_at: Optional[str] = None
+    ) -> Dict[str, Any]:
+        previous = self.get(file_path) or {}
+        return self.update(
+            file_path,
+            merged_at=merged_at or previous.get("merged_at"),
+            **merge_metadata(data),
+        )
+
+    def refresh(self, scanner: SourceFileScanner) -> List[str]:
+        """Re-scan files missing from the index or changed since, and return all files."""
+        file_list = scanner.list_files()
+        fingerprints = {file_path: self.fingerprint(file_path) for file_path in file_list}
+        stale = [
+            file_path
+            for file_path in file_list
+            if self.lookup(file_path, fingerprints[file_path]) is None
+        ]
+        scanned = scanner.scan(stale, extract=merge_metadata) if stale else []
+        for file_path, _, metadata, error in scanned:
+            if error is not None:
+                logger.warning(f"Failed to read merge metadata of {file_path}: {error}")
+                self.discard(file_path)
+                continue
+            previous = self.get(file_path) or {}
+            self.update(
+                file_path,
+                fingerprints[file_path],
+                merged_at=previous.get("merged_at"),
+                **metadata,
+            )
+        self.prune(file_list)
+        return file_list
+
+    def versions(self, file_path: str) -> int:
+        entry = self.get(file_path)
+        return int(entry.get("versions", 0)) if entry else 0
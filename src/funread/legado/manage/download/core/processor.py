@@ -3,7 +3,7 @@
 import json
 import os
 import traceback
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import requests
 from nltfile import pickle
@@ -22,71 +22,120 @@ logger = getLogger("funread")
 class SourceProcessor(LocalSourceStore):
     """Fetch, normalize and write source items into local storage."""
 
+    _source_list_writer = None
+    _fetched_records = None
+
     def loader(self) -> None:
         raise NotImplementedError("Subclass must implement loader() method")
 
     def source_format(self, source: Dict[str, Any]) -> Dict[str, Any]:
         raise NotImplementedError("Subclass must implement source_format() method")
 
-    def persist_download_record(self, url: str, source_data: Any) -> None:
+    @property
+    def source_list_writer(self):
+        if self._source_list_writer is None:
+            from funread.legado.manage import SourceListStatusWriter
+
+            self._source_list_writer = SourceListStatusWriter(database_url=self.database_url)
+        return self._source_list_writer
+
+    def checkpoint(self) -> bool:
+        if self._source_list_writer is not None and len(self._source_list_writer) > 0:
+            self.mark_dirty("download_records")
+        return super(SourceProcessor, self).checkpoint()
+
+    @staticmethod
+    def _count_downloaded_sources(source_data: Any) -> int:
+        if isinstance(source_data, list):
+            return len(source_data)
+        if isinstance(source_data, dict):
+            if isinstance(source_data.get("list"), list):
+                return len(source_data["list"])
+            if isinstance(source_data.get("data"), list):
+                return len(source_data["data"])
+            if "error" in source_data:
+                return 0
+            return 1
+        return 0
+
+    def persist_download_record(
+        self,
+        url: str,
+        source_data: Any,
+        source_count: Optional[int] = None,
+        held: bool = False,
+        **validators: Optional[str],
+    ) -> None:
+        """Buffer the status of a list URL; ``held`` keeps it until the next ``dumps()``.
+
+        Hold the status of a list whose sources were just added: its validators may
+        only reach the database once those sources are durable.
+        """
         try:
-            from funread.legado.manage import upsert_source_list_record
-
-            if isinstance(source_data, list):
-                source_count = len(source_data)
-            elif isinstance(source_data, dict):
-                if isinstance(source_data.get("list"), list):
-                    source_count = len(source_data["list"])
-                elif isinstance(source_data.get("data"), list):
-                    source_count = len(source_data["data"])
-                elif "error" in source_data:
-                    source_count = 0
-                else:
-                    source_count = 1
-            else:
-                source_count = 0
-
-            upsert_source_list_record(url=url, source_type=self.cate1, source_count=source_count)
+            if source_count is None:
+                source_count = self._count_downloaded_sources(source_data)
+            self.source_list_writer.add(
+                url=url,
+                source_type=self.cate1,
+                source_count=source_count,
+                held=held,
+                **validators,
+            )
+            self.mark_dirty("download_records")
         except ValueError:
             return
         except Exception as e:
             logger.warning(f"Failed to persist download record for {url}: {e}")
 
+    def flush_download_records(self) -> None:
+        if self._source_list_writer is None:
+            return
+        try:
+            self._source_list_writer.flush()
+        except ValueError:
+            return
+        except Exception as e:
+            logger.warning(f"Failed to flush download records: {e}")
+
+    def dumps(self) -> None:
+        super(SourceProcessor, self).dumps()
+        self.flush_download_records()
+
     @staticmethod
     def compute_source_md5(source: Dict[str, Any]) -> str:
         return get_md5_str(json.dumps(source, sort_keys=True, ensure_ascii=False))
 
     def url_index(self, url: str) -> int:
-        if url in self.url_map:
-            return self.url_map[url]
-
-        from funread.legado.manage import add_source_detail_url
+        if url not in self.url_map:
+            self.prefetch_url_ids([url])
+        if url not in self.url_map:
+            self.claim_url_ids([url])
+        return self.url_map[url]
 
-        record = add_source_detail_url(
-            url=url, source_type=self.cate1, database_url=self.database_url
-        )
-        self.url_map[url] = record.id
-        self.current_id = max(self.current_id, record.id)
-        return record.id
-
-    def add_source(self, source: Dict[str, Any], *args, **kwargs) -> bool:
+    def prepare_source(self, source: Dict[str, Any]) -> Optional[Tuple[Dict[str, Any], str, str]]:
+        """Format ``source`` and return it with its md5 and hostname, or None if unusable."""
         source_url_key = self.get_source_url_key()
         if source is None or len(source) == 0 or source_url_key not in source:
-            return False
+            return None
         try:
             source = self.source_format(source)
             if source_url_key not in source:
                 logger.warning(f"Source missing '{source_url_key}' field, skipping")
-                return False
-
-            md5 = self.compute_source_md5(source)
-            if md5 in self.md5_set:
-                return False
+                return None
 
             source_url = source[source_url_key]
             hostname = url_to_hostname(source_url)
             if hostname is None:
                 logger.warning(f"Failed to parse hostname from URL: {source_url}")
+                return None
+            return source, self.compute_source_md5(source), hostname
+        except Exception as e:
+            logger.error(f"Error preparing source: {e}, traceback: {traceback.format_exc()}")
+            return None
+
+    def add_prepared_source(self, source: Dict[str, Any], md5: str, hostname: str) -> bool:
+        try:
+            if self.has_source_md5(md5):
                 return False
 
             url_id = self.url_index(hostname)
@@ -97,22 +146,32 @@ class SourceProcessor(LocalSourceStore):
 
             url_info = {"url_id": url_id, "hostname": hostname, "cate1": cate1}
             self.add_source_to_candidate(md5, fpath, source, url_info=url_info)
-            self.md5_set[md5] = {
-                "md5": md5,
-                "source_type": self.cate1,
-                "url_id": url_id,
-                "hostname": hostname,
-                "cate1": cate1,
-            }
+            self.register_source_md5(
+                md5,
+                {
+                    "md5": md5,
+                    "source_type": self.cate1,
+                    "url_id": url_id,
+                    "hostname": hostname,
+                    "cate1": cate1,
+                },
+            )
             return True
         except Exception as e:
             logger.error(f"Error adding source: {e}, traceback: {traceback.format_exc()}")
             return False
 
+    def add_source(self, source: Dict[str, Any], *args, **kwargs) -> bool:
+        prepared = self.prepare_source(source)
+        if prepared is None:
+            return False
+        return self.add_prepared_source(*prepared)
+
     def add_sources(
         self, data: Union[str, List[Dict[str, Any]], Dict[str, Any]], *args, **kwargs
     ) -> int:
         parsed_data = self._parse_input_data(data)
+        fetched = self._pop_fetched_record(data) if isinstance(data, str) else None
         if parsed_data is None:
             return 0
         if isinstance(parsed_data, dict):
@@ -120,7 +179,17 @@ class SourceProcessor(LocalSourceStore):
         elif not isinstance(parsed_data, list):
             logger.error(f"Unsupported data type: {type(parsed_data)}")
             return 0
-        return sum(1 for source in parsed_data if self.add_source(source, *args, **kwargs))
+
+        prepared = [item for item in map(self.prepare_source, parsed_data) if item is not None]
+        self.prefetch_source_md5s([md5 for _, md5, _ in prepared])
+        self.prefetch_url_ids([hostname for _, _, hostname in prepared])
+        self.claim_url_ids(
+            hostname for _, md5, hostname in prepared if not self.has_source_md5(md5)
+        )
+        added = sum(1 for item in prepared if self.add_prepared_source(*item))
+        if fetched is not None:
+            self.persist_download_record(data, fetched[0], held=added > 0, **fetched[1])
+        return added
 
     def _parse_input_data(self, data: Union[str, Dict, List]) -> Optional[Union[Dict, List]]:
         if isinstance(data, str):
@@ -144,13 +213,34 @@ class SourceProcessor(LocalSourceStore):
         logger.error(f"Invalid data format: {data[:100]}")
         return None
 
+    def _load_source_list_validators(self, url: str) -> Dict[str, Optional[str]]:
+        try:
+            from funread.legado.manage import get_source_list_record
+
+            record = get_source_list_record(url, database_url=self.database_url)
+        except ValueError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Failed to load source list validators for {url}: {e}")
+            return {}
+        if record is None:
+            return {}
+        return {
+            "etag": record.etag,
+            "last_modified": record.last_modified,
+            "content_md5": record.content_md5,
+            "source_count": record.source_count,
+        }
+
     def _fetch_from_url(self, url: str) -> Optional[Union[Dict, List]]:
+        from funread.legado.manage import fetch_source_list_payload
+
+        validators = self._load_source_list_validators(url)
+        previous_count = validators.pop("source_count", None)
         try:
-            response = requests.get(url, timeout=REQUEST_TIMEOUT)
-            response.raise_for_status()
-            data = response.json()
-            self.persist_download_record(url, data)
-            return data
+            data, validators = fetch_source_list_payload(
+                url, timeout=REQUEST_TIMEOUT, **validators
+            )
         except requests.RequestException as e:
             self.persist_download_record(url, {"error": str(e)})
             logger.error(f"Failed to fetch URL {url}: {e}")
@@ -160,6 +250,26 @@ class SourceProcessor(LocalSourceStore):
             logger.error(f"Failed to parse JSON from URL {url}: {e}")
             return None
 
+        if data is None:
+            logger.info(f"Source list unchanged, skip processing: {url}")
+            self.persist_download_record(url, None, source_count=previous_count, **validators)
+            return None
+        if self._fetched_records is None:
+            self._fetched_records = {}
+        self._fetched_records[url] = (data, validators)
+        return data
+
+    def _pop_fetched_record(self, url: str) -> Optional[Tuple[Any, Dict[str, Optional[str]]]]:
+        """
+        Take the payload and validators of a fetched URL.
+
+        ``add_sources`` records them only after the sources were added to the
+        store, and the writer persists them only at the next store checkpoint.
+        """
+        if not self._fetched_records:
+            return None
+        return self._fetched_records.pop(url, None)
+
     def _load_from_file(self, file_path: str) -> Optional[Union[Dict, List]]:
         try:
             if file_path.endswith(".pkl") or file_path.endswith(".pkl.bz2"):
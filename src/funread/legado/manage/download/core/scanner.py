@@ -0,0 +1,106 @@
+"""Parallel parsing of host files in the local source tree."""
+
+import hashlib
+import json
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .constants import SOURCE_SCAN_CHUNK_SIZE
+
+ScanResult = Tuple[str, Optional[str], Any, Optional[str]]
+Extractor = Callable[[Dict[str, Any]], Any]
+
+
+def _scan_file(
+    file_path: str, extract: Optional[Extractor], known_sha1: Optional[str]
+) -> ScanResult:
+    try:
+        with open(file_path, "rb") as f:
+            raw = f.read()
+    except OSError as e:
+        return file_path, None, None, str(e)
+    sha1 = hashlib.sha1(raw).hexdigest()
+    if known_sha1 is not None and sha1 == known_sha1:
+        return file_path, sha1, None, None
+    try:
+        text = raw.decode("utf-8")
+        # Drop the raw buffer before parsing so bytes, text and objects are never all alive.
+        del raw
+        data = json.loads(text)
+        del text
+        return file_path, sha1, extract(data) if extract else data, None
+    except Exception as e:
+        return file_path, sha1, None, f"{type(e).__name__}: {e}"
+
+
+def _scan_chunk(
+    extract: Optional[Extractor], work: Sequence[Tuple[str, Optional[str]]]
+) -> List[ScanResult]:
+    return [_scan_file(file_path, extract, known_sha1) for file_path, known_sha1 in work]
+
+
+class SourceFileScanner:
+    """Walk the ``source/<cate1>-<cate1+100>/`` tree and parse host files on a process pool.
+
+    ``scan`` yields ``(file_path, sha1, value, error)`` in the order of the given
+    files. ``value`` is ``extract(document)``, so only the fields a caller needs
+    travel back from the workers; ``extract`` must be picklable (a module-level
+    function, a classmethod or a ``functools.partial`` of one). Files whose sha1
+    equals ``known_sha1[file_path]`` are not parsed and come back with ``value``
+    None. Small scans, or ``workers <= 1``, run in the calling process.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        workers: Optional[int] = None,
+        chunk_size: int = SOURCE_SCAN_CHUNK_SIZE,
+    ):
+        self.root = root
+        self.workers = max(1, int(workers or os.cpu_count() or 1))
+        self.chunk_size = max(1, int(chunk_size))
+
+    def list_files(self) -> List[str]:
+        file_list: List[str] = []
+        if not os.path.exists(self.root):
+            return file_list
+        for root, _, files in os.walk(self.root):
+            for name in files:
+                if name.endswith(".json"):
+                    file_list.append(os.path.join(root, name))
+        file_list.sort()
+        return file_list
+
+    def _iter_chunks(
+        self, file_list: Sequence[str], known_sha1: Optional[Dict[str, str]]
+    ) -> Iterator[List[Tuple[str, Optional[str]]]]:
+        known_sha1 = known_sha1 or {}
+        for start in range(0, len(file_list), self.chunk_size):
+            yield [
+                (file_path, known_sha1.get(file_path))
+                for file_path in file_list[start : start + self.chunk_size]
+            ]
+
+    def scan(
+        self,
+        file_list: Optional[Sequence[str]] = None,
+        extract: Optional[Extractor] = None,
+        known_sha1: Optional[Dict[str, str]] = None,
+    ) -> Iterator[ScanResult]:
+        file_list = self.list_files() if file_list is None else list(file_list)
+        chunks = self._iter_chunks(file_list, known_sha1)
+        if self.workers <= 1 or len(file_list) <= self.chunk_size:
+            for work in chunks:
+                yield from _scan_chunk(extract, work)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            pending: Deque[Future] = deque()
+            for work in chunks:
+                pending.append(executor.submit(_scan_chunk, extract, work))
+                if len(pending) >= self.workers * 2:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
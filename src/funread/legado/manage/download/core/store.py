@@ -1,10 +1,12 @@
 """Local source storage primitives."""
 
+import hashlib
 import json
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
+from functools import partial
 from pathlib import Path
-from typing import Any, Dict, Iterator, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 from nltfile import funos
 from nltfile.compress import tarfile
@@ -12,11 +14,91 @@ from nltlog import getLogger
 from nlttask import Task
 from tqdm import tqdm
 
-from .constants import DEFAULT_BACKUP_ID
+from .bloom import BloomFilter
+from .cache import SourceDocumentCache
+from .constants import (
+    DEFAULT_BACKUP_ID,
+    DOCUMENT_CACHE_SIZE,
+    EXPORT_PARTITION_MAX_PARTS,
+    EXPORT_PARTITION_SPAN,
+    MD5_BLOOM_CAPACITY,
+    SOURCE_LIST_FETCH_PER_HOST,
+    SOURCE_LIST_FETCH_WORKERS,
+    URL_ID_BLOCK_SIZE,
+)
+from .index import SourceMd5Index
+from .manifest import SourceFileManifest
+from .merge_index import SourceMergeIndex
+from .scanner import SourceFileScanner
 
 
 logger = getLogger("funread")
 
+MD5_BLOOM_SYNC_MARGIN = timedelta(minutes=10)
+
+
+def split_source_batch(
+    sources: List[Dict[str, Any]], max_size: int, max_bytes: Optional[int] = None
+) -> List[List[Dict[str, Any]]]:
+    """Split ``sources`` into batches of at most ``max_size`` items and ``max_bytes`` of JSON.
+
+    Every batch keeps at least one source, so a single oversized source still gets a
+    batch of its own.
+    """
+    batches: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    current_bytes = 2
+    for source in sources:
+        source_bytes = len(json.dumps(source).encode("utf-8")) + 2 if max_bytes else 0
+        if current and (
+            len(current) >= max_size or (max_bytes and current_bytes + source_bytes > max_bytes)
+        ):
+            batches.append(current)
+            current, current_bytes = [], 2
+        current.append(source)
+        current_bytes += source_bytes
+    if current:
+        batches.append(current)
+    return batches
+
+
+def export_document_items(data: Dict[str, Any], source_url_key: str) -> List[Dict[str, Any]]:
+    """Pick the exported slice of a host document: up to 5 merged or 3 candidate sources."""
+    if not data.get("available", True):
+        return []
+
+    items: List[Dict[str, Any]] = []
+    for key in ("merged", "candidate"):
+        if key not in data:
+            continue
+        current = data[key]
+        if len(current) == 0:
+            continue
+        current = current[:3] if key == "candidate" else current[:5]
+        for item in current:
+            if "source" not in item or "md5_list" not in item:
+                continue
+            source = item["source"].copy()
+            if source_url_key in source and item["md5_list"]:
+                source[source_url_key] = f"{source[source_url_key]}#{item['md5_list'][0][:10]}"
+            source["customOrder"] = data.get("customOrder", 999999999)
+            items.append(source)
+        break
+    return items
+
+
+def export_document_entry(data: Dict[str, Any], source_url_key: str) -> Dict[str, Any]:
+    """Build the export-manifest fields of a host document."""
+    items = export_document_items(data, source_url_key)
+    slice_md5 = hashlib.md5(
+        json.dumps(items, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
+    return {
+        "md5": slice_md5,
+        "customOrder": data.get("customOrder", 999999999),
+        "items": items,
+    }
+
 
 class SourceStoreTask(Task):
     """Base class for tasks that operate on a local source store."""
@@ -36,11 +118,30 @@ class LocalSourceStore:
         self.path_bak = str(base_path / "bak")
         self.path_pkl = str(base_path / "pkl")
         self.path_bok = str(base_path / "source")
+        # Rebuildable caches that backups skip; dumps_zip archives only pkl/ and source/.
+        self.path_cache = str(base_path / "cache")
         self.database_url = kwargs.get("database_url")
+        self.fetch_workers = int(kwargs.get("fetch_workers", SOURCE_LIST_FETCH_WORKERS))
+        self.fetch_per_host = int(kwargs.get("fetch_per_host", SOURCE_LIST_FETCH_PER_HOST))
+        self.scan_workers = kwargs.get("scan_workers")
 
         self.url_map: Dict[str, int] = {}
-        self.md5_set: Dict[str, Dict[str, Any]] = {}
+        self.md5_set = SourceMd5Index(source_type=cate1)
         self.current_id = 1
+        self.url_id_block_size = int(kwargs.get("url_id_block_size", URL_ID_BLOCK_SIZE))
+        self._url_id_block = (0, 0)
+        self._pending_index_records: Dict[str, Dict[str, Any]] = {}
+        self.document_cache = SourceDocumentCache(
+            writer=self.save_document,
+            max_documents=kwargs.get("document_cache_size", DOCUMENT_CACHE_SIZE),
+        )
+        self._session_depth = 0
+        self._dirty_reasons: Set[str] = set()
+        self.lazy_index = bool(kwargs.get("lazy_index", False))
+        self._md5_bloom: Optional[BloomFilter] = None
+        self._absent_md5s: Set[str] = set()
+        self._absent_urls: Set[str] = set()
+        self._merge_index: Optional[SourceMergeIndex] = None
         self._ensure_directories()
 
     def _ensure_directories(self) -> None:
@@ -101,21 +202,17 @@ class LocalSourceStore:
     def get_source_url_key(self) -> str:
         return "sourceUrl"
 
-    @staticmethod
     def add_source_to_candidate(
+        self,
         md5: str,
         fpath: str,
         source: Dict[str, Any],
         url_info: Optional[Dict[str, Any]] = None,
     ) -> None:
         url_info = url_info or {}
-        if os.path.exists(fpath):
-            try:
-                data = LocalSourceStore._load_json_safely(fpath)
-            except (json.JSONDecodeError, IOError):
-                data = LocalSourceStore._create_default_data(url_info)
-        else:
-            data = LocalSourceStore._create_default_data(url_info)
+        data = self.document_cache.get(
+            fpath, loader=lambda: self._load_candidate_document(fpath, url_info)
+        )
 
         if data.get("final", False) or not data.get("available", True):
             return
@@ -123,7 +220,56 @@ class LocalSourceStore:
         existing_md5s = LocalSourceStore._collect_existing_md5s(data)
         if md5 not in existing_md5s:
             data["candidate"].append({"md5_list": [md5], "source": source})
-            LocalSourceStore._save_json_safely(fpath, data)
+            self.document_cache.mark_dirty(fpath)
+            self.mark_dirty("documents")
+
+    @property
+    def merge_index_path(self) -> str:
+        return os.path.join(self.path_pkl, "merge-index.json")
+
+    @property
+    def merge_index(self) -> SourceMergeIndex:
+        if self._merge_index is None:
+            self._merge_index = SourceMergeIndex(self.merge_index_path, root=self.path_bok).load()
+        return self._merge_index
+
+    def save_document(
+        self, file_path: str, data: Dict[str, Any], merged_at: Optional[str] = None
+    ) -> None:
+        """Write a host document and record its merge metadata."""
+        self._save_json_safely(file_path, data)
+        self.merge_index.record(file_path, data, merged_at=merged_at)
+
+    @staticmethod
+    def _load_candidate_document(fpath: str, url_info: Dict[str, Any]) -> Dict[str, Any]:
+        if os.path.exists(fpath):
+            try:
+                return LocalSourceStore._load_json_safely(fpath)
+            except (json.JSONDecodeError, IOError):
+                pass
+        return LocalSourceStore._create_default_data(url_info)
+
+    @property
+    def is_dirty(self) -> bool:
+        return bool(self._dirty_reasons)
+
+    def mark_dirty(self, reason: str) -> None:
+        """Record that in-memory state changed and has to be persisted by ``dumps()``."""
+        self._dirty_reasons.add(reason)
+
+    def checkpoint(self) -> bool:
+        """Persist the store if anything changed since the last ``dumps()``."""
+        if not self._dirty_reasons:
+            return False
+        logger.info(f"Checkpoint store changes: {', '.join(sorted(self._dirty_reasons))}")
+        self.dumps()
+        return True
+
+    def flush_documents(self) -> int:
+        """Write cached source documents back to disk and drop them from memory."""
+        written = self.document_cache.flush()
+        self.document_cache.clear()
+        return written
 
     @staticmethod
     def _create_default_data(url_info: Dict[str, Any]) -> Dict[str, Any]:
@@ -146,99 +292,388 @@ class LocalSourceStore:
                         md5_list.extend(item["md5_list"])
         return md5_list
 
-    def export_sources(self, size: int = 1000) -> Iterator[List[Dict[str, Any]]]:
-        file_list: List[str] = []
-        if os.path.exists(self.path_bok):
-            for root, _, files in os.walk(self.path_bok):
-                for file in files:
-                    if file.endswith(".json"):
-                        file_list.append(os.path.join(root, file))
+    @property
+    def export_manifest_path(self) -> str:
+        # The manifest holds a copy of every exported item; keep it out of backups.
+        return os.path.join(self.path_cache, "export-manifest.json")
+
+    @property
+    def scanner(self) -> SourceFileScanner:
+        return SourceFileScanner(self.path_bok, workers=self.scan_workers)
+
+    def _list_source_files(self) -> List[str]:
+        return self.scanner.list_files()
+
+    def _open_export_manifest(self, use_manifest: bool) -> SourceFileManifest:
+        manifest = SourceFileManifest(self.export_manifest_path, root=self.path_bok)
+        if use_manifest:
+            manifest.load()
+        return manifest
+
+    def _iter_export_items(
+        self, file_list: List[str], manifest: SourceFileManifest, progress: bool = True
+    ) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+        """Yield ``(file_path, items)`` in file order, parsing only files the manifest misses."""
+        fingerprints = {file_path: manifest.fingerprint(file_path) for file_path in file_list}
+        stale = [
+            file_path
+            for file_path in file_list
+            if manifest.lookup(file_path, fingerprints[file_path]) is None
+        ]
+        scanned = self.scanner.scan(
+            stale, extract=partial(export_document_entry, source_url_key=self.get_source_url_key())
+        )
+        if progress:
+            file_list = tqdm(file_list, desc="Exporting sources")
+        for file_path in file_list:
+            entry = manifest.lookup(file_path, fingerprints[file_path])
+            if entry is None:
+                _, _, fields, error = next(scanned)
+                if error is not None:
+                    logger.warning(f"Failed to process {file_path}: {error}")
+                    manifest.discard(file_path)
+                    continue
+                entry = manifest.update(file_path, fingerprints[file_path], **fields)
+            yield file_path, [dict(source) for source in entry["items"]]
 
-        dd: List[Dict[str, Any]] = []
-        for file_path in tqdm(file_list, desc="Exporting sources"):
-            try:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
+    def export_sources(
+        self, size: int = 1000, use_manifest: bool = True
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Yield exported sources in batches of ``size``.
 
-                if not data.get("available", True):
-                    continue
+        Host files whose mtime and size match the export manifest are not parsed
+        again; their previously exported slice is reused instead.
+        """
+        self.flush_documents()
+        file_list = self._list_source_files()
+        manifest = self._open_export_manifest(use_manifest)
 
-                for key in ("merged", "candidate"):
-                    if key not in data:
-                        continue
-                    current = data[key]
-                    if len(current) == 0:
-                        continue
-                    current = current[:3] if key == "candidate" else current[:5]
-                    for item in current:
-                        if "source" not in item or "md5_list" not in item:
-                            continue
-                        source = item["source"].copy()
-                        source_url_key = self.get_source_url_key()
-                        if source_url_key in source and item["md5_list"]:
-                            source[source_url_key] = (
-                                f"{source[source_url_key]}#{item['md5_list'][0][:10]}"
-                            )
-                        source["customOrder"] = data.get("customOrder", 999999999)
-                        dd.append(source)
-                        if len(dd) >= size:
-                            yield dd
-                            dd = []
-                    break
-            except (IOError, json.JSONDecodeError, KeyError) as e:
-                logger.warning(f"Failed to process {file_path}: {e}")
+        dd: List[Dict[str, Any]] = []
+        try:
+            for _, items in self._iter_export_items(file_list, manifest):
+                for source in items:
+                    dd.append(source)
+                    if len(dd) >= size:
+                        yield dd
+                        dd = []
+            if dd:
+                yield dd
+            manifest.prune(file_list)
+        finally:
+            if use_manifest:
+                manifest.save()
+
+    @staticmethod
+    def _partition_bucket(
+        bucket: int,
+        sources: List[Dict[str, Any]],
+        size: int,
+        max_parts: int,
+        max_bytes: Optional[int] = None,
+    ) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        parts = split_source_batch(sources, size, max_bytes)
+        if len(parts) > max_parts:
+            logger.warning(
+                f"Bucket {bucket} has {len(sources)} sources, "
+                f"more than {max_parts} parts of {size}"
+            )
+            part_size = -(-len(sources) // max_parts)
+            parts = split_source_batch(sources, part_size, max_bytes)
+        if len(parts) > max_parts:
+            # Too many bytes for max_parts batches: cut at even shares of the JSON size
+            # so no batch is much larger than needed.
+            weights = [len(json.dumps(source).encode("utf-8")) + 2 for source in sources]
+            total = sum(weights)
+            grouped: List[List[Dict[str, Any]]] = [[] for _ in range(max_parts)]
+            offset = 0
+            for source, weight in zip(sources, weights):
+                grouped[min(offset * max_parts // total, max_parts - 1)].append(source)
+                offset += weight
+            parts = [batch for batch in grouped if batch]
+        for part, batch in enumerate(parts):
+            yield bucket * max_parts + part, batch
+
+    def export_source_partitions(
+        self,
+        size: int = 1000,
+        span: int = EXPORT_PARTITION_SPAN,
+        max_parts: int = EXPORT_PARTITION_MAX_PARTS,
+        use_manifest: bool = True,
+        max_bytes: Optional[int] = None,
+    ) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        """Yield ``(slot, batch)`` pairs with batches partitioned by url_id range.
+
+        Host files are grouped into buckets of ``span`` consecutive url ids and
+        each bucket is split into at most ``max_parts`` batches of about ``size``
+        sources (and ``max_bytes`` of JSON when given). The slot of a batch is
+        ``bucket * max_parts + part``, so adding or removing a host only changes
+        the batches of its own bucket.
+        """
+        self.flush_documents()
+        file_list = self._list_source_files()
+        buckets: Dict[int, List[Tuple[int, str]]] = {}
+        base_bucket = DEFAULT_BACKUP_ID // span
+        for file_path in file_list:
+            url_id = self._coerce_int(Path(file_path).stem)
+            if url_id is None:
+                logger.warning(f"Skip source file without url id: {file_path}")
                 continue
-        if dd:
-            yield dd
+            bucket = max(url_id // span - base_bucket, 0)
+            buckets.setdefault(bucket, []).append((url_id, file_path))
+
+        ordered = [
+            (bucket, file_path)
+            for bucket in sorted(buckets)
+            for _, file_path in sorted(buckets[bucket])
+        ]
+        file_buckets = {file_path: bucket for bucket, file_path in ordered}
+        partition = partial(
+            self._partition_bucket, size=size, max_parts=max_parts, max_bytes=max_bytes
+        )
+
+        manifest = self._open_export_manifest(use_manifest)
+        try:
+            current, sources = None, []
+            exported = self._iter_export_items(
+                [file_path for _, file_path in ordered], manifest, progress=False
+            )
+            for file_path, items in tqdm(
+                exported, total=len(ordered), desc="Exporting source partitions"
+            ):
+                bucket = file_buckets[file_path]
+                if bucket != current:
+                    if sources:
+                        yield from partition(current, sources)
+                    current, sources = bucket, []
+                sources.extend(items)
+            if sources:
+                yield from partition(current, sources)
+            manifest.prune(file_list)
+        finally:
+            if use_manifest:
+                manifest.save()
+
+    def allocate_url_id(self) -> int:
+        """Hand out the next id from a block reserved in the database."""
+        start, end = self._url_id_block
+        if start >= end:
+            from funread.legado.manage import reserve_source_detail_ids
+
+            start, end = reserve_source_detail_ids(
+                source_type=self.cate1,
+                count=self.url_id_block_size,
+                database_url=self.database_url,
+            )
+        self._url_id_block = (start + 1, end)
+        return start
+
+    def claim_url_ids(self, urls: Iterable[str]) -> None:
+        """Give unknown URLs an id and register them in source_detail_records right away.
+
+        The rows are written when the ids are handed out, so concurrent downloaders
+        adding the same hostname all end up with the id the database kept.
+        """
+        pending = [url for url in dict.fromkeys(urls) if url and url not in self.url_map]
+        if not pending:
+            return
+        from funread.legado.manage import claim_source_detail_ids
+
+        claims = {url: self.allocate_url_id() for url in pending}
+        winners = claim_source_detail_ids(
+            claims, source_type=self.cate1, database_url=self.database_url
+        )
+        for url in pending:
+            self.register_url_id(url, winners.get(url, claims[url]))
+
+    def register_url_id(self, url: str, url_id: int) -> None:
+        self.url_map[url] = url_id
+        self._absent_urls.discard(url)
+        self.current_id = max(self.current_id, url_id)
+
+    def register_source_md5(self, md5: str, record: Dict[str, Any]) -> None:
+        self.md5_set[md5] = record
+        self._pending_index_records[md5] = record
+        if self._md5_bloom is not None:
+            self._md5_bloom.add(md5)
+        self.mark_dirty("md5_set")
+
+    def flush_index_records(self) -> None:
+        """Write md5 index entries added since the last flush to source_index_records."""
+        if not self._pending_index_records:
+            return
+        from funread.legado.manage import upsert_source_index_records
+
+        upsert_source_index_records(
+            records=list(self._pending_index_records.values()),
+            source_type=self.cate1,
+            database_url=self.database_url,
+        )
+        self._pending_index_records = {}
 
     def loads(self) -> None:
         logger.info("Loading persisted data")
+        self._absent_md5s = set()
+        self._absent_urls = set()
+        if self.lazy_index:
+            self.url_map = {}
+            self.md5_set = SourceMd5Index(source_type=self.cate1)
+            self._md5_bloom = self._load_md5_bloom()
+        else:
+            self.url_map = self._load_url_map()
+            self.md5_set = self._load_md5_index()
+
+        self.current_id = max(self.url_map.values()) if self.url_map else DEFAULT_BACKUP_ID - 1
+        self.md5_set.update(self._pending_index_records)
+
+    def _load_url_map(self) -> Dict[str, int]:
         try:
             from funread.legado.manage import load_source_detail_url_map
 
-            self.url_map = load_source_detail_url_map(
+            return load_source_detail_url_map(
                 source_type=self.cate1, database_url=self.database_url
             )
         except ValueError:
-            self.url_map = {}
+            return {}
         except Exception as e:
             logger.warning(f"Failed to load URL map from database: {e}")
-            self.url_map = {}
-
-        self.current_id = max(self.url_map.values()) if self.url_map else DEFAULT_BACKUP_ID - 1
+            return {}
 
+    def _load_md5_index(self) -> SourceMd5Index:
         try:
-            from funread.legado.manage import load_source_index_map
+            from funread.legado.manage import iter_source_index_rows
 
-            self.md5_set = load_source_index_map(
-                source_type=self.cate1, database_url=self.database_url
+            return SourceMd5Index.from_rows(
+                iter_source_index_rows(source_type=self.cate1, database_url=self.database_url),
+                source_type=self.cate1,
             )
         except ValueError:
-            self.md5_set = {}
+            return SourceMd5Index(source_type=self.cate1)
         except Exception as e:
             logger.warning(f"Failed to load source index from database: {e}")
-            self.md5_set = {}
+            return SourceMd5Index(source_type=self.cate1)
+
+    @property
+    def md5_bloom_path(self) -> str:
+        return os.path.join(self.path_pkl, "md5-bloom.bin")
+
+    def _load_md5_bloom(self) -> Optional[BloomFilter]:
+        """Load the persisted md5 bloom filter and top it up with rows updated since its sync."""
+        bloom: Optional[BloomFilter] = None
+        if os.path.exists(self.md5_bloom_path):
+            try:
+                bloom = BloomFilter.load(self.md5_bloom_path)
+            except (IOError, ValueError, KeyError) as e:
+                logger.warning(f"Ignore unreadable md5 bloom filter: {e}")
+        try:
+            from funread.legado.manage import iter_source_index_rows
+
+            synced_at = datetime.utcnow()
+            updated_since = None
+            if bloom is None or bloom.is_saturated or bloom.synced_at is None:
+                capacity = max(MD5_BLOOM_CAPACITY, bloom.count * 2 if bloom else 0)
+                bloom = BloomFilter(capacity=capacity)
+            else:
+                updated_since = bloom.synced_at - MD5_BLOOM_SYNC_MARGIN
+            rows = iter_source_index_rows(
+                source_type=self.cate1,
+                database_url=self.database_url,
+                updated_since=updated_since,
+            )
+            bloom.update(md5 for md5, _, _ in rows)
+            bloom.synced_at = synced_at
+            bloom.save(self.md5_bloom_path)
+            return bloom
+        except ValueError:
+            return None
+        except Exception as e:
+            logger.warning(f"Failed to sync md5 bloom filter: {e}")
+            return None
+
+    def has_source_md5(self, md5: str) -> bool:
+        """Check md5 membership, querying the database lazily when ``lazy_index`` is on."""
+        if md5 in self.md5_set:
+            return True
+        if not self.lazy_index or md5 in self._absent_md5s:
+            return False
+        if self._md5_bloom is not None and md5 not in self._md5_bloom:
+            return False
+        self.prefetch_source_md5s([md5])
+        return md5 in self.md5_set
+
+    def prefetch_source_md5s(self, md5_list: List[str]) -> None:
+        """Resolve the md5s the bloom filter cannot rule out with chunked index queries."""
+        if not self.lazy_index:
+            return
+        bloom = self._md5_bloom
+        pending = [
+            md5
+            for md5 in dict.fromkeys(md5_list)
+            if md5 not in self.md5_set
+            and md5 not in self._absent_md5s
+            and (bloom is None or md5 in bloom)
+        ]
+        if not pending:
+            return
+        try:
+            from funread.legado.manage import lookup_source_index_records
+
+            found = lookup_source_index_records(
+                pending, source_type=self.cate1, database_url=self.database_url
+            )
+        except ValueError:
+            found = {}
+        except Exception as e:
+            logger.warning(f"Failed to look up source index records: {e}")
+            return
+        for md5, record in found.items():
+            self.md5_set[md5] = record
+        self._absent_md5s.update(md5 for md5 in pending if md5 not in found)
+
+    def prefetch_url_ids(self, urls: List[str]) -> None:
+        """Resolve hostnames missing from ``url_map`` with chunked source-detail queries."""
+        if not self.lazy_index:
+            return
+        pending = [
+            url
+            for url in dict.fromkeys(urls)
+            if url not in self.url_map and url not in self._absent_urls
+        ]
+        if not pending:
+            return
+        try:
+            from funread.legado.manage import lookup_source_detail_ids
+
+            found = lookup_source_detail_ids(
+                pending, source_type=self.cate1, database_url=self.database_url
+            )
+        except ValueError:
+            found = {}
+        except Exception as e:
+            logger.warning(f"Failed to look up source detail ids: {e}")
+            return
+        self.url_map.update(found)
+        self._absent_urls.update(url for url in pending if url not in found)
 
     def dumps(self) -> None:
         logger.info("Saving data to persistent storage")
         self._ensure_directories()
+        self.flush_documents()
         try:
-            if self.md5_set:
-                from funread.legado.manage import upsert_source_index_records
-
-                upsert_source_index_records(
-                    records=list(self.md5_set.values()),
-                    source_type=self.cate1,
-                    database_url=self.database_url,
-                )
+            self.flush_index_records()
+            if self._md5_bloom is not None:
+                self._md5_bloom.save(self.md5_bloom_path)
+            if self._merge_index is not None:
+                self._merge_index.save()
         except IOError as e:
             logger.error(f"Failed to save data: {e}")
             raise
         except Exception as e:
             logger.error(f"Failed to save source index: {e}")
             raise
+        self._dirty_reasons.clear()
 
     def loads_zip(self, zip_file: Optional[str] = None) -> None:
+        self.flush_documents()
         if os.path.exists(self.path_pkl):
             funos.delete(self.path_pkl)
         if os.path.exists(self.path_bok):
@@ -293,11 +728,17 @@ class LocalSourceStore:
             raise
 
     def __enter__(self):
-        self.loads()
+        """Open a store session; nested ``with`` blocks reuse the outermost one."""
+        if self._session_depth == 0:
+            self.loads()
+            self._dirty_reasons.clear()
+        self._session_depth += 1
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.dumps()
+        self._session_depth -= 1
+        if self._session_depth == 0:
+            self.checkpoint()
 
 
 class DownloadSourceDataTask(SourceStoreTask):
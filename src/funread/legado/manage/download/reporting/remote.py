@@ -1,78 +1,266 @@
 """Remote publishing helpers for source snapshots."""
 
-from typing import Any, Dict, List
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import hashlib
 import json
+import os
 import re
+import threading
+import time
 
 from nltlog import getLogger
 from nlttask import Task
 
-from ..core.constants import EXPORT_BATCH_SIZE
+from ...utils import TokenBucket
+from ..core.constants import EXPORT_BATCH_SIZE, MAX_UPLOAD_BATCH_BYTES, UPLOAD_REQUESTS_PER_SECOND
+from ..core.store import split_source_batch
 
 
 logger = getLogger("funread")
 
+DEFAULT_UPLOAD_BURST = 10
+DEFAULT_RATE_LIMIT_RETRIES = 3
+DEFAULT_RATE_LIMIT_BACKOFF = 60.0
+
 
 class SourceRemoteManager:
-    """Upload split source batches and publish generated report files."""
+    """Upload split source batches and publish generated report files.
+
+    Uploads are throttled to ``upload_rate`` requests per second when it is set, and
+    to ``UPLOAD_REQUESTS_PER_SECOND`` when ``upload_workers`` run concurrently.
+    """
 
-    def __init__(self, context: Any, initial_counter: int, min_upload_batch_size: int):
+    def __init__(
+        self,
+        context: Any,
+        initial_counter: int,
+        min_upload_batch_size: int,
+        ledger_path: Optional[str] = None,
+        delta: bool = True,
+        partitioned: bool = False,
+        upload_workers: int = 1,
+        max_batch_bytes: Optional[int] = MAX_UPLOAD_BATCH_BYTES,
+        rate_limiter: Optional[TokenBucket] = None,
+        rate_limit_retries: int = DEFAULT_RATE_LIMIT_RETRIES,
+        upload_rate: Optional[float] = None,
+    ):
         self.context = context
         self.initial_counter = initial_counter
         self.min_upload_batch_size = min_upload_batch_size
+        self.ledger_path = ledger_path
+        self.delta = delta
+        self.partitioned = partitioned
+        self.upload_workers = max(1, int(upload_workers))
+        self.max_batch_bytes = max_batch_bytes
+        if upload_rate is None:
+            upload_rate = UPLOAD_REQUESTS_PER_SECOND if self.upload_workers > 1 else 0
+        # A zero rate never blocks but still honours pause() on Retry-After.
+        self.rate_limiter = rate_limiter or TokenBucket(
+            rate=upload_rate, capacity=max(DEFAULT_UPLOAD_BURST, self.upload_workers)
+        )
+        self.rate_limit_retries = rate_limit_retries
+        self._lock = threading.Lock()
+        self._ledger: Dict[str, Dict[str, Any]] = {}
+        self._remote_batches: Optional[Dict[int, Dict[str, Any]]] = None
+        self.report: Dict[str, List[int]] = self._empty_report()
+
+    @staticmethod
+    def _empty_report() -> Dict[str, List[int]]:
+        return {"uploaded": [], "skipped": [], "deleted": []}
+
+    @staticmethod
+    def content_sha(content: str) -> str:
+        """Git blob sha of ``content``, comparable with the sha GitHub lists for a file."""
+        data = content.encode("utf-8")
+        return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+    @staticmethod
+    def _batch_counter(name: Any) -> Optional[int]:
+        match = re.fullmatch(r"progress-(\d+)\.json", str(name))
+        return int(match.group(1)) if match else None
+
+    @staticmethod
+    def _remote_file_sha(file: Any) -> Optional[str]:
+        ext = getattr(file, "ext", None)
+        if ext is None and isinstance(file, dict):
+            ext = file.get("ext")
+        if isinstance(ext, dict) and ext.get("sha"):
+            return str(ext["sha"])
+        sha = getattr(file, "sha", None)
+        return str(sha) if sha else None
+
+    def load_ledger(self) -> None:
+        self._ledger = {}
+        if not self.ledger_path or not os.path.exists(self.ledger_path):
+            return
+        try:
+            with open(self.ledger_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (IOError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignore unreadable upload ledger {self.ledger_path}: {e}")
+            return
+        if isinstance(data, dict) and data.get("dir_path") == self.context.dir_path:
+            self._ledger = data.get("batches") or {}
+
+    def save_ledger(self) -> None:
+        if not self.ledger_path:
+            return
+        os.makedirs(os.path.dirname(self.ledger_path) or ".", exist_ok=True)
+        with open(self.ledger_path, "w", encoding="utf-8") as f:
+            json.dump({"dir_path": self.context.dir_path, "batches": self._ledger}, f, indent=2)
+
+    def list_remote_batches(self) -> Optional[Dict[int, Dict[str, Any]]]:
+        """Map remote batch counters to their fid and sha, or None if listing failed."""
+        try:
+            files = self.context.drive.get_file_list(self.context.dir_path)
+        except Exception as e:
+            logger.warning(f"Failed to list remote batches: {e}")
+            return None
+        batches: Dict[int, Dict[str, Any]] = {}
+        for file in files:
+            counter = self._batch_counter(file.name)
+            if counter is not None:
+                batches[counter] = {"fid": file.fid, "sha": self._remote_file_sha(file)}
+        return batches
+
+    def is_batch_unchanged(self, counter: int, sha: str) -> bool:
+        """Whether the remote batch ``counter`` is known to hold ``sha``.
+
+        Without a remote listing nothing is known about the remote copy, so the
+        batch is uploaded again; the ledger only stands in for a listed file
+        whose sha the drive did not report.
+        """
+        if not self.delta or self._remote_batches is None:
+            return False
+        remote = self._remote_batches.get(counter)
+        if remote is None:
+            return False
+        if remote.get("sha"):
+            return remote["sha"] == sha
+        return self._ledger.get(str(counter), {}).get("sha") == sha
 
     @staticmethod
     def is_file_too_large_error(error: Exception) -> bool:
         message = str(error).lower()
         return "too large" in message or "422" in message
 
-    def upload_single_batch(self, data: List[Dict[str, Any]], counter: int) -> None:
+    @staticmethod
+    def rate_limit_delay(error: Exception) -> Optional[float]:
+        """Seconds to wait before retrying after ``error``, or None if it is not a rate limit."""
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None) or {}
+        retry_after = headers.get("Retry-After")
+        if retry_after:
+            try:
+                return max(float(retry_after), 0.0)
+            except ValueError:
+                pass
+        reset = headers.get("X-RateLimit-Reset")
+        if reset and str(headers.get("X-RateLimit-Remaining")) == "0":
+            try:
+                return max(float(reset) - time.time(), 1.0)
+            except ValueError:
+                pass
+        message = str(error).lower()
+        if "rate limit" not in message and "429" not in message:
+            return None
+        match = re.search(r"retry[- ]after\D{0,3}(\d+)", message)
+        return float(match.group(1)) if match else DEFAULT_RATE_LIMIT_BACKOFF
+
+    def _upload_content(self, content: str, filename: str, counter: int) -> None:
+        for attempt in range(self.rate_limit_retries + 1):
+            self.rate_limiter.acquire()
+            try:
+                uploaded = self.context.drive.upload_file(
+                    content=content,
+                    fid=self.context.dir_path,
+                    filepath=None,
+                    filename=filename,
+                )
+                # The drive logs and swallows its own errors, reporting them as False.
+                if uploaded is False:
+                    raise RuntimeError(f"Drive failed to upload {filename}")
+                return
+            except Exception as e:
+                delay = self.rate_limit_delay(e)
+                if delay is None or attempt >= self.rate_limit_retries:
+                    raise
+                logger.warning(f"Rate limited uploading batch {counter}, retry in {delay:.0f}s")
+                self.rate_limiter.pause(delay)
+
+    def upload_single_batch(self, data: List[Dict[str, Any]], counter: int) -> bool:
+        """Upload one batch; return False when the remote copy is already identical."""
         git_path = f"{self.context.dir_path}/progress-{counter}.json"
         filename = f"progress-{counter}.json"
-        self.context.drive.upload_file(
-            content=json.dumps(data),
-            fid=self.context.dir_path,
-            filepath=None,
-            filename=filename,
-        )
-        self.context._remember_source_count(git_path, filename, count=len(data))
+        content = json.dumps(data)
+        sha = self.content_sha(content)
+        with self._lock:
+            unchanged = self.is_batch_unchanged(counter, sha)
+            if unchanged:
+                self.context._remember_source_count(git_path, filename, count=len(data))
+                self.report["skipped"].append(counter)
+        if unchanged:
+            logger.info(f"Skip unchanged batch {git_path}")
+            return False
+        self._upload_content(content, filename, counter)
+        with self._lock:
+            self.context._remember_source_count(git_path, filename, count=len(data))
+            self._ledger[str(counter)] = {"sha": sha, "count": len(data)}
+            self.report["uploaded"].append(counter)
         logger.info(f"Uploaded {len(data)} sources to {git_path}")
+        return True
+
+    def split_rejected_batch(
+        self, data: List[Dict[str, Any]], counter: int, error: Exception
+    ) -> List[List[Dict[str, Any]]]:
+        """Halve a batch the remote rejected as too large, re-raising any other error."""
+        if not self.is_file_too_large_error(error) or len(data) <= self.min_upload_batch_size:
+            logger.error(f"Failed to upload batch {counter}: {error}")
+            raise error
+        split_size = max(len(data) // 2, self.min_upload_batch_size)
+        logger.warning(
+            f"Batch {counter} too large with {len(data)} sources, split into chunks of {split_size}"
+        )
+        return [data[start : start + split_size] for start in range(0, len(data), split_size)]
 
     def upload_batch(self, data: List[Dict[str, Any]], counter: int) -> int:
         try:
             self.upload_single_batch(data, counter)
             return counter + 1
         except Exception as e:
-            if self.is_file_too_large_error(e) and len(data) > self.min_upload_batch_size:
-                split_size = max(len(data) // 2, self.min_upload_batch_size)
-                logger.warning(
-                    f"Batch {counter} too large with {len(data)} sources, split into chunks of {split_size}"
-                )
-                next_counter = counter
-                for start in range(0, len(data), split_size):
-                    next_counter = self.upload_batch(data[start : start + split_size], next_counter)
-                return next_counter
-            logger.error(f"Failed to upload batch {counter}: {e}")
-            raise
+            next_counter = counter
+            for chunk in self.split_rejected_batch(data, counter, e):
+                next_counter = self.upload_batch(chunk, next_counter)
+            return next_counter
 
-    def cleanup_stale_remote_batches(self, next_counter: int) -> None:
+    def cleanup_stale_remote_batches(
+        self, next_counter: int, keep_counters: Optional[Iterable[int]] = None
+    ) -> List[int]:
+        """Delete remote batches from ``next_counter`` on, or all not in ``keep_counters``."""
+        keep = set(keep_counters) if keep_counters is not None else None
+        deleted: List[int] = []
         try:
             files = self.context.drive.get_file_list(self.context.dir_path)
             stale_files = []
             for file in files:
-                match = re.fullmatch(r"progress-(\d+)\.json", str(file.name))
-                if not match:
+                counter = self._batch_counter(file.name)
+                if counter is None:
                     continue
-                counter = int(match.group(1))
-                if counter >= next_counter:
+                stale = counter not in keep if keep is not None else counter >= next_counter
+                if stale:
                     stale_files.append((counter, file.fid))
             for counter, fid in sorted(stale_files):
                 if self.context.drive.delete(fid):
+                    deleted.append(counter)
+                    self._ledger.pop(str(counter), None)
                     logger.info(f"Deleted stale remote batch progress-{counter}.json")
                 else:
                     logger.warning(f"Failed to delete stale remote batch progress-{counter}.json")
         except Exception as e:
             logger.warning(f"Failed to cleanup stale remote batches: {e}")
+        self.report["deleted"].extend(deleted)
+        return deleted
 
     def publish_html_report(self, html_content: str) -> None:
         self.context.drive.upload_file(
@@ -83,17 +271,125 @@ class SourceRemoteManager:
         )
         logger.info("RSS configuration updated successfully")
 
-    def upload_exported_sources(self, runner: Any, export_batch_size: int) -> None:
+    def _iter_upload_plan(
+        self, runner: Any, export_batch_size: int
+    ) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        """Assign a counter to every batch before it is uploaded."""
+        if self.partitioned:
+            partitions = runner.export_source_partitions(
+                size=export_batch_size, max_bytes=self.max_batch_bytes
+            )
+            for slot, data in partitions:
+                yield self.initial_counter + slot, data
+            return
         counter = self.initial_counter
-        uploaded_any = False
         for data in runner.export_sources(size=export_batch_size):
-            if data:
-                uploaded_any = True
-                counter = self.upload_batch(data, counter)
-        if uploaded_any:
-            self.cleanup_stale_remote_batches(counter)
-        else:
-            logger.warning("No exported source batches produced; skip remote cleanup")
+            if not data:
+                continue
+            for batch in split_source_batch(data, len(data), self.max_batch_bytes):
+                yield counter, batch
+                counter += 1
+
+    def _upload_planned_batch(
+        self, data: List[Dict[str, Any]], counter: int
+    ) -> List[List[Dict[str, Any]]]:
+        """Upload one planned batch; return its halves when it was rejected as too large."""
+        try:
+            self.upload_single_batch(data, counter)
+            return []
+        except Exception as e:
+            return self.split_rejected_batch(data, counter, e)
+
+    def _run_upload_plan(
+        self, plan: Iterable[Tuple[int, List[Dict[str, Any]]]], counters: List[int]
+    ) -> List[Tuple[int, List[List[Dict[str, Any]]]]]:
+        """Upload ``plan``, appending its counters; return the batches that were split."""
+        rejected: List[Tuple[int, List[List[Dict[str, Any]]]]] = []
+        if self.upload_workers <= 1:
+            for counter, data in plan:
+                counters.append(counter)
+                chunks = self._upload_planned_batch(data, counter)
+                if chunks:
+                    rejected.append((counter, chunks))
+            return rejected
+
+        pending: Dict[Future, int] = {}
+        with ThreadPoolExecutor(max_workers=self.upload_workers) as executor:
+            for counter, data in plan:
+                counters.append(counter)
+                pending[executor.submit(self._upload_planned_batch, data, counter)] = counter
+                if len(pending) >= self.upload_workers * 2:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        chunks = future.result()
+                        if chunks:
+                            rejected.append((pending[future], chunks))
+                        del pending[future]
+            for future, counter in pending.items():
+                chunks = future.result()
+                if chunks:
+                    rejected.append((counter, chunks))
+        return rejected
+
+    def upload_planned_batches(self, plan: Iterable[Tuple[int, List[Dict[str, Any]]]]) -> List[int]:
+        """Upload ``(counter, batch)`` pairs with up to ``upload_workers`` threads.
+
+        A batch rejected as too large is halved like in ``upload_batch``: the first
+        half keeps its counter and the others take counters after the last planned
+        one, as the following counters already belong to other batches. Returns the
+        counters of all uploaded or skipped batches.
+        """
+        counters: List[int] = []
+        rejected = self._run_upload_plan(plan, counters)
+        while rejected:
+            spare = max(counters) + 1
+            replan: List[Tuple[int, List[Dict[str, Any]]]] = []
+            for counter, chunks in sorted(rejected, key=lambda item: item[0]):
+                replan.append((counter, chunks[0]))
+                for chunk in chunks[1:]:
+                    replan.append((spare, chunk))
+                    spare += 1
+            rejected = self._run_upload_plan(replan, counters)
+        return sorted(set(counters))
+
+    def upload_exported_sources(self, runner: Any, export_batch_size: int) -> Dict[str, List[int]]:
+        """Upload changed batches, delete stale ones and return the upload report."""
+        if self.ledger_path is None and getattr(runner, "path_pkl", None):
+            self.ledger_path = os.path.join(runner.path_pkl, "upload-ledger.json")
+        self.report = self._empty_report()
+        self.load_ledger()
+        self._remote_batches = self.list_remote_batches() if self.delta else None
+
+        counter = self.initial_counter
+        uploaded_any = False
+        try:
+            keep_counters: Optional[List[int]] = None
+            if self.partitioned or self.upload_workers > 1:
+                keep_counters = self.upload_planned_batches(
+                    self._iter_upload_plan(runner, export_batch_size)
+                )
+                uploaded_any = bool(keep_counters)
+            else:
+                for data in runner.export_sources(size=export_batch_size):
+                    if not data:
+                        continue
+                    uploaded_any = True
+                    for batch in split_source_batch(data, len(data), self.max_batch_bytes):
+                        counter = self.upload_batch(batch, counter)
+            if uploaded_any:
+                self.cleanup_stale_remote_batches(counter, keep_counters=keep_counters)
+            else:
+                logger.warning("No exported source batches produced; skip remote cleanup")
+        finally:
+            self._remote_batches = None
+            self.save_ledger()
+        for counters in self.report.values():
+            counters.sort()
+        logger.info(
+            f"Upload report: {len(self.report['uploaded'])} uploaded, "
+            f"{len(self.report['skipped'])} skipped, {len(self.report['deleted'])} deleted"
+        )
+        return self.report
 
 
 class UploadSourceBatchesTask(Task):
@@ -104,14 +400,14 @@ class UploadSourceBatchesTask(Task):
         self.remote_manager = remote_manager
         super(UploadSourceBatchesTask, self).__init__(*args, **kwargs)
 
-    def run(self) -> None:
+    def run(self) -> Dict[str, List[int]]:
         if self.store is None:
             raise ValueError("store is required for UploadSourceBatchesTask")
         if self.remote_manager is None:
             raise ValueError("remote_manager is required for UploadSourceBatchesTask")
         try:
             with self.store as runner:
-                self.remote_manager.upload_exported_sources(
+                return self.remote_manager.upload_exported_sources(
                     runner=runner,
                     export_batch_size=EXPORT_BATCH_SIZE,
                 )
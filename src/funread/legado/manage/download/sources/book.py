@@ -130,7 +130,12 @@ class BookSourceProcessor(SourceProcessor):
         return "bookSourceUrl"
 
     def loader(self) -> None:
-        for _, data in iter_source_list_data(source_type=self.cate1):
+        for _, data in iter_source_list_data(
+            source_type=self.cate1,
+            max_workers=self.fetch_workers,
+            max_per_host=self.fetch_per_host,
+            status_writer=self.source_list_writer,
+        ):
             self.add_sources(data)
 
     def source_format(self, source: Dict[str, Any]) -> Dict[str, Any]:
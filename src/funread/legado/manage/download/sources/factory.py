@@ -8,9 +8,9 @@ class SourceStoreFactory:
     """Build concrete local source stores from source type."""
 
     @staticmethod
-    def create(path: str, source_type: str):
+    def create(path: str, source_type: str, **kwargs):
         if source_type == "booksource":
-            return BookSourceProcessor(path=path, cate1="book")
+            return BookSourceProcessor(path=path, cate1="book", **kwargs)
         if source_type == "rsssource":
-            return RSSSourceProcessor(path=path, cate1="rss")
+            return RSSSourceProcessor(path=path, cate1="rss", **kwargs)
         raise ValueError(f"Unsupported source_type: {source_type}")
@@ -40,5 +40,10 @@ class RSSSourceProcessor(SourceProcessor):
         return RSSSourceFormat(source).run()
 
     def loader(self) -> None:
-        for _, data in iter_source_list_data(source_type=self.cate1):
+        for _, data in iter_source_list_data(
+            source_type=self.cate1,
+            max_workers=self.fetch_workers,
+            max_per_host=self.fetch_per_host,
+            status_writer=self.source_list_writer,
+        ):
             self.add_sources(data)
@@ -1,6 +1,6 @@
 """Source generation orchestration task."""
 
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
 from funsecret import read_secret
 from nltlog import getLogger
@@ -37,23 +37,47 @@ class GenerateSourceTask(Task):
     def get_cache_root() -> str:
         return read_secret(cate1="funread", cate2="cache", cate3="path", cate4="root")
 
-    def build_context(self, source_type: str) -> SourceBuildContext:
+    def build_context(
+        self, source_type: str, remote_options: Optional[Dict[str, Any]] = None
+    ) -> SourceBuildContext:
         return SourceBuildContext(
             source_type=source_type,
             dir_path=f"{self.dir_path}/{'book' if source_type == 'booksource' else 'rss'}",
             repo=self.repo_str,
+            remote_options=remote_options,
         )
 
-    def build_runtime(self, source_type: str) -> Dict[str, Any]:
-        context = self.build_context(source_type)
+    def build_runtime(
+        self,
+        source_type: str,
+        remote_options: Optional[Dict[str, Any]] = None,
+        **store_options: Any,
+    ) -> Dict[str, Any]:
+        context = self.build_context(source_type, remote_options=remote_options)
         path = self.get_cache_root()
         return {
             "path": path,
             "source_type": source_type,
             "context": context,
-            "store": context.create_store(path),
+            "store": context.create_store(path, **store_options),
         }
 
+    @staticmethod
+    def _run_steps(
+        steps: List[Tuple[str, bool, Callable[[], Any]]],
+        store: Any = None,
+        checkpoints: Iterable[str] = (),
+    ) -> None:
+        checkpoints = set(checkpoints)
+        for name, enabled, run_step in steps:
+            if not enabled:
+                continue
+            if store is not None and name == "sync":
+                store.flush_documents()
+            run_step()
+            if store is not None and name in checkpoints:
+                store.checkpoint()
+
     def run_pipeline(
         self,
         source_type: str,
@@ -64,33 +88,62 @@ class GenerateSourceTask(Task):
         sync: bool = False,
         upload: bool = False,
         publish: bool = False,
+        single_session: bool = False,
+        checkpoints: Iterable[str] = (),
+        store_options: Optional[Dict[str, Any]] = None,
+        remote_options: Optional[Dict[str, Any]] = None,
         *args,
         **kwargs,
     ) -> Dict[str, Any]:
-        runtime = self.build_runtime(source_type)
+        """Run the selected pipeline steps in order.
+
+        With ``single_session`` the store is loaded once for the whole run and
+        persisted when it closes; steps listed in ``checkpoints`` additionally
+        persist it right after they finish. ``store_options`` are passed to the
+        store, e.g. ``{"lazy_index": True}`` to skip preloading the md5 index, and
+        ``remote_options`` to the uploader, e.g. ``{"upload_workers": 4, "upload_rate": 2.0}``
+        for concurrent uploads limited to two requests per second.
+        """
+        runtime = self.build_runtime(
+            source_type, remote_options=remote_options, **(store_options or {})
+        )
         context = runtime["context"]
         store = runtime["store"]
 
-        if load:
-            LoadSourceBackupTask(store=store).run()
-        if download:
-            DownloadSourceDataTask(store=store).run()
-        if merge:
-            SourceMergeRunner(store=store).run()
-        if dump:
-            DumpSourceBackupTask(store=store).run()
-        if sync:
-            SyncLocalSourceRecordsTask(path=runtime["path"]).run_source(
-                source_type="book" if source_type == "booksource" else "rss",
-                database_url=store.database_url,
-            )
-        if upload:
-            UploadSourceBatchesTask(store=store, remote_manager=context.remote_manager).run()
-        if publish:
-            PublishSourceReportTask(
-                report_builder=context.report_builder,
-                remote_manager=context.remote_manager,
-            ).run()
+        steps: List[Tuple[str, bool, Callable[[], Any]]] = [
+            ("load", load, lambda: LoadSourceBackupTask(store=store).run()),
+            ("download", download, lambda: DownloadSourceDataTask(store=store).run()),
+            ("merge", merge, lambda: SourceMergeRunner(store=store).run()),
+            ("dump", dump, lambda: DumpSourceBackupTask(store=store).run()),
+            (
+                "sync",
+                sync,
+                lambda: SyncLocalSourceRecordsTask(path=runtime["path"], store=store).run_source(
+                    source_type="book" if source_type == "booksource" else "rss",
+                    database_url=store.database_url,
+                ),
+            ),
+            (
+                "upload",
+                upload,
+                lambda: UploadSourceBatchesTask(
+                    store=store, remote_manager=context.remote_manager
+                ).run(),
+            ),
+            (
+                "publish",
+                publish,
+                lambda: PublishSourceReportTask(
+                    report_builder=context.report_builder,
+                    remote_manager=context.remote_manager,
+                ).run(),
+            ),
+        ]
+        if single_session:
+            with store:
+                self._run_steps(steps, store=store, checkpoints=checkpoints)
+        else:
+            self._run_steps(steps)
         return runtime
 
     def run_book(
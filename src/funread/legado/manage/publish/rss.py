@@ -9,6 +9,8 @@ from funfake.headers import Headers
 from nltlog import getLogger
 from nlttask import Task
 
+from ..utils import get_http_client
+
 logger = getLogger("funread")
 
 DEFAULT_ICON_URL = "https://via.placeholder.com/150"
@@ -39,7 +41,7 @@ class UpdateRssTask(Task):
     def random_icon(self, retries: int = REQUEST_RETRIES) -> str:
         for attempt in range(retries):
             try:
-                response = requests.get(
+                response = get_http_client().get(
                     CAT_API_URL,
                     headers=self.faker.generate(),
                     timeout=DEFAULT_TIMEOUT,
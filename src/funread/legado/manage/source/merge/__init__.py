@@ -1,5 +1,11 @@
 """Source merge tasks."""
 
+from .cache import SourceMergeCache
 from .task import MergeSourceTask, OpenAICompatibleSourceMerger, SourceMergeRunner
 
-__all__ = ["MergeSourceTask", "OpenAICompatibleSourceMerger", "SourceMergeRunner"]
+__all__ = [
+    "MergeSourceTask",
+    "OpenAICompatibleSourceMerger",
+    "SourceMergeCache",
+    "SourceMergeRunner",
+]
@@ -0,0 +1,134 @@
+"""Persistent content-addressed cache of LLM merge results."""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+from nltlog import getLogger
+
+
+logger = getLogger("funread")
+
+DEFAULT_MERGE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+class SourceMergeCache:
+    """SQLite-backed cache from merge inputs to the validated merged source.
+
+    Keys are derived from the sorted content md5s of the input versions together
+    with the source type, hostname and merger identity (model and prompt hash),
+    so a chunk that was merged before, including by a run that crashed later, is
+    answered from disk. Entries are evicted least recently used first once the
+    stored JSON exceeds ``max_bytes``.
+
+    The connection is opened on first use and released by ``close()`` (or on
+    leaving a ``with`` block); a closed cache reopens itself when used again.
+    """
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MERGE_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max(0, int(max_bytes))
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._total_bytes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS merge_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "used_at REAL NOT NULL)"
+            )
+            connection.commit()
+            row = connection.execute("SELECT COALESCE(SUM(size), 0) FROM merge_cache").fetchone()
+            self._total_bytes = int(row[0])
+            self._connection = connection
+        return self._connection
+
+    @staticmethod
+    def make_key(
+        input_md5s: Iterable[str], source_type: str, hostname: str, merger_identity: str
+    ) -> str:
+        payload = {
+            "md5s": sorted(input_md5s),
+            "source_type": source_type,
+            "hostname": hostname,
+            "merger": merger_identity,
+        }
+        return hashlib.sha256(
+            json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute(
+                "SELECT value FROM merge_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            connection.execute(
+                "UPDATE merge_cache SET used_at = ? WHERE key = ?", (time.time(), key)
+            )
+            connection.commit()
+            self.stats["hits"] += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, source: Dict[str, Any]) -> None:
+        value = json.dumps(source, ensure_ascii=False, separators=(",", ":"))
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            connection = self._connect()
+            previous = connection.execute(
+                "SELECT size FROM merge_cache WHERE key = ?", (key,)
+            ).fetchone()
+            connection.execute(
+                "INSERT OR REPLACE INTO merge_cache (key, value, size, used_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, size, time.time()),
+            )
+            self._total_bytes += size - (previous[0] if previous else 0)
+            self.stats["stores"] += 1
+            self._evict(connection)
+            connection.commit()
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        while self._total_bytes > self.max_bytes:
+            rows = connection.execute(
+                "SELECT key, size FROM merge_cache ORDER BY used_at LIMIT 64"
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                return
+            for key, size in rows:
+                if self._total_bytes <= self.max_bytes:
+                    break
+                connection.execute("DELETE FROM merge_cache WHERE key = ?", (key,))
+                self._total_bytes -= size
+                self.stats["evictions"] += 1
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._connect().execute("SELECT COUNT(*) FROM merge_cache").fetchone()[0])
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
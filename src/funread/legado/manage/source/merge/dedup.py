@@ -0,0 +1,124 @@
+"""Deterministic deduplication of source versions before an LLM merge."""
+
+import hashlib
+import json
+from typing import Any, Dict, FrozenSet, List, Tuple
+
+VOLATILE_KEYS = frozenset(
+    ["customOrder", "lastUpdateTime", "respondTime", "weight", "bookSourceComment", "sourceComment"]
+)
+JSON_STRING_KEYS = frozenset(["header"])
+
+VersionItem = Dict[str, Any]
+
+
+def _canonical_string(value: str) -> str:
+    lines = value.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip()
+
+
+def canonicalize_source(value: Any, key: str = "") -> Any:
+    """
+    Normalize what the source formatters leave alone.
+
+    Volatile keys are dropped, rule strings lose trailing and surrounding
+    whitespace, JSON-encoded ``header`` strings are parsed so their key order no
+    longer matters, and empty strings, dicts and lists are removed at any depth.
+    Returns None when nothing meaningful is left.
+    """
+    if key in JSON_STRING_KEYS and isinstance(value, str):
+        try:
+            parsed = json.loads(value)
+        except ValueError:
+            parsed = None
+        if isinstance(parsed, dict):
+            value = parsed
+    if isinstance(value, dict):
+        result = {}
+        for child_key in sorted(value):
+            if child_key in VOLATILE_KEYS:
+                continue
+            child = canonicalize_source(value[child_key], child_key)
+            if child is not None:
+                result[child_key] = child
+        return result or None
+    if isinstance(value, list):
+        items = [canonicalize_source(item) for item in value]
+        items = [item for item in items if item is not None]
+        return items or None
+    if isinstance(value, str):
+        return _canonical_string(value) or None
+    return value
+
+
+def _digest(value: Any) -> str:
+    if isinstance(value, str):
+        text = "s:" + value
+    else:
+        text = "j:" + json.dumps(value, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _flatten(value: Any, path: Tuple[str, ...] = ()) -> FrozenSet[Tuple[Tuple[str, ...], str]]:
+    """Leaf paths with a digest of each leaf, so large rule strings are not retained twice."""
+    if isinstance(value, dict):
+        pairs = set()
+        for key, child in value.items():
+            pairs.update(_flatten(child, path + (key,)))
+        return frozenset(pairs)
+    return frozenset([(path, _digest(value))])
+
+
+def _merge_md5_lists(target: List[str], md5_list: List[str]) -> None:
+    seen = set(target)
+    for md5 in md5_list:
+        if md5 not in seen:
+            seen.add(md5)
+            target.append(md5)
+
+
+def dedupe_version_items(version_items: List[VersionItem]) -> List[VersionItem]:
+    """
+    Collapse versions that are identical after canonicalization, then drop
+    versions whose canonical rules are a strict subset of another version's.
+
+    The surviving version keeps its original source and absorbs the md5s of the
+    versions it replaces. When several versions are strict supersets of the same
+    version, the one with the most rules (then the smallest canonical JSON, then
+    its digest) wins, so the result does not depend on dictionary or file ordering beyond
+    the order of the survivors, which follows their first appearance.
+    """
+    groups: Dict[str, Dict[str, Any]] = {}
+    for position, item in enumerate(version_items):
+        canonical = canonicalize_source(item.get("source")) or {}
+        text = json.dumps(canonical, sort_keys=True, ensure_ascii=False)
+        key = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        group = groups.get(key)
+        if group is None:
+            groups[key] = {
+                "position": position,
+                "key": key,
+                "size": len(text),
+                "pairs": _flatten(canonical),
+                "item": {"md5_list": list(item.get("md5_list", [])), "source": item["source"]},
+            }
+        else:
+            _merge_md5_lists(group["item"]["md5_list"], item.get("md5_list", []))
+
+    ranked = sorted(
+        groups.values(),
+        key=lambda group: (-len(group["pairs"]), group["size"], group["key"]),
+    )
+    survivors: List[Dict[str, Any]] = []
+    for group in ranked:
+        winner = next(
+            (kept for kept in survivors if group["pairs"] < kept["pairs"]),
+            None,
+        )
+        if winner is None:
+            survivors.append(group)
+        else:
+            _merge_md5_lists(winner["item"]["md5_list"], group["item"]["md5_list"])
+
+    survivors.sort(key=lambda group: group["position"])
+    return [group["item"] for group in survivors]
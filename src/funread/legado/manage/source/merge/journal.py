@@ -0,0 +1,154 @@
+"""Append-only checkpoint journal of chunk merges for one host file."""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from nltlog import getLogger
+
+
+logger = getLogger("funread")
+
+VersionItem = Dict[str, Any]
+
+
+class MergeCheckpointJournal:
+    """JSON-lines journal of merged chunks, keyed by what they merged rather than where.
+
+    Every entry records the host, the digests of the versions a chunk merged and
+    the merged item. A rerun after a crash replays the entries onto the current
+    versions of the host, whatever chunks it plans now, so versions added since
+    the crash do not undo finished merges. The host file is rewritten only once,
+    when the merge ends. A truncated trailing line left by a crash is ignored.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+        self._chunks: List[List[VersionItem]] = []
+        self._results: List[Optional[VersionItem]] = []
+        self.progressed = False
+
+    @staticmethod
+    def version_digest(item: VersionItem) -> str:
+        """Digest of a version's source, stable across plans and md5 lists."""
+        return hashlib.sha1(
+            json.dumps(item["source"], sort_keys=True, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()
+
+    @classmethod
+    def chunk_id(cls, hostname: str, chunk: List[VersionItem]) -> str:
+        payload = [hostname, sorted({cls.version_digest(item) for item in chunk})]
+        return hashlib.sha1(json.dumps(payload).encode("utf-8")).hexdigest()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self._entries is not None:
+            return self._entries
+        entries: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        entries[record["chunk"]] = {
+                            "host": record["host"],
+                            "versions": list(record["versions"]),
+                            "item": record["item"],
+                        }
+                    except (ValueError, KeyError, TypeError):
+                        continue
+            if entries:
+                logger.info(f"Replay merge journal: file={self.path}, chunks={len(entries)}")
+        self._entries = entries
+        return entries
+
+    def replay(self, hostname: str, items: List[VersionItem]) -> List[VersionItem]:
+        """Replace versions merged by journaled chunks with the merged items, in journal order.
+
+        An entry applies once all of its versions are present, so entries of later
+        rounds apply on top of the items replayed for earlier ones. md5s that the
+        replaced versions gained since then are kept on the merged item.
+        """
+        with self._lock:
+            entries = [entry for entry in self._load().values() if entry["host"] == hostname]
+        if not entries:
+            return items
+        items = list(items)
+        digests = [self.version_digest(item) for item in items]
+        applied = 0
+        for entry in entries:
+            positions = {digest: index for index, digest in reversed(list(enumerate(digests)))}
+            if not all(digest in positions for digest in entry["versions"]):
+                continue
+            applied += 1
+            replaced = sorted({positions[digest] for digest in entry["versions"]})
+            merged = dict(entry["item"])
+            md5_list = list(merged.get("md5_list", []))
+            seen = set(md5_list)
+            for index in replaced:
+                for md5 in items[index].get("md5_list", []):
+                    if md5 not in seen:
+                        seen.add(md5)
+                        md5_list.append(md5)
+            merged["md5_list"] = md5_list
+            for index in reversed(replaced[1:]):
+                del items[index]
+                del digests[index]
+            items[replaced[0]] = merged
+            digests[replaced[0]] = self.version_digest(merged)
+        logger.info(
+            f"Replayed journaled merge chunks: hostname={hostname}, "
+            f"chunks={applied}/{len(entries)}, versions={len(items)}"
+        )
+        return items
+
+    def start_round(self, chunks: List[List[VersionItem]]) -> None:
+        with self._lock:
+            self._chunks = chunks
+            self._results = [None] * len(chunks)
+
+    def complete(
+        self,
+        index: int,
+        item: VersionItem,
+        hostname: Optional[str] = None,
+        chunk: Optional[List[VersionItem]] = None,
+    ) -> None:
+        """Record the result of chunk ``index`` of the current round, journaling ``chunk``."""
+        with self._lock:
+            self._results[index] = item
+            self.progressed = True
+            if chunk is None or hostname is None:
+                return
+            entries = self._load()
+            chunk_id = self.chunk_id(hostname, chunk)
+            if chunk_id in entries:
+                return
+            entry = {
+                "host": hostname,
+                "versions": sorted({self.version_digest(version) for version in chunk}),
+                "item": item,
+            }
+            entries[chunk_id] = entry
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"chunk": chunk_id, **entry}, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def checkpoint_items(self) -> List[VersionItem]:
+        """Versions of the current round with every finished chunk replaced by its result."""
+        with self._lock:
+            items: List[VersionItem] = []
+            for chunk, result in zip(self._chunks, self._results):
+                items.extend(chunk if result is None else [result])
+            return items
+
+    def discard(self) -> None:
+        with self._lock:
+            self._entries = None
+            if os.path.exists(self.path):
+                os.remove(self.path)
@@ -0,0 +1,106 @@
+"""Token-aware chunk planning for progressive source merges."""
+
+import json
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+CHARS_PER_TOKEN = 4
+
+VersionItem = Dict[str, Any]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count: about four ASCII characters per token, one per other character."""
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    return math.ceil(ascii_chars / CHARS_PER_TOKEN) + len(text) - ascii_chars
+
+
+class MergeChunkPlanner:
+    """
+    Plan the chunks of each progressive merge round.
+
+    Every version is serialized and measured once; sizes are cached per item
+    object, so merged items carried into later rounds are not measured again.
+    Each round is split into the fewest contiguous chunks that respect
+    ``max_versions`` and ``max_tokens``, balanced towards equal token counts so
+    that the following rounds stay small.
+    """
+
+    def __init__(self, max_versions: int, max_tokens: int):
+        self.max_versions = max(2, int(max_versions))
+        self.max_tokens = max(1, int(max_tokens))
+        self._sizes: Dict[int, Tuple[VersionItem, int]] = {}
+
+    def measure(self, item: VersionItem) -> int:
+        cached = self._sizes.get(id(item))
+        if cached is not None and cached[0] is item:
+            return cached[1]
+        tokens = estimate_tokens(json.dumps(item["source"], ensure_ascii=False))
+        self._sizes[id(item)] = (item, tokens)
+        return tokens
+
+    def total_tokens(self, items: Sequence[VersionItem]) -> int:
+        return sum(self.measure(item) for item in items)
+
+    def fits(self, items: Sequence[VersionItem]) -> bool:
+        """Whether ``items`` can be merged with a single request."""
+        return len(items) <= self.max_versions and self.total_tokens(items) <= self.max_tokens
+
+    def _partition(
+        self, items: Sequence[VersionItem], sizes: List[int], count: int
+    ) -> Optional[List[List[VersionItem]]]:
+        chunks: List[List[VersionItem]] = []
+        start = 0
+        remaining_tokens = sum(sizes)
+        total = len(items)
+        for index in range(count):
+            if start >= total:
+                break
+            remaining_chunks = count - index
+            target = remaining_tokens / remaining_chunks
+            chunk = [items[start]]
+            tokens = sizes[start]
+            start += 1
+            while (
+                start < total
+                and len(chunk) < self.max_versions
+                and tokens + sizes[start] <= self.max_tokens
+            ):
+                must_take = total - start > (remaining_chunks - 1) * self.max_versions
+                if not must_take and tokens + sizes[start] / 2 > target:
+                    break
+                chunk.append(items[start])
+                tokens += sizes[start]
+                start += 1
+            chunks.append(chunk)
+            remaining_tokens -= tokens
+        return chunks if start >= total else None
+
+    def _group_by_count(self, items: Sequence[VersionItem]) -> List[List[VersionItem]]:
+        count = math.ceil(len(items) / self.max_versions)
+        base, extra = divmod(len(items), count)
+        chunks: List[List[VersionItem]] = []
+        start = 0
+        for index in range(count):
+            size = base + (1 if index < extra else 0)
+            chunks.append(list(items[start : start + size]))
+            start += size
+        return chunks
+
+    def plan(self, items: Sequence[VersionItem]) -> List[List[VersionItem]]:
+        """Split one round into balanced contiguous chunks; oversized versions stay alone."""
+        if len(items) <= 1:
+            return [list(items)]
+        sizes = [self.measure(item) for item in items]
+        count = max(
+            math.ceil(len(items) / self.max_versions),
+            math.ceil(sum(sizes) / self.max_tokens),
+        )
+        chunks = None
+        while chunks is None and count <= len(items):
+            chunks = self._partition(items, sizes, count)
+            count += 1
+        if chunks is None or all(len(chunk) == 1 for chunk in chunks):
+            # Every version is over budget on its own; fall back to merging by count.
+            return self._group_by_count(items)
+        return chunks
@@ -1,10 +1,13 @@
 """LLM-driven source merge tasks."""
 
-import copy
+import hashlib
 import json
 import os
 import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from typing import Any, Dict, List, Optional, Protocol
 
 import requests
@@ -15,7 +18,11 @@ from nlttask import Task
 from ...download.core.processor import SourceProcessor
 from ...download.sources.book import BookSourceProcessor
 from ...download.sources.rss import RSSSourceProcessor
-from ...utils import url_to_hostname
+from ...utils import get_http_client, url_to_hostname
+from .cache import SourceMergeCache
+from .dedup import dedupe_version_items
+from .journal import MergeCheckpointJournal
+from .planner import CHARS_PER_TOKEN, MergeChunkPlanner
 
 
 logger = getLogger("funread")
@@ -27,6 +34,9 @@ DEFAULT_MAX_VERSIONS_PER_MERGE = 8
 DEFAULT_MAX_PROMPT_CHARS = 50000
 DEFAULT_LLM_MAX_RETRIES = 3
 DEFAULT_LLM_RETRY_SLEEP_SECONDS = 2
+DEFAULT_MERGE_WORKERS = 1
+DEFAULT_MERGE_BATCH_HOSTS = 1
+MERGE_SYSTEM_PROMPT = "你只返回一个合法、紧凑、无包装层的 JSON 对象。"
 
 
 class SourceMerger(Protocol):
@@ -39,6 +49,15 @@ class SourceMerger(Protocol):
         """Merge multiple versions into one final source object."""
 
 
+class BatchSourceMerger(SourceMerger, Protocol):
+    def merge_sources_batch(
+        self,
+        source_type: str,
+        versions_by_host: Dict[str, List[Dict[str, Any]]],
+    ) -> Dict[str, Dict[str, Any]]:
+        """Merge the versions of several hosts in one request, keyed by hostname."""
+
+
 VersionItem = Dict[str, Any]
 
 
@@ -67,6 +86,20 @@ class OpenAICompatibleSourceMerger:
         self.max_retries = max(1, max_retries)
         self.retry_sleep_seconds = max(0, retry_sleep_seconds)
 
+    @property
+    def cache_identity(self) -> str:
+        """Model plus a hash of the prompt template, used to key cached merge results."""
+        template = MERGE_SYSTEM_PROMPT + self._build_prompt("{source_type}", "{hostname}", [])
+        prompt_hash = hashlib.md5(template.encode("utf-8")).hexdigest()
+        return f"{self.model}:{prompt_hash}"
+
+    @property
+    def batch_cache_identity(self) -> str:
+        """Like ``cache_identity``, for results of the batch prompt."""
+        template = MERGE_SYSTEM_PROMPT + self._build_batch_prompt("{source_type}", {})
+        prompt_hash = hashlib.md5(template.encode("utf-8")).hexdigest()
+        return f"{self.model}:batch:{prompt_hash}"
+
     @staticmethod
     def _extract_json_object(content: str) -> Dict[str, Any]:
         text = content.strip()
@@ -99,6 +132,28 @@ class OpenAICompatibleSourceMerger:
             f"原始版本如下：\n{versions_json}"
         )
 
+    @staticmethod
+    def _build_batch_prompt(
+        source_type: str, versions_by_host: Dict[str, List[Dict[str, Any]]]
+    ) -> str:
+        hosts_json = json.dumps(versions_by_host, ensure_ascii=False, separators=(",", ":"))
+        return (
+            "你是一个阅读源合并器。"
+            "下面按 hostname 分组给出了多个站点，每个站点有多个版本的阅读源。"
+            "请把每个站点的多个版本分别合并成一个最优版本。"
+            "输出必须是一个紧凑 JSON 对象，键是 hostname，值是该站点合并后的单个源对象本身。"
+            "不要输出解释，不要输出 markdown，不要遗漏或新增 hostname。"
+            "请直接给出最终答案，不要解释、不要分步骤、不要用‘思考’标签。"
+            "要求：\n"
+            "1. 保留同一含义下信息更完整、更具体的字段。\n"
+            "2. 不要引入原始数据中不存在的新站点 URL，不要混用不同站点的规则。\n"
+            "3. 保留能工作的规则，删除明显为空、重复或冲突的内容。\n"
+            "4. 每个结果必须仍然属于对应的 hostname。\n"
+            "5. 每个值只包含合并后的源对象字段，不要返回 bookSources、rssSources、source、data 等包装层。\n"
+            f"6. source_type={source_type}\n"
+            f"原始版本如下：\n{hosts_json}"
+        )
+
     def _post_and_collect_content(self, payload: Dict[str, Any]) -> str:
         headers = {
             "Authorization": f"Bearer {self.api_key}",
@@ -110,7 +165,9 @@ class OpenAICompatibleSourceMerger:
             "Start LLM merge request: "
             f"model={self.model}, versions_payload_chars={len(json.dumps(payload, ensure_ascii=False))}"
         )
-        with requests.post(url, headers=headers, json=payload, timeout=self.timeout) as response:
+        with get_http_client().post(
+            url, headers=headers, json=payload, timeout=self.timeout
+        ) as response:
             logger.info(
                 "LLM merge response headers received: "
                 f"status={response.status_code}, elapsed={time.time() - request_started_at:.2f}s"
@@ -143,23 +200,15 @@ class OpenAICompatibleSourceMerger:
             )
             return text
 
-    def merge_sources(
-        self,
-        source_type: str,
-        hostname: str,
-        versions: List[Dict[str, Any]],
-    ) -> Dict[str, Any]:
+    def _request_json_object(self, prompt: str, target: str) -> Dict[str, Any]:
         if not self.api_key:
             raise ValueError("LLM merge api key is not configured")
         payload = {
             "model": self.model,
             "temperature": 0,
             "messages": [
-                {"role": "system", "content": "你只返回一个合法、紧凑、无包装层的 JSON 对象。"},
-                {
-                    "role": "user",
-                    "content": self._build_prompt(source_type, hostname, versions),
-                },
+                {"role": "system", "content": MERGE_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt},
             ],
             "response_format": {"type": "json_object"},
         }
@@ -175,7 +224,7 @@ class OpenAICompatibleSourceMerger:
                     payload_without_response_format.pop("response_format", None)
                     logger.warning(
                         "Retry LLM merge request without response_format: "
-                        f"attempt={attempt}/{self.max_retries}, hostname={hostname}"
+                        f"attempt={attempt}/{self.max_retries}, {target}"
                     )
                     content = self._post_and_collect_content(
                         payload=payload_without_response_format
@@ -185,22 +234,48 @@ class OpenAICompatibleSourceMerger:
                 merged_source = self._extract_json_object(content)
                 logger.info(
                     "LLM merge request parsed successfully: "
-                    f"attempt={attempt}/{self.max_retries}, hostname={hostname}"
+                    f"attempt={attempt}/{self.max_retries}, {target}"
                 )
                 return merged_source
             except (requests.RequestException, ValueError, json.JSONDecodeError) as error:
                 last_error = error
                 logger.warning(
                     "LLM merge request failed: "
-                    f"attempt={attempt}/{self.max_retries}, hostname={hostname}, error={error}"
+                    f"attempt={attempt}/{self.max_retries}, {target}, error={error}"
                 )
                 if attempt >= self.max_retries:
                     break
                 if self.retry_sleep_seconds > 0:
                     time.sleep(self.retry_sleep_seconds)
         raise ValueError(
-            f"LLM merge failed after {self.max_retries} attempts for hostname={hostname}: {last_error}"
+            f"LLM merge failed after {self.max_retries} attempts for {target}: {last_error}"
+        )
+
+    def merge_sources(
+        self,
+        source_type: str,
+        hostname: str,
+        versions: List[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        return self._request_json_object(
+            self._build_prompt(source_type, hostname, versions), f"hostname={hostname}"
+        )
+
+    def merge_sources_batch(
+        self,
+        source_type: str,
+        versions_by_host: Dict[str, List[Dict[str, Any]]],
+    ) -> Dict[str, Dict[str, Any]]:
+        """Merge several hosts with one request; hosts missing from the reply are left out."""
+        result = self._request_json_object(
+            self._build_batch_prompt(source_type, versions_by_host),
+            f"hostnames={','.join(versions_by_host)}",
         )
+        return {
+            hostname: source
+            for hostname, source in result.items()
+            if hostname in versions_by_host and isinstance(source, dict)
+        }
 
 
 class SourceMergeRunner:
@@ -213,70 +288,288 @@ class SourceMergeRunner:
         min_versions: int = 2,
         max_versions_per_merge: int = DEFAULT_MAX_VERSIONS_PER_MERGE,
         max_prompt_chars: int = DEFAULT_MAX_PROMPT_CHARS,
+        max_prompt_tokens: Optional[int] = None,
+        workers: int = DEFAULT_MERGE_WORKERS,
+        cache: Optional[SourceMergeCache] = None,
+        use_cache: bool = True,
+        dedupe: bool = True,
+        batch_hosts: int = DEFAULT_MERGE_BATCH_HOSTS,
     ):
         self.store = store
         self.merger = merger or OpenAICompatibleSourceMerger()
         self.min_versions = min_versions
         self.max_versions_per_merge = max_versions_per_merge
         self.max_prompt_chars = max_prompt_chars
+        self.max_prompt_tokens = (
+            max_prompt_tokens
+            if max_prompt_tokens is not None
+            else max(1, max_prompt_chars // CHARS_PER_TOKEN)
+        )
+        self.workers = max(1, int(workers))
+        self.dedupe = dedupe
+        self.batch_hosts = max(1, int(batch_hosts))
+        self._merge_slots = threading.BoundedSemaphore(self.workers)
+        self._chunk_executor: Optional[ThreadPoolExecutor] = None
+        if cache is None and use_cache:
+            cache = SourceMergeCache(os.path.join(store.path_cache, "merge-cache.sqlite3"))
+        self.cache = cache
 
     def run(self, limit: Optional[int] = None) -> Dict[str, int]:
         stats = {"processed": 0, "merged": 0, "skipped": 0, "failed": 0}
-        for file_path in self.iter_source_files():
-            if limit is not None and stats["processed"] >= limit:
-                break
-            stats["processed"] += 1
-            logger.info(f"Start merge source file: {file_path}")
-            status = self.merge_file(file_path)
-            stats[status] += 1
+        self.store.flush_documents()
+        try:
+            file_list = self.iter_source_files()
+            if limit is not None:
+                file_list = file_list[: max(0, limit)]
+            jobs = self._plan_batches(file_list)
+            if self.workers <= 1:
+                for job in jobs:
+                    for status in self._run_job(job):
+                        stats["processed"] += 1
+                        stats[status] += 1
+            else:
+                file_executor = ThreadPoolExecutor(self.workers, thread_name_prefix="merge-file")
+                chunk_executor = ThreadPoolExecutor(self.workers, thread_name_prefix="merge-chunk")
+                self._chunk_executor = chunk_executor
+                with file_executor, chunk_executor:
+                    for statuses in file_executor.map(self._run_job, jobs):
+                        for status in statuses:
+                            stats["processed"] += 1
+                            stats[status] += 1
+        finally:
+            self._chunk_executor = None
+            self.store.merge_index.save()
+            if self.cache is not None:
+                self.cache.close()
+        if self.cache is not None:
+            logger.info(f"Merge cache stats: {self.cache.stats}")
         return stats
 
+    def _run_file(self, file_path: str) -> str:
+        logger.info(f"Start merge source file: {file_path}")
+        return self.merge_file(file_path)
+
+    def _run_job(self, file_paths: List[str]) -> List[str]:
+        if len(file_paths) == 1:
+            return [self._run_file(file_paths[0])]
+        return self.merge_batch(file_paths)
+
+    @property
+    def batch_enabled(self) -> bool:
+        return self.batch_hosts > 1 and callable(getattr(self.merger, "merge_sources_batch", None))
+
+    def _plan_batches(self, file_list: List[str]) -> List[List[str]]:
+        """Pack small hosts into batch requests using the merge index; other files run alone."""
+        if not self.batch_enabled:
+            return [[file_path] for file_path in file_list]
+        jobs: List[List[str]] = []
+        batch: List[str] = []
+        batch_tokens = 0
+        for file_path in file_list:
+            entry = self.store.merge_index.get(file_path) or {}
+            versions = int(entry.get("versions", 0))
+            tokens = int(entry.get("source_chars", 0)) // CHARS_PER_TOKEN + 1
+            if not self.min_versions <= versions <= self.max_versions_per_merge or (
+                tokens > self.max_prompt_tokens
+            ):
+                jobs.append([file_path])
+                continue
+            if len(batch) >= self.batch_hosts or batch_tokens + tokens > self.max_prompt_tokens:
+                jobs.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(file_path)
+            batch_tokens += tokens
+        if batch:
+            jobs.append(batch)
+        return jobs
+
     def iter_source_files(self) -> List[str]:
-        file_list: List[tuple[int, str]] = []
-        if not os.path.exists(self.store.path_bok):
-            return []
-        for root, _, files in os.walk(self.store.path_bok):
-            for name in files:
-                if name.endswith(".json"):
-                    file_path = os.path.join(root, name)
-                    file_list.append((self._read_version_count(file_path), file_path))
+        merge_index = self.store.merge_index
+        file_list: List[tuple[int, str]] = [
+            (merge_index.versions(file_path), file_path)
+            for file_path in merge_index.refresh(self.store.scanner)
+        ]
+        merge_index.save()
         file_list.sort(key=lambda item: (item[0], item[1]))
         return [file_path for _, file_path in file_list]
 
-    def merge_file(self, file_path: str) -> str:
-        try:
-            data = self.store._load_json_safely(file_path)
-            version_items = self._collect_version_items(data)
-            if len(version_items) < self.min_versions:
+    def journal_path(self, file_path: str) -> str:
+        relpath = os.path.relpath(file_path, self.store.path_bok)
+        return os.path.join(
+            self.store.path_pkl, "merge-journal", os.path.splitext(relpath)[0] + ".jsonl"
+        )
+
+    def _load_merge_input(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """Load a host file and its deduplicated versions; None when it has too few versions."""
+        if self.store.merge_index.lookup(file_path) is not None:
+            indexed_versions = self.store.merge_index.versions(file_path)
+            if indexed_versions < self.min_versions:
                 logger.info(
-                    f"Skip merge source file: file={file_path}, versions={len(version_items)}, "
+                    f"Skip merge source file: file={file_path}, versions={indexed_versions}, "
                     f"min_versions={self.min_versions}"
                 )
-                return "skipped"
-            hostname = str(data.get("hostname") or "")
-            logger.info(
-                "Prepare merge source file: "
-                f"file={file_path}, hostname={hostname}, versions={len(version_items)}"
-            )
-            merged_item = self._merge_version_items_progressively(
-                file_path=file_path,
-                data=data,
-                hostname=hostname,
-                version_items=version_items,
-            )
-            data["merged"] = [merged_item]
-            data["candidate"] = []
-            self.store._save_json_safely(file_path, data)
+                return None
+        data = self.store._load_json_safely(file_path)
+        version_items = self._collect_version_items(data)
+        if len(version_items) < self.min_versions:
             logger.info(
-                "Merged source successfully: "
-                f"file={file_path}, hostname={hostname}, versions={len(version_items)}"
+                f"Skip merge source file: file={file_path}, versions={len(version_items)}, "
+                f"min_versions={self.min_versions}"
             )
+            return None
+        hostname = str(data.get("hostname") or "")
+        logger.info(
+            "Prepare merge source file: "
+            f"file={file_path}, hostname={hostname}, versions={len(version_items)}"
+        )
+        if self.dedupe:
+            deduped_items = dedupe_version_items(version_items)
+            if len(deduped_items) < len(version_items):
+                logger.info(
+                    "Deduplicated source versions: "
+                    f"hostname={hostname}, versions={len(version_items)}, "
+                    f"distinct={len(deduped_items)}"
+                )
+        else:
+            deduped_items = version_items
+        return {
+            "file_path": file_path,
+            "data": data,
+            "hostname": hostname,
+            "versions": len(version_items),
+            "items": deduped_items,
+        }
+
+    def _save_merged_file(self, merge_input: Dict[str, Any], merged_item: VersionItem) -> None:
+        data = merge_input["data"]
+        data["merged"] = [merged_item]
+        data["candidate"] = []
+        self.store.save_document(
+            merge_input["file_path"], data, merged_at=datetime.utcnow().isoformat()
+        )
+        logger.info(
+            "Merged source successfully: "
+            f"file={merge_input['file_path']}, hostname={merge_input['hostname']}, "
+            f"versions={merge_input['versions']}"
+        )
+
+    def merge_file(self, file_path: str, merge_input: Optional[Dict[str, Any]] = None) -> str:
+        journal = MergeCheckpointJournal(self.journal_path(file_path))
+        data: Dict[str, Any] = {}
+        try:
+            if merge_input is None:
+                merge_input = self._load_merge_input(file_path)
+            if merge_input is None:
+                return "skipped"
+            data = merge_input["data"]
+            hostname = merge_input["hostname"]
+            # Chunks merged before a crash apply even if the versions changed since.
+            deduped_items = journal.replay(hostname, merge_input["items"])
+            if len(deduped_items) == 1:
+                validated_source = self._validate_merged_source(
+                    source=deduped_items[0]["source"],
+                    expected_hostname=hostname,
+                )
+                merged_item = self._build_merged_item(deduped_items, validated_source)
+            else:
+                merged_item = self._merge_version_items_progressively(
+                    journal=journal,
+                    hostname=hostname,
+                    version_items=deduped_items,
+                )
+            self._save_merged_file(merge_input, merged_item)
+            journal.discard()
             return "merged"
         except Exception as e:
             logger.warning(f"Failed to merge source file {file_path}: {e}")
+            self._save_merge_checkpoint(file_path, data, journal)
             return "failed"
 
+    def merge_batch(self, file_paths: List[str]) -> List[str]:
+        """
+        Merge several small hosts with one batch request.
+
+        Every returned source is still validated against its own hostname; hosts
+        that are missing from the reply or fail validation, and hosts that do not
+        fit a single request after deduplication, fall back to ``merge_file``.
+        """
+        statuses: Dict[str, str] = {}
+        batch: Dict[str, Dict[str, Any]] = {}
+        planner = self._create_planner()
+        for file_path in file_paths:
+            logger.info(f"Start merge source file: {file_path}")
+            try:
+                merge_input = self._load_merge_input(file_path)
+            except Exception as e:
+                logger.warning(f"Failed to merge source file {file_path}: {e}")
+                statuses[file_path] = "failed"
+                continue
+            if merge_input is None:
+                statuses[file_path] = "skipped"
+                continue
+            hostname = merge_input["hostname"]
+            items = merge_input["items"]
+            if len(items) == 1 or not hostname or hostname in batch or not planner.fits(items):
+                statuses[file_path] = self.merge_file(file_path, merge_input)
+                continue
+            # Batch results are cached under the batch identity only; a single-host
+            # result for the same versions is reused as well.
+            merge_input["cache_key"] = self._merge_cache_key(
+                hostname, items, self.batch_merger_identity
+            )
+            cached = None
+            if self.cache is not None:
+                cached = self.cache.get(self._merge_cache_key(hostname, items))
+                if cached is None:
+                    cached = self.cache.get(merge_input["cache_key"])
+            if cached is not None:
+                self._save_merged_file(merge_input, self._build_merged_item(items, cached))
+                statuses[file_path] = "merged"
+                continue
+            batch[hostname] = merge_input
+
+        merged_sources: Dict[str, Dict[str, Any]] = {}
+        if len(batch) > 1:
+            logger.info(
+                "Merge source batch: "
+                f"hosts={len(batch)}, "
+                f"tokens={sum(planner.total_tokens(item['items']) for item in batch.values())}"
+            )
+            try:
+                with self._merge_slots:
+                    merged_sources = self.merger.merge_sources_batch(
+                        source_type=self.store.cate1,
+                        versions_by_host={
+                            hostname: [item["source"] for item in merge_input["items"]]
+                            for hostname, merge_input in batch.items()
+                        },
+                    )
+            except Exception as e:
+                logger.warning(f"Batch merge failed, falling back per host: {e}")
+                merged_sources = {}
+
+        for hostname, merge_input in batch.items():
+            file_path = merge_input["file_path"]
+            merged_source = merged_sources.get(hostname)
+            if merged_source is not None:
+                try:
+                    validated_source = self._validate_merged_source(merged_source, hostname)
+                    if merge_input["cache_key"] is not None:
+                        self.cache.put(merge_input["cache_key"], validated_source)
+                    self._save_merged_file(
+                        merge_input, self._build_merged_item(merge_input["items"], validated_source)
+                    )
+                    statuses[file_path] = "merged"
+                    continue
+                except Exception as e:
+                    logger.warning(
+                        f"Batch merge result rejected, retrying alone: hostname={hostname}, {e}"
+                    )
+            statuses[file_path] = self.merge_file(file_path, merge_input)
+        return [statuses[file_path] for file_path in file_paths]
+
     def _collect_version_items(self, data: Dict[str, Any]) -> List[VersionItem]:
+        # Items share their sources with ``data`` and are never mutated along the merge path.
         version_items: List[VersionItem] = []
         for key in ("merged", "candidate"):
             items = data.get(key, [])
@@ -289,7 +582,7 @@ class SourceMergeRunner:
                     version_items.append(
                         {
                             "md5_list": [value for value in md5_list if isinstance(value, str)],
-                            "source": copy.deepcopy(source),
+                            "source": source,
                         }
                     )
         return version_items
@@ -297,83 +590,56 @@ class SourceMergeRunner:
     def _collect_versions(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
         return [item["source"] for item in self._collect_version_items(data)]
 
-    def _read_version_count(self, file_path: str) -> int:
-        try:
-            data = self.store._load_json_safely(file_path)
-        except Exception:
-            return 0
-        return len(self._collect_version_items(data))
-
-    def _estimate_version_items_size(self, version_items: List[VersionItem]) -> int:
-        return len(json.dumps([item["source"] for item in version_items], ensure_ascii=False))
-
-    def _split_version_items(self, version_items: List[VersionItem]) -> List[List[VersionItem]]:
-        chunks: List[List[VersionItem]] = []
-        current: List[VersionItem] = []
-        current_size = 0
-        for version_item in version_items:
-            version_size = len(json.dumps(version_item["source"], ensure_ascii=False))
-            exceeds_count = len(current) >= self.max_versions_per_merge
-            exceeds_size = current and current_size + version_size > self.max_prompt_chars
-            if exceeds_count or exceeds_size:
-                chunks.append(current)
-                current = []
-                current_size = 0
-            current.append(copy.deepcopy(version_item))
-            current_size += version_size
-        if current:
-            chunks.append(current)
-        if len(chunks) == len(version_items) and len(version_items) > 1:
-            return self._group_version_items_by_count(version_items)
-        return chunks
-
-    def _group_version_items_by_count(
-        self, version_items: List[VersionItem]
-    ) -> List[List[VersionItem]]:
-        group_size = max(2, self.max_versions_per_merge)
-        grouped_chunks: List[List[VersionItem]] = []
-        for start in range(0, len(version_items), group_size):
-            grouped_chunks.append(copy.deepcopy(version_items[start : start + group_size]))
-        return grouped_chunks
-
     def _merge_version_items_progressively(
         self,
-        file_path: str,
-        data: Dict[str, Any],
+        journal: MergeCheckpointJournal,
         hostname: str,
         version_items: List[VersionItem],
+        planner: Optional[MergeChunkPlanner] = None,
     ) -> VersionItem:
-        if len(version_items) < self.min_versions:
+        # min_versions is checked on the host file; replayed journal entries may leave fewer.
+        if len(version_items) < min(self.min_versions, 2):
             raise ValueError("Not enough versions to merge")
 
-        if (
-            len(version_items) <= self.max_versions_per_merge
-            and self._estimate_version_items_size(version_items) <= self.max_prompt_chars
-        ):
+        planner = planner or self._create_planner()
+        if planner.fits(version_items):
             logger.info(
                 "Merge source chunk directly: "
                 f"hostname={hostname}, versions={len(version_items)}, "
-                f"chars={self._estimate_version_items_size(version_items)}"
+                f"tokens={planner.total_tokens(version_items)}"
             )
-            merged_source = self.merger.merge_sources(
-                source_type=self.store.cate1,
-                hostname=hostname,
-                versions=[item["source"] for item in version_items],
-            )
-            validated_source = self._validate_merged_source(
-                source=merged_source,
-                expected_hostname=hostname,
-            )
-            return {
-                "md5_list": self._build_merged_md5_list_from_items(version_items, validated_source),
-                "source": validated_source,
-            }
+            return self._merge_chunk(hostname, version_items)
 
-        chunks = self._split_version_items(version_items)
+        chunks = planner.plan(version_items)
         logger.info(
             "Split merge source into chunks: "
-            f"hostname={hostname}, versions={len(version_items)}, chunks={len(chunks)}"
+            f"hostname={hostname}, versions={len(version_items)}, chunks={len(chunks)}, "
+            f"tokens={planner.total_tokens(version_items)}"
+        )
+        journal.start_round(chunks)
+        if self._chunk_executor is not None:
+            merged_chunks = self._merge_chunks_concurrently(journal, hostname, chunks, planner)
+        else:
+            merged_chunks = self._merge_chunks_sequentially(journal, hostname, chunks, planner)
+        if len(merged_chunks) == 1:
+            return merged_chunks[0]
+        return self._merge_version_items_progressively(
+            journal=journal,
+            hostname=hostname,
+            version_items=merged_chunks,
+            planner=planner,
         )
+
+    def _create_planner(self) -> MergeChunkPlanner:
+        return MergeChunkPlanner(self.max_versions_per_merge, self.max_prompt_tokens)
+
+    def _merge_chunks_sequentially(
+        self,
+        journal: MergeCheckpointJournal,
+        hostname: str,
+        chunks: List[List[VersionItem]],
+        planner: MergeChunkPlanner,
+    ) -> List[VersionItem]:
         merged_chunks: List[VersionItem] = []
         for index, chunk in enumerate(chunks, start=1):
             if len(chunk) == 1:
@@ -381,64 +647,126 @@ class SourceMergeRunner:
                     "Skip LLM merge for single-version chunk: "
                     f"hostname={hostname}, chunk={index}/{len(chunks)}"
                 )
-                merged_chunks.append(copy.deepcopy(chunk[0]))
-                self._save_merge_checkpoint(
-                    file_path=file_path,
-                    data=data,
-                    processed_items=merged_chunks,
-                    remaining_chunks=chunks[index:],
-                )
+                merged_chunks.append(chunk[0])
+                journal.complete(index - 1, merged_chunks[-1])
                 continue
             logger.info(
                 "Merge source chunk: "
                 f"hostname={hostname}, chunk={index}/{len(chunks)}, "
-                f"versions={len(chunk)}, chars={self._estimate_version_items_size(chunk)}"
+                f"versions={len(chunk)}, tokens={planner.total_tokens(chunk)}"
             )
-            merged_source = self.merger.merge_sources(
-                source_type=self.store.cate1,
-                hostname=hostname,
-                versions=[item["source"] for item in chunk],
+            merged_chunks.append(self._merge_journaled_chunk(journal, index - 1, hostname, chunk))
+        return merged_chunks
+
+    def _merge_chunks_concurrently(
+        self,
+        journal: MergeCheckpointJournal,
+        hostname: str,
+        chunks: List[List[VersionItem]],
+        planner: MergeChunkPlanner,
+    ) -> List[VersionItem]:
+        """Merge the chunks of one file on the chunk pool, journaling each as it finishes."""
+        results: List[Optional[VersionItem]] = [None] * len(chunks)
+
+        def merge(index: int) -> None:
+            chunk = chunks[index]
+            if len(chunk) == 1:
+                results[index] = chunk[0]
+                journal.complete(index, results[index])
+                return
+            logger.info(
+                "Merge source chunk: "
+                f"hostname={hostname}, chunk={index + 1}/{len(chunks)}, "
+                f"versions={len(chunk)}, tokens={planner.total_tokens(chunk)}"
             )
+            results[index] = self._merge_journaled_chunk(journal, index, hostname, chunk)
+
+        futures = [self._chunk_executor.submit(merge, index) for index in range(len(chunks))]
+        errors = [future.exception() for future in futures]
+        for error in errors:
+            if error is not None:
+                raise error
+        return [item for item in results if item is not None]
+
+    @property
+    def merger_identity(self) -> str:
+        identity = getattr(self.merger, "cache_identity", None)
+        return identity or f"{type(self.merger).__module__}.{type(self.merger).__qualname__}"
+
+    @property
+    def batch_merger_identity(self) -> str:
+        """Identity of batch results, kept apart so single-host merges never replay them."""
+        identity = getattr(self.merger, "batch_cache_identity", None)
+        return identity or f"{self.merger_identity}:batch"
+
+    def _merge_journaled_chunk(
+        self,
+        journal: MergeCheckpointJournal,
+        index: int,
+        hostname: str,
+        chunk: List[VersionItem],
+    ) -> VersionItem:
+        merged_item = self._merge_chunk(hostname, chunk)
+        journal.complete(index, merged_item, hostname=hostname, chunk=chunk)
+        return merged_item
+
+    def _merge_cache_key(
+        self, hostname: str, chunk: List[VersionItem], merger_identity: Optional[str] = None
+    ) -> Optional[str]:
+        if self.cache is None:
+            return None
+        return self.cache.make_key(
+            [self._compute_md5(item["source"]) for item in chunk],
+            source_type=self.store.cate1,
+            hostname=hostname,
+            merger_identity=merger_identity or self.merger_identity,
+        )
+
+    def _build_merged_item(
+        self, chunk: List[VersionItem], validated_source: Dict[str, Any]
+    ) -> VersionItem:
+        return {
+            "md5_list": self._build_merged_md5_list_from_items(chunk, validated_source),
+            "source": validated_source,
+        }
+
+    def _merge_chunk(self, hostname: str, chunk: List[VersionItem]) -> VersionItem:
+        cache_key = self._merge_cache_key(hostname, chunk)
+        validated_source = None
+        if cache_key is not None:
+            validated_source = self.cache.get(cache_key)
+            if validated_source is not None:
+                logger.info(
+                    f"Reuse cached merge result: hostname={hostname}, versions={len(chunk)}"
+                )
+        if validated_source is None:
+            with self._merge_slots:
+                merged_source = self.merger.merge_sources(
+                    source_type=self.store.cate1,
+                    hostname=hostname,
+                    versions=[item["source"] for item in chunk],
+                )
             validated_source = self._validate_merged_source(
                 source=merged_source,
                 expected_hostname=hostname,
             )
-            merged_chunks.append(
-                {
-                    "md5_list": self._build_merged_md5_list_from_items(chunk, validated_source),
-                    "source": validated_source,
-                }
-            )
-            self._save_merge_checkpoint(
-                file_path=file_path,
-                data=data,
-                processed_items=merged_chunks,
-                remaining_chunks=chunks[index:],
-            )
-
-        if len(merged_chunks) == 1:
-            return merged_chunks[0]
-        return self._merge_version_items_progressively(
-            file_path=file_path,
-            data=data,
-            hostname=hostname,
-            version_items=merged_chunks,
-        )
+            if cache_key is not None:
+                self.cache.put(cache_key, validated_source)
+        return self._build_merged_item(chunk, validated_source)
 
     def _save_merge_checkpoint(
-        self,
-        file_path: str,
-        data: Dict[str, Any],
-        processed_items: List[VersionItem],
-        remaining_chunks: List[List[VersionItem]],
+        self, file_path: str, data: Dict[str, Any], journal: MergeCheckpointJournal
     ) -> None:
-        remaining_items: List[VersionItem] = []
-        for chunk in remaining_chunks:
-            remaining_items.extend(copy.deepcopy(chunk))
-        checkpoint_data = copy.deepcopy(data)
-        checkpoint_data["merged"] = []
-        checkpoint_data["candidate"] = copy.deepcopy(processed_items) + remaining_items
-        self.store._save_json_safely(file_path, checkpoint_data)
+        """Fold the journaled progress of a failed merge into the host file once."""
+        try:
+            if journal.progressed:
+                checkpoint_data = dict(data)
+                checkpoint_data["merged"] = []
+                checkpoint_data["candidate"] = journal.checkpoint_items()
+                self.store.save_document(file_path, checkpoint_data)
+                journal.discard()
+        except Exception as e:
+            logger.warning(f"Failed to save merge checkpoint of {file_path}: {e}")
 
     def _build_merged_md5_list_from_items(
         self, version_items: List[VersionItem], merged_source: Dict[str, Any]
@@ -476,12 +804,20 @@ class SourceMergeRunner:
 
         return get_md5_str(json.dumps(source, sort_keys=True, ensure_ascii=False))
 
+    @staticmethod
+    def _copy_for_format(source: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy the containers ``source_format`` rewrites; rule strings stay shared."""
+        return {
+            key: dict(value) if isinstance(value, dict) else value
+            for key, value in source.items()
+        }
+
     def _validate_merged_source(
         self, source: Dict[str, Any], expected_hostname: str
     ) -> Dict[str, Any]:
         if not isinstance(source, dict):
             raise ValueError("Merged source must be a dict")
-        normalized = self.store.source_format(copy.deepcopy(source))
+        normalized = self.store.source_format(self._copy_for_format(source))
         source_url_key = self.store.get_source_url_key()
         source_url = normalized.get(source_url_key)
         if not isinstance(source_url, str) or not source_url:
@@ -521,9 +857,13 @@ class MergeSourceTask(Task):
         source_type: str,
         merger: Optional[SourceMerger] = None,
         limit: Optional[int] = None,
+        workers: int = DEFAULT_MERGE_WORKERS,
+        batch_hosts: int = DEFAULT_MERGE_BATCH_HOSTS,
     ) -> Dict[str, int]:
         with self._create_store(self.path, source_type=source_type) as store:
-            runner = SourceMergeRunner(store=store, merger=merger)
+            runner = SourceMergeRunner(
+                store=store, merger=merger, workers=workers, batch_hosts=batch_hosts
+            )
             return runner.run(limit=limit)
 
     def run_book(self, merger: Optional[SourceMerger] = None, limit: Optional[int] = None):
@@ -1,14 +1,40 @@
 """Source list and source detail persistence."""
 
+import hashlib
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import nullcontext
 from datetime import datetime, timedelta
-from typing import Any, Dict, Iterator, List, Optional, Tuple
+from typing import Any, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
 
-import requests
 from nltlog import getLogger
 from nltsecret import read_secret
-from sqlalchemy import DateTime, Integer, String, create_engine, delete, desc, func, select
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Index,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    create_engine,
+    delete,
+    desc,
+    func,
+    insert,
+    inspect,
+    select,
+    text,
+    tuple_,
+    update,
+)
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import DeclarativeBase, Mapped, Session, mapped_column, sessionmaker
 
+from ..utils import get_http_client, url_to_hostname
+
 
 logger = getLogger("funread")
 
@@ -36,12 +62,24 @@ class SourceListRecord(Base):
         DateTime, default=utcnow, onupdate=utcnow, nullable=False
     )
     last_queried_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow, nullable=False)
+    etag: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    last_modified: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    content_md5: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
 
 
 class SourceDetailRecord(Base):
     """Persisted source-detail URL mapping metadata."""
 
     __tablename__ = "source_detail_records"
+    __table_args__ = (
+        Index(
+            "uq_source_detail_records_type_url",
+            "source_type",
+            "url",
+            unique=True,
+            mysql_length={"url": 255},
+        ),
+    )
 
     source_type: Mapped[str] = mapped_column(String(32), primary_key=True)
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
@@ -69,10 +107,30 @@ class SourceIndexRecord(Base):
     )
 
 
+class SourceDetailSequence(Base):
+    """Next unreserved source-detail id per source type."""
+
+    __tablename__ = "source_detail_sequences"
+
+    source_type: Mapped[str] = mapped_column(String(32), primary_key=True)
+    next_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=utcnow, onupdate=utcnow, nullable=False
+    )
+
+
 _ENGINE_CACHE: Dict[str, Any] = {}
 _SESSION_FACTORY_CACHE: Dict[str, sessionmaker] = {}
 _INITIALIZED_DATABASES = set()
+_STAGING_METADATA = MetaData()
 SOURCE_DETAIL_ID_START = 10_000_000
+DEFAULT_FETCH_WORKERS = 1
+DEFAULT_FETCH_PER_HOST = 4
+DEFAULT_UPSERT_CHUNK_SIZE = 500
+DEFAULT_BULK_INSERT_CHUNK_SIZE = 5000
+DEFAULT_STATUS_FLUSH_SIZE = 200
+DEFAULT_STATUS_FLUSH_SECONDS = 30.0
+DEFAULT_ID_RESERVE_ATTEMPTS = 3
 
 
 def _get_database_url(database_url: Optional[str] = None) -> Optional[str]:
@@ -124,10 +182,125 @@ def init_source_db(database_url: Optional[str] = None) -> None:
     resolved_url = _get_database_url(database_url)
     if not resolved_url or resolved_url in _INITIALIZED_DATABASES:
         return
-    Base.metadata.create_all(_get_engine(resolved_url))
+    engine = _get_engine(resolved_url)
+    Base.metadata.create_all(engine)
+    _add_missing_nullable_columns(engine)
+    _add_missing_indexes(engine)
     _INITIALIZED_DATABASES.add(resolved_url)
 
 
+def _add_missing_indexes(engine) -> None:
+    """Create indexes introduced after a table was first created."""
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            try:
+                index.create(engine)
+            except Exception as e:
+                logger.warning(f"Failed to create index {index.name} on {table.name}: {e}")
+
+
+def _add_missing_nullable_columns(engine) -> None:
+    """Add nullable columns introduced after a table was first created."""
+    inspector = inspect(engine)
+    preparer = engine.dialect.identifier_preparer
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.execute(
+                    text(
+                        f"ALTER TABLE {preparer.quote(table.name)} "
+                        f"ADD COLUMN {preparer.quote(column.name)} {column_type}"
+                    )
+                )
+
+
+def _chunked(rows: Sequence[Any], size: int) -> Iterator[Sequence[Any]]:
+    size = max(1, int(size))
+    for start in range(0, len(rows), size):
+        yield rows[start : start + size]
+
+
+def _build_dialect_upsert(
+    session: Session,
+    table: Table,
+    rows: Sequence[Dict[str, Any]],
+    index_elements: Sequence[str],
+    update_columns: Sequence[str],
+):
+    dialect = session.get_bind().dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+        stmt = mysql_insert(table).values(list(rows))
+        return stmt.on_duplicate_key_update({name: stmt.inserted[name] for name in update_columns})
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+
+        stmt = dialect_insert(table).values(list(rows))
+        return stmt.on_conflict_do_update(
+            index_elements=list(index_elements),
+            set_={name: stmt.excluded[name] for name in update_columns},
+        )
+    return None
+
+
+def _upsert_rows_generic(
+    session: Session,
+    table: Table,
+    rows: Sequence[Dict[str, Any]],
+    index_elements: Sequence[str],
+    update_columns: Sequence[str],
+) -> None:
+    key_columns = [table.c[name] for name in index_elements]
+    keys = [tuple(row[name] for name in index_elements) for row in rows]
+    existing = {
+        tuple(found)
+        for found in session.execute(select(*key_columns).where(tuple_(*key_columns).in_(keys)))
+    }
+    inserts = [row for row, key in zip(rows, keys) if key not in existing]
+    if inserts:
+        session.execute(insert(table), inserts)
+    for row, key in zip(rows, keys):
+        if key not in existing:
+            continue
+        condition = [column == value for column, value in zip(key_columns, key)]
+        session.execute(
+            update(table).where(*condition).values({name: row[name] for name in update_columns})
+        )
+
+
+def _upsert_rows(
+    session: Session,
+    table: Table,
+    rows: Sequence[Dict[str, Any]],
+    index_elements: Sequence[str],
+    update_columns: Sequence[str],
+    chunk_size: int = DEFAULT_UPSERT_CHUNK_SIZE,
+) -> None:
+    """Upsert rows with one multi-row INSERT ... ON DUPLICATE KEY/ON CONFLICT per chunk."""
+    for chunk in _chunked(rows, chunk_size):
+        stmt = _build_dialect_upsert(session, table, chunk, index_elements, update_columns)
+        if stmt is None:
+            _upsert_rows_generic(session, table, chunk, index_elements, update_columns)
+        else:
+            session.execute(stmt)
+
+
 def _count_source_items(source_data: Any) -> int:
     if isinstance(source_data, list):
         return len(source_data)
@@ -158,6 +331,128 @@ def _build_source_list_query(
     return stmt.order_by(desc(SourceListRecord.last_queried_at), desc(SourceListRecord.id))
 
 
+SOURCE_LIST_VALIDATOR_KEYS = ("etag", "last_modified", "content_md5")
+
+
+def _record_validators(record: Optional[SourceListRecord]) -> Dict[str, Optional[str]]:
+    return {key: getattr(record, key, None) for key in SOURCE_LIST_VALIDATOR_KEYS}
+
+
+def fetch_source_list_payload(
+    url: str,
+    timeout: int = 30,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    content_md5: Optional[str] = None,
+) -> Tuple[Optional[Any], Dict[str, Optional[str]]]:
+    """Fetch a source-list URL, sending conditional headers from the stored validators.
+
+    Returns ``(None, validators)`` when the server answers 304 or the body hash equals
+    ``content_md5``, so callers can skip JSON parsing and source processing entirely.
+    """
+    headers: Dict[str, str] = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    response = get_http_client().get(url, timeout=timeout, headers=headers)
+    if response.status_code == 304:
+        return None, {"etag": etag, "last_modified": last_modified, "content_md5": content_md5}
+    response.raise_for_status()
+
+    validators = {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "content_md5": hashlib.md5(response.content).hexdigest(),
+    }
+    if content_md5 and validators["content_md5"] == content_md5:
+        return None, validators
+    return response.json(), validators
+
+
+def get_source_list_record(
+    url: str,
+    database_url: Optional[str] = None,
+) -> Optional[SourceListRecord]:
+    """Return the source-list record for a URL, if any."""
+    init_source_db(database_url=database_url)
+    session_factory = _get_session_factory(database_url=database_url)
+
+    with session_factory() as session:
+        return session.execute(
+            select(SourceListRecord).where(SourceListRecord.url == url)
+        ).scalar_one_or_none()
+
+
+FetchResult = Tuple[
+    SourceListRecord, Optional[Any], Dict[str, Optional[str]], Optional[Exception], datetime
+]
+
+
+def _fetch_source_list_result(
+    record: SourceListRecord, timeout: int, conditional: bool = True
+) -> FetchResult:
+    queried_at = utcnow()
+    validators = _record_validators(record) if conditional else {}
+    try:
+        source_data, validators = fetch_source_list_payload(
+            record.url, timeout=timeout, **validators
+        )
+        return record, source_data, validators, None, queried_at
+    except Exception as e:
+        return record, None, {}, e, queried_at
+
+
+def _iter_sequential_fetches(
+    records: List[SourceListRecord], timeout: int, conditional: bool
+) -> Iterator[FetchResult]:
+    for record in records:
+        yield _fetch_source_list_result(record, timeout=timeout, conditional=conditional)
+
+
+def _iter_concurrent_fetches(
+    records: List[SourceListRecord],
+    timeout: int,
+    max_workers: int,
+    max_per_host: int,
+    conditional: bool,
+) -> Iterator[FetchResult]:
+    """Fetch records on a thread pool and yield results in completion order.
+
+    Records are queued per hostname so a host never has more than ``max_per_host``
+    requests in flight, while idle workers keep pulling from other hosts.
+    """
+    host_queues: "OrderedDict[str, Deque[SourceListRecord]]" = OrderedDict()
+    for record in records:
+        hostname = url_to_hostname(record.url) or ""
+        host_queues.setdefault(hostname, deque()).append(record)
+    host_inflight: Dict[str, int] = {hostname: 0 for hostname in host_queues}
+    in_flight: Dict[Future, str] = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while host_queues or in_flight:
+            for hostname in list(host_queues):
+                if len(in_flight) >= max_workers:
+                    break
+                queue = host_queues[hostname]
+                while queue and len(in_flight) < max_workers:
+                    if max_per_host > 0 and host_inflight[hostname] >= max_per_host:
+                        break
+                    future = executor.submit(
+                        _fetch_source_list_result, queue.popleft(), timeout, conditional
+                    )
+                    in_flight[future] = hostname
+                    host_inflight[hostname] += 1
+                if not queue:
+                    del host_queues[hostname]
+
+            done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+            for future in done:
+                host_inflight[in_flight.pop(future)] -= 1
+                yield future.result()
+
+
 def iter_source_list_data(
     source_type: Optional[str] = None,
     min_source_count: Optional[int] = None,
@@ -166,8 +461,28 @@ def iter_source_list_data(
     limit: Optional[int] = None,
     timeout: int = 30,
     database_url: Optional[str] = None,
+    max_workers: int = DEFAULT_FETCH_WORKERS,
+    max_per_host: int = DEFAULT_FETCH_PER_HOST,
+    conditional: bool = True,
+    status_writer: Optional["SourceListStatusWriter"] = None,
 ) -> Iterator[Tuple[SourceListRecord, Any]]:
-    """Yield updated source-list records and payloads for stale URLs ordered by last query time."""
+    """Yield updated source-list records and payloads for stale URLs ordered by last query time.
+
+    With ``max_workers > 1`` URLs are fetched concurrently (at most ``max_per_host``
+    in flight per hostname) and pairs are yielded as soon as each fetch finishes.
+    Status bookkeeping is buffered through ``SourceListStatusWriter`` and flushed
+    in batches, with a final flush when iteration ends or fails.
+
+    With ``conditional`` enabled the stored ``ETag``/``Last-Modified`` validators are
+    sent along and URLs whose body is unchanged (304 or same body md5) are not
+    yielded; only their ``last_queried_at`` is refreshed. Validators of a changed
+    URL are recorded after the caller has processed its payload.
+
+    Pass ``status_writer`` to buffer the status updates in a writer owned by the
+    caller; it is not flushed here and the updates of changed URLs are held, so the
+    caller decides when they become durable (for a source store: after the sources
+    themselves).
+    """
     init_source_db(database_url=database_url)
     session_factory = _get_session_factory(database_url=database_url)
     queried_before = utcnow() if stale_seconds <= 0 else utcnow() - timedelta(seconds=stale_seconds)
@@ -183,29 +498,47 @@ def iter_source_list_data(
             stmt = stmt.limit(limit)
         records: List[SourceListRecord] = session.execute(stmt).scalars().all()
 
-    for record in records:
-        queried_at = utcnow()
-        try:
-            response = requests.get(record.url, timeout=timeout)
-            response.raise_for_status()
-            source_data = response.json()
-            source_count = _count_source_items(source_data)
-            updated_record = upsert_source_list_record(
-                url=record.url,
-                source_type=record.source_type,
-                source_count=source_count,
-                queried_at=queried_at,
-                database_url=database_url,
-            )
-            yield updated_record, source_data
-        except Exception as e:
-            logger.warning(f"Failed to fetch source list from {record.url}: {e}")
-            upsert_source_list_record(
-                url=record.url,
-                source_type=record.source_type,
-                source_count=-1,
+    if max_workers > 1 and len(records) > 1:
+        results = _iter_concurrent_fetches(
+            records,
+            timeout=timeout,
+            max_workers=max_workers,
+            max_per_host=max_per_host,
+            conditional=conditional,
+        )
+    else:
+        results = _iter_sequential_fetches(records, timeout=timeout, conditional=conditional)
+
+    if status_writer is None:
+        writer_context = SourceListStatusWriter(database_url=database_url)
+    else:
+        writer_context = nullcontext(status_writer)
+    with writer_context as writer:
+        for record, source_data, validators, error, queried_at in results:
+            if error is not None:
+                logger.warning(f"Failed to fetch source list from {record.url}: {error}")
+                writer.add(record.url, record.source_type, -1, queried_at=queried_at)
+                continue
+            if source_data is None:
+                logger.debug(f"Source list unchanged since last query: {record.url}")
+                writer.add(
+                    record.url,
+                    record.source_type,
+                    record.source_count,
+                    queried_at=queried_at,
+                    **validators,
+                )
+                continue
+            record.source_count = _count_source_items(source_data)
+            record.last_queried_at = queried_at
+            yield record, source_data
+            writer.add(
+                record.url,
+                record.source_type,
+                record.source_count,
                 queried_at=queried_at,
-                database_url=database_url,
+                held=status_writer is not None,
+                **validators,
             )
 
 
@@ -250,59 +583,172 @@ def load_source_index_map(
     }
 
 
+def iter_source_index_rows(
+    source_type: Optional[str] = None,
+    database_url: Optional[str] = None,
+    batch_size: int = 10000,
+    updated_since: Optional[datetime] = None,
+) -> Iterator[Tuple[str, int, str]]:
+    """Stream ``(md5, url_id, hostname)`` index rows ordered by md5 without building ORM objects."""
+    init_source_db(database_url=database_url)
+    session_factory = _get_session_factory(database_url=database_url)
+
+    stmt = select(
+        SourceIndexRecord.md5, SourceIndexRecord.url_id, SourceIndexRecord.hostname
+    ).order_by(SourceIndexRecord.md5)
+    if source_type:
+        stmt = stmt.where(SourceIndexRecord.source_type == source_type)
+    if updated_since is not None:
+        stmt = stmt.where(SourceIndexRecord.updated_at >= updated_since)
+    with session_factory() as session:
+        result = session.execute(stmt.execution_options(yield_per=batch_size))
+        for md5, url_id, hostname in result:
+            yield md5, url_id, hostname
+
+
+def lookup_source_index_records(
+    md5_list: Sequence[str],
+    source_type: Optional[str] = None,
+    database_url: Optional[str] = None,
+    chunk_size: int = DEFAULT_UPSERT_CHUNK_SIZE,
+) -> Dict[str, Dict[str, Any]]:
+    """Load index metadata for the given md5s only, querying ``chunk_size`` md5s at a time."""
+    md5_list = list(dict.fromkeys(str(md5) for md5 in md5_list if md5))
+    if not md5_list:
+        return {}
+
+    init_source_db(database_url=database_url)
+    session_factory = _get_session_factory(database_url=database_url)
+    found: Dict[str, Dict[str, Any]] = {}
+    with session_factory() as session:
+        for chunk in _chunked(md5_list, chunk_size):
+            stmt = select(
+                SourceIndexRecord.md5,
+                SourceIndexRecord.source_type,
+                SourceIndexRecord.url_id,
+                SourceIndexRecord.hostname,
+                SourceIndexRecord.cate1,
+            ).where(SourceIndexRecord.md5.in_(chunk))
+            if source_type:
+                stmt = stmt.where(SourceIndexRecord.source_type == source_type)
+            for row in session.execute(stmt):
+                found[row.md5] = {
+                    "md5": row.md5,
+                    "source_type": row.source_type,
+                    "url_id": row.url_id,
+                    "hostname": row.hostname,
+                    "cate1": row.cate1,
+                }
+    return found
+
+
 def upsert_source_index_records(
     records: List[Dict[str, Any]],
     source_type: str,
     database_url: Optional[str] = None,
+    chunk_size: int = DEFAULT_UPSERT_CHUNK_SIZE,
 ) -> None:
-    """Bulk upsert source-content index metadata."""
+    """Bulk upsert source-content index metadata in chunks keyed by md5."""
     if not source_type:
         raise ValueError("source_type is required")
     if not records:
         return
 
-    init_source_db(database_url=database_url)
-    session_factory = _get_session_factory(database_url=database_url)
-    md5_list = [str(record["md5"]) for record in records if record.get("md5")]
-    if not md5_list:
+    now = utcnow()
+    rows: Dict[str, Dict[str, Any]] = {}
+    for payload in records:
+        md5 = str(payload.get("md5") or "")
+        hostname = str(payload.get("hostname") or "")
+        url_id = payload.get("url_id")
+        cate1 = payload.get("cate1")
+        if not md5 or not hostname or url_id is None or cate1 is None:
+            continue
+        rows[md5] = {
+            "md5": md5,
+            "source_type": source_type,
+            "url_id": int(url_id),
+            "hostname": hostname,
+            "cate1": int(cate1),
+            "created_at": now,
+            "updated_at": now,
+        }
+    if not rows:
         return
 
+    init_source_db(database_url=database_url)
+    session_factory = _get_session_factory(database_url=database_url)
     with session_factory() as session:
-        existing_records = {
-            record.md5: record
-            for record in session.execute(
-                select(SourceIndexRecord).where(SourceIndexRecord.md5.in_(md5_list))
-            )
-            .scalars()
-            .all()
-        }
+        _upsert_rows(
+            session,
+            SourceIndexRecord.__table__,
+            list(rows.values()),
+            index_elements=["md5"],
+            update_columns=["source_type", "url_id", "hostname", "cate1", "updated_at"],
+            chunk_size=chunk_size,
+        )
+        session.commit()
 
-        for payload in records:
-            md5 = str(payload.get("md5") or "")
-            hostname = str(payload.get("hostname") or "")
-            url_id = payload.get("url_id")
-            cate1 = payload.get("cate1")
-            if not md5 or not hostname or url_id is None or cate1 is None:
-                continue
 
-            record = existing_records.get(md5)
-            if record is None:
-                session.add(
-                    SourceIndexRecord(
-                        md5=md5,
-                        source_type=source_type,
-                        url_id=int(url_id),
-                        hostname=hostname,
-                        cate1=int(cate1),
-                    )
-                )
-                continue
+def _staging_table(table: Table) -> Table:
+    """Return an index-free copy of ``table`` used to stage full replacements."""
+    name = f"{table.name}_staging"
+    staging = _STAGING_METADATA.tables.get(name)
+    if staging is None:
+        staging = Table(
+            name,
+            _STAGING_METADATA,
+            *[
+                Column(column.name, column.type, nullable=column.nullable)
+                for column in table.columns
+            ],
+        )
+    return staging
 
-            record.source_type = source_type
-            record.url_id = int(url_id)
-            record.hostname = hostname
-            record.cate1 = int(cate1)
 
+def _replace_rows(
+    session_factory: sessionmaker,
+    table: Table,
+    rows: Sequence[Dict[str, Any]],
+    source_type: str,
+    chunk_size: int = DEFAULT_BULK_INSERT_CHUNK_SIZE,
+    use_staging: bool = False,
+) -> None:
+    """Replace every row of ``source_type`` in ``table`` with ``rows``.
+
+    Rows go in with chunked executemany INSERTs. Without staging the delete and
+    the inserts share one transaction. With staging the rows are first loaded
+    into ``<table>_staging`` chunk by chunk, and the live table is only touched
+    by a short DELETE + INSERT ... SELECT at the end, so readers never see it
+    empty or half filled while a large load is in progress.
+    """
+    if not use_staging:
+        with session_factory() as session:
+            session.execute(delete(table).where(table.c.source_type == source_type))
+            for chunk in _chunked(rows, chunk_size):
+                session.execute(insert(table), list(chunk))
+            session.commit()
+        return
+
+    staging = _staging_table(table)
+    with session_factory() as session:
+        staging.create(session.connection(), checkfirst=True)
+        session.execute(delete(staging).where(staging.c.source_type == source_type))
+        session.commit()
+        for chunk in _chunked(rows, chunk_size):
+            session.execute(insert(staging), list(chunk))
+            session.commit()
+
+        columns = [column.name for column in table.columns]
+        session.execute(delete(table).where(table.c.source_type == source_type))
+        session.execute(
+            insert(table).from_select(
+                columns,
+                select(*[staging.c[name] for name in columns]).where(
+                    staging.c.source_type == source_type
+                ),
+            )
+        )
+        session.execute(delete(staging).where(staging.c.source_type == source_type))
         session.commit()
 
 
@@ -310,65 +756,133 @@ def replace_source_index_records(
     records: List[Dict[str, Any]],
     source_type: str,
     database_url: Optional[str] = None,
+    chunk_size: int = DEFAULT_BULK_INSERT_CHUNK_SIZE,
+    use_staging: bool = False,
 ) -> None:
     """Replace all source-index rows for a source type with the provided records."""
     if not source_type:
         raise ValueError("source_type is required")
 
+    now = utcnow()
+    rows: Dict[str, Dict[str, Any]] = {}
+    for payload in records:
+        md5 = str(payload.get("md5") or "")
+        hostname = str(payload.get("hostname") or "")
+        url_id = payload.get("url_id")
+        cate1 = payload.get("cate1")
+        if not md5 or not hostname or url_id is None or cate1 is None:
+            continue
+        rows[md5] = {
+            "md5": md5,
+            "source_type": source_type,
+            "url_id": int(url_id),
+            "hostname": hostname,
+            "cate1": int(cate1),
+            "created_at": now,
+            "updated_at": now,
+        }
+
     init_source_db(database_url=database_url)
-    session_factory = _get_session_factory(database_url=database_url)
+    _replace_rows(
+        _get_session_factory(database_url=database_url),
+        SourceIndexRecord.__table__,
+        list(rows.values()),
+        source_type,
+        chunk_size=chunk_size,
+        use_staging=use_staging,
+    )
+
+
+def replace_source_detail_records(
+    records: List[Dict[str, Any]],
+    source_type: str,
+    database_url: Optional[str] = None,
+    chunk_size: int = DEFAULT_BULK_INSERT_CHUNK_SIZE,
+    use_staging: bool = False,
+) -> None:
+    """Replace all source-detail rows for a source type with the provided records."""
+    if not source_type:
+        raise ValueError("source_type is required")
+
+    now = utcnow()
+    rows: Dict[int, Dict[str, Any]] = {}
+    for payload in records:
+        record_id = payload.get("id")
+        url = str(payload.get("url") or "")
+        version = payload.get("version", 0)
+        if record_id is None or not url:
+            continue
+        rows[int(record_id)] = {
+            "source_type": source_type,
+            "id": int(record_id),
+            "url": url,
+            "version": int(version),
+            "created_at": now,
+            "updated_at": now,
+        }
+    # A URL keeps its lowest id so the rows satisfy the unique (source_type, url) index.
+    by_url: Dict[str, Dict[str, Any]] = {}
+    for record_id in sorted(rows):
+        by_url.setdefault(rows[record_id]["url"], rows[record_id])
+
+    init_source_db(database_url=database_url)
+    _replace_rows(
+        _get_session_factory(database_url=database_url),
+        SourceDetailRecord.__table__,
+        list(by_url.values()),
+        source_type,
+        chunk_size=chunk_size,
+        use_staging=use_staging,
+    )
 
+
+def delete_source_index_records(
+    md5_list: Sequence[str],
+    source_type: str,
+    database_url: Optional[str] = None,
+    chunk_size: int = DEFAULT_UPSERT_CHUNK_SIZE,
+) -> None:
+    """Delete source-index rows of a source type by md5 in chunks."""
+    if not source_type:
+        raise ValueError("source_type is required")
+    md5_list = list(dict.fromkeys(md5 for md5 in md5_list if md5))
+    if not md5_list:
+        return
+
+    init_source_db(database_url=database_url)
+    session_factory = _get_session_factory(database_url=database_url)
     with session_factory() as session:
-        session.execute(
-            delete(SourceIndexRecord).where(SourceIndexRecord.source_type == source_type)
-        )
-        for payload in records:
-            md5 = str(payload.get("md5") or "")
-            hostname = str(payload.get("hostname") or "")
-            url_id = payload.get("url_id")
-            cate1 = payload.get("cate1")
-            if not md5 or not hostname or url_id is None or cate1 is None:
-                continue
-            session.add(
-                SourceIndexRecord(
-                    md5=md5,
-                    source_type=source_type,
-                    url_id=int(url_id),
-                    hostname=hostname,
-                    cate1=int(cate1),
+        for chunk in _chunked(md5_list, chunk_size):
+            session.execute(
+                delete(SourceIndexRecord).where(
+                    SourceIndexRecord.source_type == source_type,
+                    SourceIndexRecord.md5.in_(list(chunk)),
                 )
             )
         session.commit()
 
 
-def replace_source_detail_records(
-    records: List[Dict[str, Any]],
+def delete_source_detail_records(
+    ids: Sequence[int],
     source_type: str,
     database_url: Optional[str] = None,
+    chunk_size: int = DEFAULT_UPSERT_CHUNK_SIZE,
 ) -> None:
-    """Replace all source-detail rows for a source type with the provided records."""
+    """Delete source-detail rows of a source type by id in chunks."""
     if not source_type:
         raise ValueError("source_type is required")
+    ids = list(dict.fromkeys(int(record_id) for record_id in ids))
+    if not ids:
+        return
 
     init_source_db(database_url=database_url)
     session_factory = _get_session_factory(database_url=database_url)
-
     with session_factory() as session:
-        session.execute(
-            delete(SourceDetailRecord).where(SourceDetailRecord.source_type == source_type)
-        )
-        for payload in records:
-            record_id = payload.get("id")
-            url = str(payload.get("url") or "")
-            version = payload.get("version", 0)
-            if record_id is None or not url:
-                continue
-            session.add(
-                SourceDetailRecord(
-                    id=int(record_id),
-                    url=url,
-                    source_type=source_type,
-                    version=int(version),
+        for chunk in _chunked(ids, chunk_size):
+            session.execute(
+                delete(SourceDetailRecord).where(
+                    SourceDetailRecord.source_type == source_type,
+                    SourceDetailRecord.id.in_(list(chunk)),
                 )
             )
         session.commit()
@@ -385,6 +899,86 @@ def load_source_detail_url_map(
     }
 
 
+def lookup_source_detail_ids(
+    urls: Sequence[str],
+    source_type: str,
+    database_url: Optional[str] = None,
+    chunk_size: int = DEFAULT_UPSERT_CHUNK_SIZE,
+) -> Dict[str, int]:
+    """Load the ids of the given URLs only, querying ``chunk_size`` URLs at a time."""
+    urls = list(dict.fromkeys(str(url) for url in urls if url))
+    if not urls:
+        return {}
+
+    init_source_db(database_url=database_url)
+    session_factory = _get_session_factory(database_url=database_url)
+    found: Dict[str, int] = {}
+    with session_factory() as session:
+        for chunk in _chunked(urls, chunk_size):
+            stmt = select(SourceDetailRecord.url, SourceDetailRecord.id).where(
+                SourceDetailRecord.source_type == source_type,
+                SourceDetailRecord.url.in_(chunk),
+            )
+            for url, source_id in session.execute(stmt):
+                found[url] = source_id
+    return found
+
+
+def claim_source_detail_ids(
+    claims: Dict[str, int],
+    source_type: str,
+    database_url: Optional[str] = None,
+    chunk_size: int = DEFAULT_UPSERT_CHUNK_SIZE,
+) -> Dict[str, int]:
+    """Register URLs under their proposed ids unless another writer registered them first.
+
+    The rows are inserted in one transaction. A concurrent claim of the same URL
+    hits the unique (source_type, url) index; the transaction is then retried
+    against the winner's rows. Returns the id every URL ends up with.
+    """
+    if not source_type:
+        raise ValueError("source_type is required")
+    claims = {str(url): int(url_id) for url, url_id in claims.items() if url}
+    if not claims:
+        return {}
+
+    init_source_db(database_url=database_url)
+    session_factory = _get_session_factory(database_url=database_url)
+    last_error: Optional[Exception] = None
+    for _ in range(DEFAULT_ID_RESERVE_ATTEMPTS):
+        with session_factory() as session:
+            try:
+                found: Dict[str, int] = {}
+                for chunk in _chunked(list(claims), chunk_size):
+                    stmt = select(SourceDetailRecord.url, SourceDetailRecord.id).where(
+                        SourceDetailRecord.source_type == source_type,
+                        SourceDetailRecord.url.in_(chunk),
+                    )
+                    found.update({url: source_id for url, source_id in session.execute(stmt)})
+                now = utcnow()
+                rows = [
+                    {
+                        "source_type": source_type,
+                        "id": url_id,
+                        "url": url,
+                        "version": 0,
+                        "created_at": now,
+                        "updated_at": now,
+                    }
+                    for url, url_id in claims.items()
+                    if url not in found
+                ]
+                for chunk in _chunked(rows, chunk_size):
+                    session.execute(insert(SourceDetailRecord.__table__), list(chunk))
+                session.commit()
+                found.update({row["url"]: row["id"] for row in rows})
+                return found
+            except IntegrityError as e:
+                session.rollback()
+                last_error = e
+    raise RuntimeError(f"Failed to claim source detail ids for {source_type}: {last_error}")
+
+
 def _next_source_detail_id(session: Session, source_type: str) -> int:
     current_max = session.execute(
         select(func.max(SourceDetailRecord.id)).where(SourceDetailRecord.source_type == source_type)
@@ -394,6 +988,94 @@ def _next_source_detail_id(session: Session, source_type: str) -> int:
     return max(int(current_max) + 1, SOURCE_DETAIL_ID_START)
 
 
+def _reserve_source_detail_ids(session: Session, source_type: str, count: int) -> int:
+    """Advance the per-type id sequence by ``count`` inside the caller's transaction.
+
+    The sequence row is locked with ``SELECT ... FOR UPDATE`` so concurrent
+    processes never receive overlapping blocks; ids assigned outside the sequence
+    are respected through the ``max(id)`` floor.
+    """
+    sequence = session.execute(
+        select(SourceDetailSequence)
+        .where(SourceDetailSequence.source_type == source_type)
+        .with_for_update()
+    ).scalar_one_or_none()
+    start = _next_source_detail_id(session, source_type=source_type)
+    if sequence is None:
+        session.add(SourceDetailSequence(source_type=source_type, next_id=start + count))
+        session.flush()
+        return start
+    start = max(start, int(sequence.next_id))
+    sequence.next_id = start + count
+    return start
+
+
+def reserve_source_detail_ids(
+    source_type: str,
+    count: int,
+    database_url: Optional[str] = None,
+) -> Tuple[int, int]:
+    """Reserve ``count`` unused source-detail ids and return the ``[start, end)`` range."""
+    if not source_type:
+        raise ValueError("source_type is required")
+    count = max(1, int(count))
+
+    init_source_db(database_url=database_url)
+    session_factory = _get_session_factory(database_url=database_url)
+
+    last_error: Optional[Exception] = None
+    for _ in range(DEFAULT_ID_RESERVE_ATTEMPTS):
+        with session_factory() as session:
+            try:
+                start = _reserve_source_detail_ids(session, source_type=source_type, count=count)
+                session.commit()
+                return start, start + count
+            except IntegrityError as e:
+                session.rollback()
+                last_error = e
+    raise RuntimeError(f"Failed to reserve source detail ids for {source_type}: {last_error}")
+
+
+def upsert_source_detail_records(
+    records: List[Dict[str, Any]],
+    source_type: str,
+    database_url: Optional[str] = None,
+    chunk_size: int = DEFAULT_UPSERT_CHUNK_SIZE,
+) -> None:
+    """Bulk upsert source-detail rows keyed by (source_type, id)."""
+    if not source_type:
+        raise ValueError("source_type is required")
+
+    now = utcnow()
+    rows = [
+        {
+            "source_type": source_type,
+            "id": int(payload["id"]),
+            "url": str(payload["url"]),
+            "version": int(payload.get("version", 0)),
+            "created_at": now,
+            "updated_at": now,
+        }
+        for payload in records
+        if payload.get("id") is not None and payload.get("url")
+    ]
+    if not rows:
+        return
+
+    init_source_db(database_url=database_url)
+    session_factory = _get_session_factory(database_url=database_url)
+    with session_factory() as session:
+        _upsert_rows(
+            session,
+            SourceDetailRecord.__table__,
+            rows,
+            index_elements=["source_type", "id"],
+            update_columns=["url", "version", "updated_at"],
+            chunk_size=chunk_size,
+        )
+        session.commit()
+
+
 def add_source_detail_url(
     url: str,
     source_type: str,
@@ -439,7 +1121,7 @@ def upsert_source_detail_record(
             record_id = (
                 normalized_source_id
                 if normalized_source_id is not None
-                else _next_source_detail_id(session, source_type=source_type)
+                else _reserve_source_detail_ids(session, source_type=source_type, count=1)
             )
             record = SourceDetailRecord(id=record_id, url=url, source_type=source_type)
             session.add(record)
@@ -511,3 +1193,107 @@ def upsert_source_list_record(
         session.commit()
         session.refresh(record)
         return record
+
+
+class SourceListStatusWriter:
+    """Buffer source-list status updates and flush them as multi-row upserts.
+
+    Updates are keyed by URL (the latest one wins) and flushed once ``flush_size``
+    URLs are pending or ``flush_interval`` seconds have passed since the last flush.
+    Use it as a context manager so the remaining updates are flushed on exit, even
+    when the surrounding loop fails.
+
+    Updates added with ``held=True`` describe sources that are still buffered
+    elsewhere. They do not count towards a due flush and are written only by an
+    explicit ``flush()``, which the owner calls once those sources are durable.
+    """
+
+    def __init__(
+        self,
+        database_url: Optional[str] = None,
+        flush_size: int = DEFAULT_STATUS_FLUSH_SIZE,
+        flush_interval: float = DEFAULT_STATUS_FLUSH_SECONDS,
+    ):
+        self.database_url = database_url
+        self.flush_size = max(1, int(flush_size))
+        self.flush_interval = flush_interval
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._held: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._pending) + len(self._held)
+
+    def add(
+        self,
+        url: str,
+        source_type: str,
+        source_count: int,
+        queried_at: Optional[datetime] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        content_md5: Optional[str] = None,
+        held: bool = False,
+    ) -> None:
+        if not url:
+            raise ValueError("url is required")
+        if not source_type:
+            raise ValueError("source_type is required")
+
+        queried_at = queried_at or utcnow()
+        with self._lock:
+            self._pending.pop(url, None)
+            self._held.pop(url, None)
+            (self._held if held else self._pending)[url] = {
+                "url": url,
+                "source_type": source_type,
+                "source_count": int(source_count),
+                "last_queried_at": queried_at,
+                "etag": etag,
+                "last_modified": last_modified,
+                "content_md5": content_md5,
+                "created_at": queried_at,
+                "updated_at": utcnow(),
+            }
+            due = len(self._pending) >= self.flush_size or (
+                bool(self._pending) and time.monotonic() - self._last_flush >= self.flush_interval
+            )
+        if due:
+            self.flush(include_held=False)
+
+    def flush(self, include_held: bool = True) -> int:
+        with self._lock:
+            rows = list(self._pending.values())
+            self._pending = {}
+            if include_held:
+                rows.extend(self._held.values())
+                self._held = {}
+            self._last_flush = time.monotonic()
+        if not rows:
+            return 0
+
+        init_source_db(database_url=self.database_url)
+        session_factory = _get_session_factory(database_url=self.database_url)
+        with session_factory() as session:
+            _upsert_rows(
+                session,
+                SourceListRecord.__table__,
+                rows,
+                index_elements=["url"],
+                update_columns=[
+                    "source_type",
+                    "source_count",
+                    "last_queried_at",
+                    *SOURCE_LIST_VALIDATOR_KEYS,
+                    "updated_at",
+                ],
+            )
+            session.commit()
+        return len(rows)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.flush()
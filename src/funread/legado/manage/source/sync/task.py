@@ -1,26 +1,42 @@
 """Sync local source files into database records."""
 
 import os
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from nltlog import getLogger
 from nltsecret import read_secret
 from nlttask import Task
 from tqdm import tqdm
 
+from ...download.core.manifest import SourceFileManifest
 from ...download.core.store import LocalSourceStore
 from ...download.sources.book import BookSourceProcessor
 from ...download.sources.rss import RSSSourceProcessor
-from ..storage import replace_source_detail_records, replace_source_index_records
+from ..storage import (
+    DEFAULT_BULK_INSERT_CHUNK_SIZE,
+    delete_source_detail_records,
+    delete_source_index_records,
+    replace_source_detail_records,
+    replace_source_index_records,
+    upsert_source_detail_records,
+    upsert_source_index_records,
+)
 
 
 logger = getLogger("funread")
 
+SUMMARY_FIELDS = ("url_id", "hostname", "version", "md5_list")
+
 
 class SyncLocalSourceRecordsTask(Task):
     """Rebuild source detail/index records from local source files."""
 
-    def __init__(self, path: Optional[str] = None, *args, **kwargs):
+    def __init__(
+        self, path: Optional[str] = None, store: Optional[LocalSourceStore] = None, *args, **kwargs
+    ):
+        self.store = store
+        if path is None and store is not None:
+            path = os.path.dirname(store.path_rot)
         self.path = path or self._read_cache_root()
         super(SyncLocalSourceRecordsTask, self).__init__(*args, **kwargs)
 
@@ -56,87 +72,221 @@ class SyncLocalSourceRecordsTask(Task):
     def _count_unmerged_versions(cls, data: Dict[str, Any]) -> int:
         return len(cls._iter_md5_values(data.get("candidate", [])))
 
+    @classmethod
+    def _summarize_document(cls, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Reduce a host document to the fields its database rows are built from."""
+        url_id = data.get("url_id")
+        hostname = str(data.get("hostname") or "")
+        if url_id is None or not hostname:
+            return {"url_id": None, "hostname": "", "version": 0, "md5_list": []}
+
+        md5_list: List[str] = []
+        for key in ("merged", "candidate"):
+            md5_list.extend(cls._iter_md5_values(data.get(key, [])))
+        return {
+            "url_id": int(url_id),
+            "hostname": hostname,
+            "version": cls._count_unmerged_versions(data),
+            "md5_list": list(dict.fromkeys(md5_list)),
+        }
+
     @staticmethod
-    def _iter_source_files(store: LocalSourceStore) -> List[str]:
-        file_list: List[str] = []
-        if not os.path.exists(store.path_bok):
-            return file_list
-        for root, _, files in os.walk(store.path_bok):
-            for name in files:
-                if name.endswith(".json"):
-                    file_list.append(os.path.join(root, name))
-        file_list.sort()
-        return file_list
-
-    def _build_records(self, store: LocalSourceStore) -> Dict[str, Any]:
-        detail_records: List[Dict[str, Any]] = []
-        index_records: List[Dict[str, Any]] = []
-        seen_md5: Set[str] = set()
-
-        for file_path in tqdm(self._iter_source_files(store), desc=f"sync-{store.cate1}"):
-            try:
-                data = store._load_json_safely(file_path)
-            except Exception as e:
-                logger.warning(f"Skip invalid source file {file_path}: {e}")
+    def _assemble_records(
+        summaries: Iterable[Dict[str, Any]], source_type: str
+    ) -> Dict[str, Dict[Any, Dict[str, Any]]]:
+        """Build detail rows keyed by id and index rows keyed by md5; the first file wins an md5."""
+        detail_records: Dict[Any, Dict[str, Any]] = {}
+        index_records: Dict[Any, Dict[str, Any]] = {}
+        for summary in summaries:
+            url_id = summary.get("url_id")
+            hostname = summary.get("hostname")
+            if url_id is None or not hostname:
                 continue
+            detail_records[url_id] = {
+                "id": url_id,
+                "url": hostname,
+                "version": summary.get("version", 0),
+            }
+            cate1 = (url_id // 100) * 100
+            for md5 in summary.get("md5_list", []):
+                if md5 in index_records:
+                    continue
+                index_records[md5] = {
+                    "md5": md5,
+                    "source_type": source_type,
+                    "url_id": url_id,
+                    "hostname": hostname,
+                    "cate1": cate1,
+                }
+        return {"detail_records": detail_records, "index_records": index_records}
 
-            url_id = data.get("url_id")
-            hostname = str(data.get("hostname") or "")
-            if url_id is None or not hostname:
+    @staticmethod
+    def _sync_manifest_path(store: LocalSourceStore) -> str:
+        return os.path.join(store.path_pkl, "sync-manifest.json")
+
+    def _scan_changed_files(
+        self, store: LocalSourceStore, manifest: SourceFileManifest
+    ) -> Dict[str, int]:
+        """Refresh manifest entries for files whose mtime, size and content hash changed."""
+        scanner = store.scanner
+        file_list = scanner.list_files()
+        stats = {"files": len(file_list), "parsed": 0}
+        fingerprints = {file_path: manifest.fingerprint(file_path) for file_path in file_list}
+        stale = [
+            file_path
+            for file_path in file_list
+            if manifest.lookup(file_path, fingerprints[file_path]) is None
+        ]
+        known_sha1: Dict[str, str] = {}
+        for file_path in stale:
+            entry = manifest.get(file_path)
+            if entry is not None and entry.get("sha1"):
+                known_sha1[file_path] = entry["sha1"]
+        scanned = scanner.scan(stale, extract=self._summarize_document, known_sha1=known_sha1)
+        for file_path, content_sha1, summary, error in tqdm(
+            scanned, total=len(stale), desc=f"sync-{store.cate1}"
+        ):
+            if error is not None:
+                logger.warning(f"Skip invalid source file {file_path}: {error}")
+                manifest.discard(file_path)
                 continue
+            if content_sha1 == known_sha1.get(file_path):
+                entry = manifest.get(file_path)
+                summary = {key: entry.get(key) for key in SUMMARY_FIELDS}
+            else:
+                stats["parsed"] += 1
+            manifest.update(file_path, fingerprints[file_path], sha1=content_sha1, **summary)
+        manifest.prune(file_list)
+        return stats
 
-            detail_records.append(
-                {
-                    "id": int(url_id),
-                    "url": hostname,
-                    "version": self._count_unmerged_versions(data),
-                }
-            )
+    def _build_records_from_manifest(
+        self, entries: Dict[str, Dict[str, Any]], source_type: str
+    ) -> Dict[str, Dict[Any, Dict[str, Any]]]:
+        summaries = []
+        for key in sorted(entries):
+            entry = entries[key]
+            summary = {field: entry.get(field) for field in SUMMARY_FIELDS}
+            summary["md5_list"] = summary["md5_list"] or []
+            summaries.append(summary)
+        return self._assemble_records(summaries, source_type)
 
-            cate1 = (int(url_id) // 100) * 100
-            for key in ("merged", "candidate"):
-                items = data.get(key, [])
-                if not isinstance(items, list):
-                    continue
-                for md5 in self._iter_md5_values(items):
-                    if md5 in seen_md5:
-                        continue
-                    seen_md5.add(md5)
-                    index_records.append(
-                        {
-                            "md5": md5,
-                            "source_type": store.cate1,
-                            "url_id": int(url_id),
-                            "hostname": hostname,
-                            "cate1": cate1,
-                        }
-                    )
+    @staticmethod
+    def _diff_records(
+        previous: Dict[Any, Dict[str, Any]], current: Dict[Any, Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], List[Any]]:
+        upserts = [record for key, record in current.items() if previous.get(key) != record]
+        deletes = [key for key in previous if key not in current]
+        return upserts, deletes
+
+    def _sync_incremental(
+        self,
+        store: LocalSourceStore,
+        manifest: SourceFileManifest,
+        database_url: Optional[str],
+        chunk_size: int,
+    ) -> Dict[str, int]:
+        previous = self._build_records_from_manifest(dict(manifest.entries), store.cate1)
+        scan = self._scan_changed_files(store, manifest)
+        current = self._build_records_from_manifest(manifest.entries, store.cate1)
 
+        detail_upserts, detail_deletes = self._diff_records(
+            previous["detail_records"], current["detail_records"]
+        )
+        index_upserts, index_deletes = self._diff_records(
+            previous["index_records"], current["index_records"]
+        )
+        options = {
+            "source_type": store.cate1,
+            "database_url": database_url,
+            "chunk_size": chunk_size,
+        }
+        delete_source_index_records(index_deletes, **options)
+        delete_source_detail_records(detail_deletes, **options)
+        upsert_source_detail_records(detail_upserts, **options)
+        upsert_source_index_records(index_upserts, **options)
+        logger.info(
+            f"sync-{store.cate1}: parsed {scan['parsed']}/{scan['files']} files, "
+            f"details +{len(detail_upserts)}/-{len(detail_deletes)}, "
+            f"indexes +{len(index_upserts)}/-{len(index_deletes)}"
+        )
         return {
-            "detail_records": detail_records,
-            "index_records": index_records,
+            "details": len(current["detail_records"]),
+            "indexes": len(current["index_records"]),
         }
 
-    def run_source(self, source_type: str, database_url: Optional[str] = None) -> Dict[str, int]:
-        with self._create_store(self.path, source_type=source_type) as store:
-            payload = self._build_records(store)
-            replace_source_detail_records(
-                records=payload["detail_records"],
-                source_type=store.cate1,
-                database_url=database_url or store.database_url,
-            )
-            replace_source_index_records(
-                records=payload["index_records"],
-                source_type=store.cate1,
-                database_url=database_url or store.database_url,
-            )
-            return {
-                "details": len(payload["detail_records"]),
-                "indexes": len(payload["index_records"]),
-            }
+    def _sync_full(
+        self,
+        store: LocalSourceStore,
+        manifest: SourceFileManifest,
+        database_url: Optional[str],
+        chunk_size: int,
+        use_staging: bool,
+    ) -> Dict[str, int]:
+        manifest.entries = {}
+        self._scan_changed_files(store, manifest)
+        records = self._build_records_from_manifest(manifest.entries, store.cate1)
+        detail_records = list(records["detail_records"].values())
+        index_records = list(records["index_records"].values())
+        replace_source_detail_records(
+            records=detail_records,
+            source_type=store.cate1,
+            database_url=database_url,
+            chunk_size=chunk_size,
+            use_staging=use_staging,
+        )
+        replace_source_index_records(
+            records=index_records,
+            source_type=store.cate1,
+            database_url=database_url,
+            chunk_size=chunk_size,
+            use_staging=use_staging,
+        )
+        return {"details": len(detail_records), "indexes": len(index_records)}
+
+    def run_source(
+        self,
+        source_type: str,
+        database_url: Optional[str] = None,
+        chunk_size: int = DEFAULT_BULK_INSERT_CHUNK_SIZE,
+        use_staging: bool = True,
+        full_rebuild: bool = False,
+    ) -> Dict[str, int]:
+        """
+        Sync one source type into the database.
+
+        A per-file manifest (mtime, size, content sha1 and the rows each file produced)
+        is kept in ``pkl/sync-manifest.json``; later runs only parse changed files and
+        apply the row-level difference. The first run, or ``full_rebuild=True``, rebuilds
+        both tables from scratch. Use a full rebuild after pointing the task at another
+        database or editing the tables by hand.
+
+        Only the host files are read, so no store session is opened and the url map
+        and md5 index are never loaded; the store passed to the task is reused when
+        it holds ``source_type``.
+        """
+        store = self.store
+        if store is None or store.cate1 != source_type:
+            store = self._create_store(self.path, source_type=source_type)
+        database_url = database_url or store.database_url
+        manifest = SourceFileManifest(self._sync_manifest_path(store), root=store.path_bok)
+        if full_rebuild or not os.path.exists(manifest.path):
+            stats = self._sync_full(store, manifest, database_url, chunk_size, use_staging)
+        else:
+            manifest.load()
+            stats = self._sync_incremental(store, manifest, database_url, chunk_size)
+        manifest.save()
+        return stats
 
-    def run_book(self, database_url: Optional[str] = None) -> Dict[str, int]:
-        return self.run_source(source_type="book", database_url=database_url)
+    def run_book(
+        self, database_url: Optional[str] = None, full_rebuild: bool = False
+    ) -> Dict[str, int]:
+        return self.run_source(
+            source_type="book", database_url=database_url, full_rebuild=full_rebuild
+        )
 
-    def run_rss(self, database_url: Optional[str] = None) -> Dict[str, int]:
-        return self.run_source(source_type="rss", database_url=database_url)
+    def run_rss(
+        self, database_url: Optional[str] = None, full_rebuild: bool = False
+    ) -> Dict[str, int]:
+        return self.run_source(
+            source_type="rss", database_url=database_url, full_rebuild=full_rebuild
+        )
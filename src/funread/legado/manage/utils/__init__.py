@@ -1,5 +1,13 @@
 """工具函数模块"""
 
 from .core import retain_zh_ch_dig, url_to_hostname
+from .http import HttpClient, TokenBucket, configure_http_client, get_http_client
 
-__all__ = ["url_to_hostname", "retain_zh_ch_dig"]
+__all__ = [
+    "HttpClient",
+    "TokenBucket",
+    "configure_http_client",
+    "get_http_client",
+    "url_to_hostname",
+    "retain_zh_ch_dig",
+]
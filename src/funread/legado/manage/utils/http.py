@@ -0,0 +1,183 @@
+"""共享 HTTP 客户端"""
+
+import random
+import threading
+import time
+from typing import Any, Iterable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_POOL_HOSTS = 32
+DEFAULT_MAX_PER_HOST = 8
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+DEFAULT_BACKOFF_JITTER = 0.5
+RETRY_STATUS_CODES = (500, 502, 503, 504)
+
+
+class JitteredRetry(Retry):
+    """在指数退避时间上叠加随机抖动的重试策略"""
+
+    jitter: float = DEFAULT_BACKOFF_JITTER
+
+    def new(self, **kw: Any) -> "JitteredRetry":
+        retry = super(JitteredRetry, self).new(**kw)
+        retry.jitter = self.jitter
+        return retry
+
+    def get_backoff_time(self) -> float:
+        backoff = super(JitteredRetry, self).get_backoff_time()
+        if backoff <= 0 or self.jitter <= 0:
+            return backoff
+        return backoff + random.uniform(0, self.jitter)
+
+
+class HttpClient:
+    """
+    基于 requests.Session 的共享 HTTP 客户端
+
+    每个主机一个 keep-alive 连接池，``max_per_host`` 同时限制单个主机的并发连接数
+    （连接池耗尽时阻塞等待）。GET 等幂等请求在连接错误、超时和 5xx 响应时按带抖动的
+    指数退避重试；POST 不自动重试，由调用方自行决定。
+    """
+
+    def __init__(
+        self,
+        max_per_host: int = DEFAULT_MAX_PER_HOST,
+        pool_hosts: int = DEFAULT_POOL_HOSTS,
+        retries: int = DEFAULT_RETRIES,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+        backoff_jitter: float = DEFAULT_BACKOFF_JITTER,
+        status_forcelist: Iterable[int] = RETRY_STATUS_CODES,
+    ):
+        self.max_per_host = max(1, int(max_per_host))
+        retry = JitteredRetry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=tuple(status_forcelist),
+            raise_on_status=False,
+        )
+        retry.jitter = backoff_jitter
+        adapter = HTTPAdapter(
+            pool_connections=max(1, int(pool_hosts)),
+            pool_maxsize=self.max_per_host,
+            pool_block=True,
+            max_retries=retry,
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class TokenBucket:
+    """
+    线程安全的令牌桶限流器
+
+    以 ``rate`` 个/秒的速度补充令牌，最多积累 ``capacity`` 个，``rate`` 不大于 0 时不限速。
+    收到限流响应时调用 ``pause`` 让所有调用方在指定时间内暂停获取令牌（例如遵守 Retry-After）。
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(capacity))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        if self.rate > 0:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """
+        获取一个令牌，必要时阻塞等待
+
+        Returns:
+            等待的总秒数
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self._paused_until:
+                    delay = self._paused_until - now
+                elif self.rate <= 0:
+                    return waited
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                else:
+                    delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds: float) -> None:
+        """
+        在 ``seconds`` 秒内暂停发放令牌
+
+        Args:
+            seconds: 暂停时长（秒）
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + max(0.0, seconds))
+            self._tokens = 0.0
+            self._updated = now
+
+
+_DEFAULT_CLIENT: Optional[HttpClient] = None
+_DEFAULT_CLIENT_LOCK = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """
+    获取进程内共享的 HTTP 客户端
+
+    Returns:
+        共享的 HttpClient 实例，首次调用时按默认参数创建
+    """
+    global _DEFAULT_CLIENT
+    if _DEFAULT_CLIENT is None:
+        with _DEFAULT_CLIENT_LOCK:
+            if _DEFAULT_CLIENT is None:
+                _DEFAULT_CLIENT = HttpClient()
+    return _DEFAULT_CLIENT
+
+
+def configure_http_client(**kwargs: Any) -> HttpClient:
+    """
+    按给定参数重建共享 HTTP 客户端
+
+    Args:
+        **kwargs: 传给 HttpClient 的参数，如 max_per_host、retries、backoff_factor
+
+    Returns:
+        新的共享 HttpClient 实例
+    """
+    global _DEFAULT_CLIENT
+    with _DEFAULT_CLIENT_LOCK:
+        previous = _DEFAULT_CLIENT
+        _DEFAULT_CLIENT = HttpClient(**kwargs)
+    if previous is not None:
+        previous.close()
+    return _DEFAULT_CLIENT
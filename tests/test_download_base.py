@@ -1,10 +1,19 @@
+import json
+import tarfile
+import threading
+import time
 from pathlib import Path
 
+import pytest
+
+import funread.legado.manage as manage_module
 import funread.legado.manage.download.reporting.remote as remote_module
+import funread.legado.manage.download.core.store as store_module
 import funread.legado.manage.download.sources.book as book_module
 import funread.legado.manage.download.sources.rss as rss_module
 import funread.legado.manage.download.task as generate_task_module
 import funread.legado.manage.source.merge.task as merge_module
+import funread.legado.manage.source.storage as storage_module
 
 from funread.legado.manage.download.core import EXPORT_BATCH_SIZE, LocalSourceStore, SourceProcessor
 from funread.legado.manage.download import (
@@ -16,7 +25,11 @@ from funread.legado.manage.download import (
     UploadSourceBatchesTask,
 )
 from funread.legado.manage.download.context import SourceBuildContext
+from funread.legado.manage.download.core.index import SourceMd5Index
+from funread.legado.manage.download.core.merge_index import merge_metadata
+from funread.legado.manage.download.core.scanner import SourceFileScanner
 from funread.legado.manage.download.sources.book import BookSourceProcessor
+from funread.legado.manage.utils import HttpClient, TokenBucket
 from funread.legado.manage.source import (
     SourceMergeRunner,
     SyncLocalSourceRecordsTask,
@@ -27,6 +40,18 @@ from funread.legado.manage.source import (
 )
 
 
+class _FakeHttpClient:
+    def __init__(self, get=None, post=None):
+        self._get = get
+        self._post = post
+
+    def get(self, url, **kwargs):
+        return self._get(url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self._post(url, **kwargs)
+
+
 class DummySourceProcessor(SourceProcessor):
     def loader(self) -> None:
         return None
@@ -62,6 +87,89 @@ def test_url_index_writes_to_source_table(tmp_path: Path) -> None:
     assert source.url_map["https://c.example"] == 10000000
 
 
+def test_url_index_allocates_from_reserved_blocks_and_claims_hostnames(tmp_path: Path) -> None:
+    db_url = f"sqlite:///{tmp_path / 'url_id_blocks.db'}"
+    first = DummySourceProcessor(
+        path=str(tmp_path / "a"), cate1="rss", database_url=db_url, url_id_block_size=10
+    )
+    second = DummySourceProcessor(
+        path=str(tmp_path / "b"), cate1="rss", database_url=db_url, url_id_block_size=10
+    )
+    first.loads()
+    second.loads()
+
+    assert first.url_index("a.example") == 10000000
+    assert second.url_index("b.example") == 10000010
+    assert first.url_index("c.example") == 10000001
+    assert first.url_index("a.example") == 10000000
+    assert {
+        record.url: record.id
+        for record in list_source_detail_records(source_type="rss", database_url=db_url)
+    } == {"a.example": 10000000, "b.example": 10000010, "c.example": 10000001}
+    assert (
+        add_source_detail_url(url="d.example", source_type="rss", database_url=db_url).id
+        == 10000020
+    )
+
+
+def test_concurrent_stores_share_the_id_of_a_new_hostname(tmp_path: Path) -> None:
+    db_url = f"sqlite:///{tmp_path / 'url_id_race.db'}"
+    first = DummySourceProcessor(
+        path=str(tmp_path / "a"), cate1="rss", database_url=db_url, url_id_block_size=10
+    )
+    second = DummySourceProcessor(
+        path=str(tmp_path / "b"), cate1="rss", database_url=db_url, url_id_block_size=10
+    )
+    first.loads()
+    second.loads()
+    # The second store misses the row, as if both looked the hostname up at the same time.
+    second.prefetch_url_ids = lambda urls: None
+
+    assert first.url_index("a.example") == 10000000
+    assert second.url_index("a.example") == 10000000
+    assert second.url_index("b.example") == 10000011
+    assert [
+        (record.url, record.id)
+        for record in list_source_detail_records(source_type="rss", database_url=db_url)
+    ] == [("a.example", 10000000), ("b.example", 10000011)]
+    with pytest.raises(Exception):
+        manage_module.upsert_source_detail_records(
+            [{"id": 10000099, "url": "a.example"}], source_type="rss", database_url=db_url
+        )
+
+
+def test_nested_store_sessions_load_once_and_persist_when_dirty(tmp_path: Path) -> None:
+    db_url = f"sqlite:///{tmp_path / 'store_session.db'}"
+    source = BookSourceProcessor(path=str(tmp_path), cate1="book", database_url=db_url)
+    calls = []
+    original_loads, original_dumps = source.loads, source.dumps
+
+    def _loads():
+        calls.append("loads")
+        original_loads()
+
+    def _dumps():
+        calls.append("dumps")
+        original_dumps()
+
+    source.loads, source.dumps = _loads, _dumps
+
+    with source:
+        with source as runner:
+            runner.add_source({"bookSourceUrl": "https://a.example.com/", "bookSourceName": "A"})
+        assert calls == ["loads"]
+        assert source.checkpoint() is True
+        assert source.checkpoint() is False
+        with source as runner:
+            runner.add_source({"bookSourceUrl": "https://b.example.com/", "bookSourceName": "B"})
+    assert calls == ["loads", "dumps", "dumps"]
+
+    with source:
+        pass
+    assert calls == ["loads", "dumps", "dumps", "loads"]
+    assert len(load_source_index_map(source_type="book", database_url=db_url)) == 2
+
+
 def test_book_source_download_accepts_book_source_url(tmp_path: Path) -> None:
     source = BookSourceProcessor(path=str(tmp_path), cate1="book")
 
@@ -111,13 +219,181 @@ def test_add_source_skips_existing_md5_from_database(tmp_path: Path) -> None:
     assert added is False
 
 
+def test_dumps_upserts_only_new_index_records(monkeypatch, tmp_path: Path) -> None:
+    db_url = f"sqlite:///{tmp_path / 'index_delta.db'}"
+    upsert_source_index_records(
+        records=[
+            {
+                "md5": f"md5-{i}",
+                "url_id": 10000001,
+                "hostname": "old.example.com",
+                "cate1": 10000000,
+            }
+            for i in range(5)
+        ],
+        source_type="book",
+        database_url=db_url,
+        chunk_size=2,
+    )
+    source = BookSourceProcessor(path=str(tmp_path), cate1="book", database_url=db_url)
+    source.loads()
+    assert len(source.md5_set) == 5
+
+    upserted = []
+    original_upsert = manage_module.upsert_source_index_records
+
+    def _spy(records, **kwargs):
+        upserted.append(sorted(record["hostname"] for record in records))
+        return original_upsert(records, **kwargs)
+
+    monkeypatch.setattr(manage_module, "upsert_source_index_records", _spy)
+    assert source.add_source({"bookSourceUrl": "https://new.example.com/", "bookSourceName": "N"})
+    source.dumps()
+    source.dumps()
+
+    assert upserted == [["new.example.com"]]
+    assert len(load_source_index_map(source_type="book", database_url=db_url)) == 6
+
+
+def test_lazy_index_checks_md5s_on_demand(monkeypatch, tmp_path: Path) -> None:
+    db_url = f"sqlite:///{tmp_path / 'lazy_index.db'}"
+    seed = BookSourceProcessor(path=str(tmp_path / "seed"), cate1="book", database_url=db_url)
+    seed.loads()
+    existing = {"bookSourceUrl": "https://a.example.com/", "bookSourceName": "A"}
+    assert seed.add_source(existing)
+    seed.dumps()
+
+    source = BookSourceProcessor(
+        path=str(tmp_path / "lazy"), cate1="book", database_url=db_url, lazy_index=True
+    )
+    source.loads()
+    assert len(source.md5_set) == 0 and source.url_map == {}
+    assert Path(source.md5_bloom_path).exists()
+
+    lookups = []
+    original_lookup = manage_module.lookup_source_index_records
+
+    def _spy(md5_list, **kwargs):
+        lookups.append(list(md5_list))
+        return original_lookup(md5_list, **kwargs)
+
+    monkeypatch.setattr(manage_module, "lookup_source_index_records", _spy)
+    added = source.add_sources(
+        [existing, {"bookSourceUrl": "https://a.example.com/", "bookSourceName": "B"}]
+    )
+
+    assert added == 1
+    assert lookups == [[seed.compute_source_md5(seed.source_format(dict(existing)))]]
+    assert source.url_map == {"a.example.com": seed.url_map["a.example.com"]}
+
+
+def test_source_md5_index_behaves_like_record_dict() -> None:
+    md5s = [f"{i:032x}" for i in (7, 3, 9)]
+    index = SourceMd5Index.from_rows(
+        [(md5s[1], 10000101, "b.example.com"), (md5s[0], 10000001, "a.example.com")],
+        source_type="book",
+        compact_threshold=2,
+    )
+    index[md5s[2]] = {"md5": md5s[2], "url_id": 10000001, "hostname": "a.example.com"}
+    index["not-a-md5"] = {"url_id": 10000101, "hostname": "b.example.com"}
+
+    assert len(index) == 4
+    assert md5s[0] in index and "f" * 32 not in index
+    assert index[md5s[1]] == {
+        "md5": md5s[1],
+        "source_type": "book",
+        "url_id": 10000101,
+        "hostname": "b.example.com",
+        "cate1": 10000100,
+    }
+    index.compact()
+    assert sorted(index) == sorted(md5s + ["not-a-md5"])
+    del index[md5s[0]]
+    assert md5s[0] not in index and index.get(md5s[2])["hostname"] == "a.example.com"
+
+
+def test_add_source_writes_each_host_file_once_per_flush(monkeypatch, tmp_path: Path) -> None:
+    db_url = f"sqlite:///{tmp_path / 'document_cache.db'}"
+    source = BookSourceProcessor(
+        path=str(tmp_path), cate1="book", database_url=db_url, document_cache_size=1
+    )
+    writes = []
+    original_writer = source.document_cache.writer
+
+    def _counting_writer(file_path, data):
+        writes.append(Path(file_path).name)
+        original_writer(file_path, data)
+
+    source.document_cache.writer = _counting_writer
+    source.loads()
+
+    for index in range(3):
+        assert source.add_source(
+            {"bookSourceUrl": "https://a.example.com/", "bookSourceName": f"A{index}"}
+        )
+    assert writes == []
+
+    assert source.add_source({"bookSourceUrl": "https://b.example.com/", "bookSourceName": "B"})
+    assert writes == ["10000000.json"]
+
+    source.dumps()
+    assert writes == ["10000000.json", "10000001.json"]
+    first = LocalSourceStore._load_json_safely(
+        str(Path(source.path_bok) / "10000000-10000100" / "10000000.json")
+    )
+    assert len(first["candidate"]) == 3
+
+
+def test_export_sources_reuses_manifest_for_unchanged_files(monkeypatch, tmp_path: Path) -> None:
+    store = LocalSourceStore(path=str(tmp_path), cate1="rss")
+    source_dir = Path(store.path_bok) / "10000000-10000100"
+    for url_id in (10000000, 10000001):
+        LocalSourceStore._save_json_safely(
+            str(source_dir / f"{url_id}.json"),
+            {
+                "available": True,
+                "candidate": [
+                    {"md5_list": [f"{url_id}abcdef"], "source": {"sourceUrl": f"https://{url_id}/"}}
+                ],
+                "customOrder": url_id,
+                "merged": [],
+            },
+        )
+
+    first = [item for batch in store.export_sources(size=10) for item in batch]
+    assert Path(store.export_manifest_path).exists()
+    assert Path(store.path_cache) in Path(store.export_manifest_path).parents
+
+    loads = []
+    original_entry = store_module.export_document_entry
+
+    def _counting_entry(data, source_url_key):
+        loads.append(f"{data['customOrder']}.json")
+        return original_entry(data, source_url_key)
+
+    monkeypatch.setattr(store_module, "export_document_entry", _counting_entry)
+    second = [item for batch in store.export_sources(size=10) for item in batch]
+    assert loads == []
+    assert sorted(second, key=lambda x: x["customOrder"]) == sorted(
+        first, key=lambda x: x["customOrder"]
+    )
+
+    LocalSourceStore._save_json_safely(
+        str(source_dir / "10000001.json"),
+        {"available": False, "candidate": [], "customOrder": 10000001, "merged": []},
+    )
+    third = [item for batch in store.export_sources(size=10) for item in batch]
+    assert loads == ["10000001.json"]
+    assert third == [{"sourceUrl": "https://10000000/#10000000ab", "customOrder": 10000000}]
+
+
 def test_book_loader_reads_source_download_iterator(monkeypatch, tmp_path: Path) -> None:
     source = book_module.BookSourceProcessor(path=str(tmp_path), cate1="book")
 
     monkeypatch.setattr(
         book_module,
         "iter_source_list_data",
-        lambda source_type: iter(
+        lambda source_type, **kwargs: iter(
             [
                 (
                     object(),
@@ -142,7 +418,7 @@ def test_rss_loader_reads_source_download_iterator(monkeypatch, tmp_path: Path)
     monkeypatch.setattr(
         rss_module,
         "iter_source_list_data",
-        lambda source_type: iter(
+        lambda source_type, **kwargs: iter(
             [
                 (
                     object(),
@@ -158,6 +434,151 @@ def test_rss_loader_reads_source_download_iterator(monkeypatch, tmp_path: Path)
     assert exported[0]["sourceUrl"].startswith("https://rss.example.com/feed#")
 
 
+def test_add_sources_from_url_skips_unchanged_body(monkeypatch, tmp_path: Path) -> None:
+    db_url = f"sqlite:///{tmp_path / 'conditional_fetch.db'}"
+    source = BookSourceProcessor(path=str(tmp_path), cate1="book", database_url=db_url)
+    payload = [{"bookSourceUrl": "https://books.example.com/api/", "bookSourceName": "A"}]
+
+    class _Response:
+        status_code = 200
+        headers = {}
+        content = remote_module.json.dumps(payload).encode("utf-8")
+
+        def raise_for_status(self):
+            return None
+
+        def json(self):
+            return remote_module.json.loads(self.content)
+
+    calls = []
+
+    def _fake_get(url, timeout, headers=None):
+        calls.append(url)
+        return _Response()
+
+    monkeypatch.setattr(storage_module, "get_http_client", lambda: _FakeHttpClient(get=_fake_get))
+    source.loads()
+
+    assert source.add_sources("https://lists.example.com/book.json") == 1
+    source.flush_download_records()
+    source.md5_set.clear()
+
+    assert source.add_sources("https://lists.example.com/book.json") == 0
+    assert calls == ["https://lists.example.com/book.json"] * 2
+
+
+def test_download_validators_wait_for_store_checkpoint(monkeypatch, tmp_path: Path) -> None:
+    db_url = f"sqlite:///{tmp_path / 'validator_order.db'}"
+    source = BookSourceProcessor(path=str(tmp_path), cate1="book", database_url=db_url)
+    payload = [{"bookSourceUrl": "https://books.example.com/api/", "bookSourceName": "A"}]
+
+    class _Response:
+        status_code = 200
+        headers = {}
+        content = remote_module.json.dumps(payload).encode("utf-8")
+
+        def raise_for_status(self):
+            return None
+
+        def json(self):
+            return remote_module.json.loads(self.content)
+
+    monkeypatch.setattr(
+        storage_module,
+        "get_http_client",
+        lambda: _FakeHttpClient(get=lambda url, timeout, headers=None: _Response()),
+    )
+    source.loads()
+    order = []
+    writer = source.source_list_writer
+    writer.flush_size = 1
+    flush_index_records = source.flush_index_records
+    flush_writer = writer.flush
+    monkeypatch.setattr(
+        source, "flush_index_records", lambda: order.append("index") or flush_index_records()
+    )
+    monkeypatch.setattr(
+        writer,
+        "flush",
+        lambda include_held=True: order.append("writer") or flush_writer(include_held),
+    )
+
+    assert source.add_sources("https://lists.example.com/book.json") == 1
+
+    # The list added sources, so its validators wait for the store to persist them.
+    assert order == []
+    assert len(writer) == 1
+    assert (
+        storage_module.get_source_list_record(
+            "https://lists.example.com/book.json", database_url=db_url
+        )
+        is None
+    )
+
+    # A due flush writes ready status rows only, without persisting the store.
+    source.persist_download_record("https://lists.example.com/broken.json", {"error": "boom"})
+    assert order == ["writer"]
+    assert len(writer) == 1
+    assert storage_module.get_source_list_record(
+        "https://lists.example.com/broken.json", database_url=db_url
+    )
+
+    order.clear()
+    assert source.checkpoint() is True
+    assert order == ["index", "writer"]
+    assert len(writer) == 0
+    record = storage_module.get_source_list_record(
+        "https://lists.example.com/book.json", database_url=db_url
+    )
+    assert record.content_md5 is not None
+
+
+def test_add_sources_drops_fetched_record_for_unsupported_payload(
+    monkeypatch, tmp_path: Path
+) -> None:
+    db_url = f"sqlite:///{tmp_path / 'unsupported_payload.db'}"
+    source = BookSourceProcessor(path=str(tmp_path), cate1="book", database_url=db_url)
+
+    class _Response:
+        status_code = 200
+        headers = {}
+        content = b"42"
+
+        def raise_for_status(self):
+            return None
+
+        def json(self):
+            return 42
+
+    monkeypatch.setattr(
+        storage_module,
+        "get_http_client",
+        lambda: _FakeHttpClient(get=lambda url, timeout, headers=None: _Response()),
+    )
+    source.loads()
+
+    assert source.add_sources("https://lists.example.com/book.json") == 0
+    assert not source._fetched_records
+    assert len(source.source_list_writer) == 0
+
+
+def test_http_client_pools_per_host_and_retries_with_jitter() -> None:
+    client = HttpClient(max_per_host=3, retries=2, backoff_factor=1, backoff_jitter=0.5)
+    adapter = client.session.get_adapter("https://www.yckceo.com/yuedu/shuyuan/json/id/1.json")
+    retry = adapter.max_retries
+
+    assert adapter._pool_maxsize == 3
+    assert adapter._pool_block is True
+    assert retry.total == 2
+    assert 500 in retry.status_forcelist
+    assert "POST" not in retry.allowed_methods
+
+    retried = retry.increment(method="GET", url="/x").increment(method="GET", url="/x")
+    assert retried.jitter == 0.5
+    assert 0 < retried.get_backoff_time() <= 2 + 0.5
+    client.close()
+
+
 class _FakeDrive:
     def __init__(self, fail_threshold=None):
         self.fail_threshold = fail_threshold
@@ -205,6 +626,37 @@ def test_upload_batch_increments_counter_on_success() -> None:
     assert context.drive.calls == [("progress-1000.json", 2)]
 
 
+def test_upload_exported_sources_fails_when_drive_reports_false(tmp_path: Path) -> None:
+    context = SourceBuildContext.__new__(SourceBuildContext)
+    context.dir_path = "funread/legado/snapshot/lasted/book"
+    context._source_count_cache = {}
+
+    class _Drive:
+        def get_file_list(self, fid):
+            return []
+
+        def upload_file(self, content, fid, filepath, filename):
+            return False
+
+    class _Runner:
+        path_pkl = str(tmp_path)
+
+        def export_sources(self, size):
+            yield [{"i": 1}]
+
+    context.drive = _Drive()
+    manager = remote_module.SourceRemoteManager(
+        context=context, initial_counter=1000, min_upload_batch_size=1
+    )
+
+    with pytest.raises(RuntimeError, match="progress-1000.json"):
+        manager.upload_exported_sources(_Runner(), 1)
+
+    assert manager.report["uploaded"] == []
+    ledger = json.loads((tmp_path / "upload-ledger.json").read_text())
+    assert ledger["batches"] == {}
+
+
 def test_source_build_context_formats_size_and_counts_sources() -> None:
     context = SourceBuildContext.__new__(SourceBuildContext)
     context._source_count_cache = {}
@@ -340,7 +792,7 @@ def test_generate_source_task_runs_in_order(monkeypatch) -> None:
     monkeypatch.setattr(
         GenerateSourceTask,
         "build_context",
-        lambda self, source_type: _Context(),
+        lambda self, source_type, **kwargs: _Context(),
     )
 
     class _BaseStep:
@@ -438,7 +890,7 @@ def test_generate_source_task_can_skip_steps(monkeypatch) -> None:
     monkeypatch.setattr(
         GenerateSourceTask,
         "build_context",
-        lambda self, source_type: _Context(),
+        lambda self, source_type, **kwargs: _Context(),
     )
 
     class _BaseStep:
@@ -493,6 +945,73 @@ def test_generate_source_task_can_skip_steps(monkeypatch) -> None:
     ]
 
 
+def test_generate_source_task_single_session_wraps_steps(monkeypatch) -> None:
+    calls = []
+
+    class _Store:
+        database_url = None
+
+        def __enter__(self):
+            calls.append("enter")
+            return self
+
+        def __exit__(self, exc_type, exc_val, exc_tb):
+            calls.append("exit")
+
+        def flush_documents(self):
+            calls.append("flush_documents")
+
+        def checkpoint(self):
+            calls.append("checkpoint")
+
+    class _Context:
+        remote_manager = None
+        report_builder = None
+
+        def create_store(self, path):
+            return _Store()
+
+    def _step(name):
+        class _Step:
+            def __init__(self, *args, **kwargs):
+                pass
+
+            def run(self):
+                calls.append(name)
+
+            def run_source(self, source_type, database_url=None):
+                calls.append(name)
+
+        return _Step
+
+    monkeypatch.setattr(GenerateSourceTask, "get_cache_root", staticmethod(lambda: "/tmp/cache"))
+    monkeypatch.setattr(
+        GenerateSourceTask, "build_context", lambda self, source_type, **kwargs: _Context()
+    )
+    monkeypatch.setattr(generate_task_module, "DownloadSourceDataTask", _step("download"))
+    monkeypatch.setattr(generate_task_module, "SyncLocalSourceRecordsTask", _step("sync"))
+    monkeypatch.setattr(generate_task_module, "UploadSourceBatchesTask", _step("upload"))
+
+    GenerateSourceTask().run_pipeline(
+        "booksource",
+        download=True,
+        sync=True,
+        upload=True,
+        single_session=True,
+        checkpoints=("download",),
+    )
+
+    assert calls == [
+        "enter",
+        "download",
+        "checkpoint",
+        "flush_documents",
+        "sync",
+        "upload",
+        "exit",
+    ]
+
+
 def test_cleanup_stale_remote_batches_deletes_higher_counters() -> None:
     context = SourceBuildContext.__new__(SourceBuildContext)
     context.dir_path = "funread/legado/snapshot/lasted/book"
@@ -528,68 +1047,290 @@ def test_cleanup_stale_remote_batches_deletes_higher_counters() -> None:
     assert context.drive.deleted == ["a/1002", "a/1003"]
 
 
-def test_openai_compatible_merger_reads_json_response(monkeypatch) -> None:
-    class _Response:
-        status_code = 200
-        text = '{"choices":[{"message":{"content":"{\\"ok\\": true}"}}]}'
+def test_export_source_partitions_keeps_other_buckets_stable(tmp_path: Path) -> None:
+    store = LocalSourceStore(path=str(tmp_path), cate1="rss")
 
-        def __enter__(self):
-            return self
+    def _write_host(url_id):
+        cate1 = (url_id // 100) * 100
+        LocalSourceStore._save_json_safely(
+            str(Path(store.path_bok) / f"{cate1}-{cate1 + 100}" / f"{url_id}.json"),
+            {
+                "candidate": [
+                    {"md5_list": [f"{url_id}abcdef"], "source": {"sourceUrl": f"https://{url_id}/"}}
+                ],
+                "merged": [],
+            },
+        )
 
-        def __exit__(self, exc_type, exc_val, exc_tb):
-            return False
+    for url_id in (10000001, 10000002, 10000003, 10000150):
+        _write_host(url_id)
 
-        def raise_for_status(self):
-            return None
+    before = dict(store.export_source_partitions(size=2, span=100, max_parts=3))
+    assert sorted(before) == [0, 1, 3]
+    assert [len(before[slot]) for slot in (0, 1, 3)] == [2, 1, 1]
 
-        def json(self):
-            return {"choices": [{"message": {"content": '{"ok": true}'}}]}
+    _write_host(10000000)
+    after = dict(store.export_source_partitions(size=2, span=100, max_parts=3))
+    assert sorted(after) == [0, 1, 3]
+    assert after[0][0]["sourceUrl"].startswith("https://10000000/")
+    assert [len(after[slot]) for slot in (0, 1)] == [2, 2]
+    assert after[3] == before[3]
 
-    def _fake_post(*args, **kwargs):
-        return _Response()
 
-    monkeypatch.setattr(merge_module.requests, "post", _fake_post)
-    merger = merge_module.OpenAICompatibleSourceMerger(
-        api_key="test-key",
-        base_url="https://example.com/v1",
-        model="deepseek/deepseek-reasoner",
-        timeout=30,
-    )
+def test_partition_bucket_resplits_by_bytes_when_parts_overflow() -> None:
+    small = [{"i": i, "pad": "x" * 20} for i in range(6)]
+    large = [{"i": i, "pad": "x" * 240} for i in (6, 7)]
+    sources = small + large
+    max_bytes = 400
+    assert len(json.dumps(sources)) > max_bytes
 
-    content = merger._post_and_collect_content(
-        {
-            "model": "deepseek/deepseek-reasoner",
-            "messages": [{"role": "user", "content": "x"}],
-        }
+    parts = dict(
+        LocalSourceStore._partition_bucket(2, sources, size=2, max_parts=4, max_bytes=max_bytes)
     )
 
-    assert content == '{"ok": true}'
+    assert sorted(parts) == [8, 9, 10]
+    assert [item for slot in sorted(parts) for item in parts[slot]] == sources
+    assert all(len(json.dumps(batch)) <= max_bytes for batch in parts.values())
 
 
-def test_openai_compatible_merger_retries_non_json_response(monkeypatch) -> None:
-    responses = iter(["not-json", '{"bookSourceUrl":"https://books.example.com/api/"}'])
+def test_upload_exported_sources_skips_unchanged_batches(tmp_path: Path) -> None:
+    context = SourceBuildContext.__new__(SourceBuildContext)
+    context.dir_path = "funread/legado/snapshot/lasted/book"
+    context._source_count_cache = {}
 
-    def _fake_post_and_collect_content(self, payload):
-        return next(responses)
+    class _File(dict):
+        def __init__(self, name, fid, sha):
+            super().__init__(name=name, fid=fid, ext={"sha": sha})
+            self.name = name
+            self.fid = fid
+            self.ext = self["ext"]
 
-    monkeypatch.setattr(
-        merge_module.OpenAICompatibleSourceMerger,
-        "_post_and_collect_content",
-        _fake_post_and_collect_content,
-    )
-    merger = merge_module.OpenAICompatibleSourceMerger(
-        api_key="test-key",
-        base_url="https://example.com/v1",
-        model="deepseek/deepseek-reasoner",
-        timeout=30,
-        max_retries=2,
-        retry_sleep_seconds=0,
-    )
+    class _Drive:
+        def __init__(self):
+            self.files = {}
+            self.uploaded = []
+            self.deleted = []
 
-    result = merger.merge_sources(
-        source_type="book",
-        hostname="books.example.com",
-        versions=[{"bookSourceUrl": "https://books.example.com/api/"}],
+        def get_file_list(self, fid):
+            return [_File(name, f"{fid}/{name}", sha) for name, sha in self.files.items()]
+
+        def upload_file(self, content, fid, filepath, filename):
+            self.uploaded.append(filename)
+            self.files[filename] = remote_module.SourceRemoteManager.content_sha(content)
+
+        def delete(self, fid):
+            self.deleted.append(fid)
+            self.files.pop(fid.rsplit("/", 1)[-1])
+            return True
+
+    class _Runner:
+        path_pkl = str(tmp_path)
+
+        def __init__(self, batches):
+            self.batches = batches
+
+        def export_sources(self, size):
+            yield from self.batches
+
+    context.drive = _Drive()
+    manager = remote_module.SourceRemoteManager(
+        context=context, initial_counter=1000, min_upload_batch_size=1
+    )
+
+    report = manager.upload_exported_sources(_Runner([[{"i": 1}], [{"i": 2}], [{"i": 3}]]), 1)
+    assert report == {"uploaded": [1000, 1001, 1002], "skipped": [], "deleted": []}
+    assert (tmp_path / "upload-ledger.json").exists()
+
+    context.drive.uploaded.clear()
+    report = manager.upload_exported_sources(_Runner([[{"i": 1}], [{"i": 5}]]), 1)
+    assert report == {"uploaded": [1001], "skipped": [1000], "deleted": [1002]}
+    assert context.drive.uploaded == ["progress-1001.json"]
+    assert context.drive.deleted == [f"{context.dir_path}/progress-1002.json"]
+
+    # Without a remote listing the ledger alone does not prove the remote copy.
+    def _offline(fid):
+        raise RuntimeError("offline")
+
+    context.drive.get_file_list = _offline
+    context.drive.uploaded.clear()
+    report = manager.upload_exported_sources(_Runner([[{"i": 1}], [{"i": 5}]]), 1)
+    assert report["uploaded"] == [1000, 1001]
+    assert report["skipped"] == []
+
+
+def test_concurrent_upload_presizes_batches_and_honors_retry_after() -> None:
+    context = SourceBuildContext.__new__(SourceBuildContext)
+    context.dir_path = "funread/legado/snapshot/lasted/book"
+    context._source_count_cache = {}
+
+    class _Drive:
+        def __init__(self):
+            self.lock = threading.Lock()
+            self.files = {}
+            self.limited = False
+
+        def get_file_list(self, fid):
+            return []
+
+        def upload_file(self, content, fid, filepath, filename):
+            with self.lock:
+                if filename == "progress-1001.json" and not self.limited:
+                    self.limited = True
+                    raise RuntimeError("403: API rate limit exceeded, retry after 0 seconds")
+                self.files[filename] = remote_module.json.loads(content)
+
+        def delete(self, fid):
+            return True
+
+    class _Runner:
+        def export_sources(self, size):
+            yield [{"i": i, "pad": "x" * 40} for i in range(5)]
+            yield [{"i": 5, "pad": "x" * 40}]
+
+    context.drive = _Drive()
+    manager = remote_module.SourceRemoteManager(
+        context=context,
+        initial_counter=1000,
+        min_upload_batch_size=1,
+        upload_workers=3,
+        max_batch_bytes=130,
+        rate_limiter=TokenBucket(rate=0),
+    )
+
+    report = manager.upload_exported_sources(_Runner(), 10)
+
+    assert report["uploaded"] == [1000, 1001, 1002, 1003]
+    assert context.drive.limited is True
+    assert {name: [item["i"] for item in data] for name, data in context.drive.files.items()} == {
+        "progress-1000.json": [0, 1],
+        "progress-1001.json": [2, 3],
+        "progress-1002.json": [4],
+        "progress-1003.json": [5],
+    }
+
+
+def test_concurrent_upload_splits_oversized_batches_onto_spare_counters() -> None:
+    context = SourceBuildContext.__new__(SourceBuildContext)
+    context.dir_path = "funread/legado/snapshot/lasted/book"
+    context._source_count_cache = {}
+    context.drive = _FakeDrive(fail_threshold=2)
+    manager = remote_module.SourceRemoteManager(
+        context=context,
+        initial_counter=1000,
+        min_upload_batch_size=1,
+        upload_workers=2,
+        rate_limiter=TokenBucket(rate=0),
+    )
+
+    counters = manager.upload_planned_batches(
+        [(1000, [{"i": i} for i in range(5)]), (1001, [{"i": 5}])]
+    )
+
+    assert counters == [1000, 1001, 1002, 1003]
+    assert sorted(manager.report["uploaded"]) == counters
+    uploaded = [call for call in context.drive.calls if call[1] <= 2]
+    assert sorted(uploaded) == [
+        ("progress-1000.json", 2),
+        ("progress-1001.json", 1),
+        ("progress-1002.json", 2),
+        ("progress-1003.json", 1),
+    ]
+
+
+def test_remote_manager_throttles_only_when_asked_or_concurrent() -> None:
+    context = SourceBuildContext.__new__(SourceBuildContext)
+
+    def _rate(**kwargs):
+        return remote_module.SourceRemoteManager(
+            context=context, initial_counter=1000, min_upload_batch_size=1, **kwargs
+        ).rate_limiter.rate
+
+    assert _rate() == 0
+    assert _rate(upload_rate=2.0) == 2.0
+    assert _rate(upload_workers=3) == remote_module.UPLOAD_REQUESTS_PER_SECOND
+
+
+def test_run_pipeline_passes_remote_options_to_the_uploader(monkeypatch, tmp_path: Path) -> None:
+    import funread.legado.manage.download.context as context_module
+
+    class _Drive:
+        def login(self, **kwargs):
+            pass
+
+    monkeypatch.setattr(context_module, "GithubDrive", _Drive)
+    monkeypatch.setattr(GenerateSourceTask, "get_cache_root", staticmethod(lambda: str(tmp_path)))
+
+    runtime = GenerateSourceTask().run_pipeline(
+        "rsssource", remote_options={"upload_workers": 4, "upload_rate": 2.0}
+    )
+
+    remote_manager = runtime["context"].remote_manager
+    assert remote_manager.upload_workers == 4
+    assert remote_manager.rate_limiter.rate == 2.0
+
+
+def test_openai_compatible_merger_reads_json_response(monkeypatch) -> None:
+    class _Response:
+        status_code = 200
+        text = '{"choices":[{"message":{"content":"{\\"ok\\": true}"}}]}'
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, exc_type, exc_val, exc_tb):
+            return False
+
+        def raise_for_status(self):
+            return None
+
+        def json(self):
+            return {"choices": [{"message": {"content": '{"ok": true}'}}]}
+
+    def _fake_post(*args, **kwargs):
+        return _Response()
+
+    monkeypatch.setattr(merge_module, "get_http_client", lambda: _FakeHttpClient(post=_fake_post))
+    merger = merge_module.OpenAICompatibleSourceMerger(
+        api_key="test-key",
+        base_url="https://example.com/v1",
+        model="deepseek/deepseek-reasoner",
+        timeout=30,
+    )
+
+    content = merger._post_and_collect_content(
+        {
+            "model": "deepseek/deepseek-reasoner",
+            "messages": [{"role": "user", "content": "x"}],
+        }
+    )
+
+    assert content == '{"ok": true}'
+
+
+def test_openai_compatible_merger_retries_non_json_response(monkeypatch) -> None:
+    responses = iter(["not-json", '{"bookSourceUrl":"https://books.example.com/api/"}'])
+
+    def _fake_post_and_collect_content(self, payload):
+        return next(responses)
+
+    monkeypatch.setattr(
+        merge_module.OpenAICompatibleSourceMerger,
+        "_post_and_collect_content",
+        _fake_post_and_collect_content,
+    )
+    merger = merge_module.OpenAICompatibleSourceMerger(
+        api_key="test-key",
+        base_url="https://example.com/v1",
+        model="deepseek/deepseek-reasoner",
+        timeout=30,
+        max_retries=2,
+        retry_sleep_seconds=0,
+    )
+
+    result = merger.merge_sources(
+        source_type="book",
+        hostname="books.example.com",
+        versions=[{"bookSourceUrl": "https://books.example.com/api/"}],
     )
 
     assert result == {"bookSourceUrl": "https://books.example.com/api/"}
@@ -625,6 +1366,41 @@ def test_openai_compatible_merger_raises_after_retry_exhausted(monkeypatch) -> N
         raise AssertionError("Expected ValueError after retry exhaustion")
 
 
+def test_openai_compatible_merger_merges_batch_keyed_by_hostname(monkeypatch) -> None:
+    prompts = []
+
+    def _fake_post_and_collect_content(self, payload):
+        prompts.append(payload["messages"][1]["content"])
+        return (
+            '{"a.example.com": {"bookSourceUrl": "https://a.example.com"}, '
+            '"b.example.com": "oops", "c.example.com": {"bookSourceUrl": "https://c.example.com"}}'
+        )
+
+    monkeypatch.setattr(
+        merge_module.OpenAICompatibleSourceMerger,
+        "_post_and_collect_content",
+        _fake_post_and_collect_content,
+    )
+    merger = merge_module.OpenAICompatibleSourceMerger(
+        api_key="test-key",
+        base_url="https://example.com/v1",
+        model="deepseek/deepseek-reasoner",
+        timeout=30,
+    )
+
+    result = merger.merge_sources_batch(
+        source_type="book",
+        versions_by_host={
+            "a.example.com": [{"bookSourceUrl": "https://a.example.com/"}],
+            "b.example.com": [{"bookSourceUrl": "https://b.example.com/"}],
+        },
+    )
+
+    assert result == {"a.example.com": {"bookSourceUrl": "https://a.example.com"}}
+    assert len(prompts) == 1
+    assert '"b.example.com":[{"bookSourceUrl":"https://b.example.com/"}]' in prompts[0]
+
+
 def test_source_merge_runner_merges_candidates_back_to_source_file(tmp_path: Path) -> None:
     store = BookSourceProcessor(path=str(tmp_path), cate1="book")
     source_dir = Path(store.path_bok) / "10000000-10000100"
@@ -935,3 +1711,672 @@ def test_sync_local_source_records_task_updates_mysql_tables(tmp_path: Path) ->
         "candidate-2",
         "candidate-3",
     }
+
+
+def test_sync_local_source_records_applies_incremental_diff(monkeypatch, tmp_path: Path) -> None:
+    db_url = f"sqlite:///{tmp_path / 'sync_incremental.db'}"
+    store = BookSourceProcessor(path=str(tmp_path), cate1="book", database_url=db_url)
+    source_dir = Path(store.path_bok) / "10000000-10000100"
+
+    def write_host(url_id, hostname, md5_list, folder=source_dir):
+        store._save_json_safely(
+            str(folder / f"{url_id}.json"),
+            {
+                "url_id": url_id,
+                "hostname": hostname,
+                "merged": [],
+                "candidate": [{"md5_list": md5_list, "source": {}}],
+            },
+        )
+
+    write_host(10000001, "a.example.com", ["a1", "a2"])
+    write_host(10000002, "b.example.com", ["b1"])
+    task = SyncLocalSourceRecordsTask(path=str(tmp_path))
+    assert task.run_book(database_url=db_url) == {"details": 2, "indexes": 3}
+
+    parsed = []
+    summarize = SyncLocalSourceRecordsTask._summarize_document
+    monkeypatch.setattr(
+        SyncLocalSourceRecordsTask,
+        "_summarize_document",
+        staticmethod(lambda data: parsed.append(data["url_id"]) or summarize(data)),
+    )
+    upsert_source_index_records(
+        [{"md5": "manual", "url_id": 1, "hostname": "manual.example.com", "cate1": 0}],
+        source_type="book",
+        database_url=db_url,
+    )
+    write_host(10000001, "a.example.com", ["a1", "a3", "a4"])
+    (source_dir / "10000002.json").unlink()
+    write_host(10000103, "c.example.com", ["c1", "a1"], folder=Path(store.path_bok) / "c")
+
+    assert task.run_book(database_url=db_url) == {"details": 2, "indexes": 4}
+    assert sorted(parsed) == [10000001, 10000103]
+    assert [
+        (record.id, record.url, record.version)
+        for record in list_source_detail_records(source_type="book", database_url=db_url)
+    ] == [(10000001, "a.example.com", 3), (10000103, "c.example.com", 2)]
+    index_map = load_source_index_map(source_type="book", database_url=db_url)
+    assert set(index_map) == {"a1", "a3", "a4", "c1", "manual"}
+    assert index_map["a1"]["url_id"] == 10000001
+
+    parsed.clear()
+    assert task.run_book(database_url=db_url) == {"details": 2, "indexes": 4}
+    assert parsed == []
+
+    task.run_book(database_url=db_url, full_rebuild=True)
+    assert set(load_source_index_map(source_type="book", database_url=db_url)) == {
+        "a1",
+        "a3",
+        "a4",
+        "c1",
+    }
+
+
+def test_sync_local_source_records_reuses_store_without_loading_it(
+    monkeypatch, tmp_path: Path
+) -> None:
+    db_url = f"sqlite:///{tmp_path / 'sync_store.db'}"
+    store = BookSourceProcessor(path=str(tmp_path), cate1="book", database_url=db_url)
+    store._save_json_safely(
+        str(Path(store.path_bok) / "10000000-10000100" / "10000001.json"),
+        {
+            "url_id": 10000001,
+            "hostname": "a.example.com",
+            "merged": [],
+            "candidate": [{"md5_list": ["a1"], "source": {}}],
+        },
+    )
+    monkeypatch.setattr(store, "loads", lambda: pytest.fail("sync must not load the store"))
+
+    task = SyncLocalSourceRecordsTask(store=store)
+
+    assert task.path == str(tmp_path)
+    assert task.run_book() == {"details": 1, "indexes": 1}
+    assert list(load_source_index_map(source_type="book", database_url=db_url)) == ["a1"]
+
+
+def test_source_file_scanner_parses_on_process_pool_in_order(tmp_path: Path) -> None:
+    root = tmp_path / "source"
+    for url_id in range(10000000, 10000007):
+        LocalSourceStore._save_json_safely(
+            str(root / f"{url_id // 100 * 100}" / f"{url_id}.json"),
+            {"candidate": [{"source": {}}] * (url_id % 3), "merged": []},
+        )
+    (root / "broken.json").write_text("{", encoding="utf-8")
+
+    scanner = SourceFileScanner(str(root), workers=2, chunk_size=2)
+    results = list(scanner.scan(extract=merge_metadata))
+
+    assert [Path(file_path).name for file_path, _, _, _ in results] == [
+        *[f"{url_id}.json" for url_id in range(10000000, 10000007)],
+        "broken.json",
+    ]
+    assert [metadata["versions"] for _, _, metadata, _ in results[:-1]] == [1, 2, 0, 1, 2, 0, 1]
+    assert results[-1][3] is not None
+
+    known = {results[0][0]: results[0][1]}
+    rescanned = list(scanner.scan([results[0][0], results[1][0]], known_sha1=known))
+    assert rescanned[0][2] is None
+    assert rescanned[1][2]["candidate"] == [{"source": {}}, {"source": {}}]
+
+
+def test_merge_index_tracks_writes_and_schedules_without_parsing(
+    monkeypatch, tmp_path: Path
+) -> None:
+    store = BookSourceProcessor(path=str(tmp_path), cate1="book")
+    source_dir = Path(store.path_bok) / "10000000-10000100"
+    url_info = {"url_id": 10000001, "hostname": "a.example.com"}
+    busy_path = str(source_dir / "10000001.json")
+    quiet_path = str(source_dir / "10000002.json")
+    for md5 in ("m1", "m2"):
+        store.add_source_to_candidate(md5, busy_path, {"bookSourceName": md5}, url_info)
+    store.add_source_to_candidate("q1", quiet_path, {"bookSourceName": "q1"}, url_info)
+    store.dumps()
+
+    merge_index = store.merge_index
+    assert Path(store.merge_index_path).exists()
+    assert merge_index.versions(busy_path) == 2
+    assert merge_index.get(busy_path)["source_chars"] > 0
+    assert merge_index.get(busy_path)["merged_at"] is None
+
+    monkeypatch.setattr(
+        store_module.SourceFileScanner,
+        "scan",
+        lambda *args, **kwargs: pytest.fail("fresh index entries must not be re-parsed"),
+    )
+    monkeypatch.setattr(
+        store,
+        "_load_json_safely",
+        lambda file_path: (
+            pytest.fail("skipped files must not be loaded")
+            if file_path == quiet_path
+            else LocalSourceStore._load_json_safely(file_path)
+        ),
+    )
+
+    class FakeMerger:
+        def merge_sources(self, source_type, hostname, versions):
+            return {"bookSourceName": "merged", "bookSourceUrl": "https://a.example.com/"}
+
+    runner = SourceMergeRunner(store=store, merger=FakeMerger())
+    assert runner.iter_source_files() == [quiet_path, busy_path]
+    assert runner.run() == {"processed": 2, "merged": 1, "skipped": 1, "failed": 0}
+
+    entry = store.merge_index.lookup(busy_path)
+    assert entry["versions"] == 1
+    assert entry["merged_at"] is not None
+
+
+def test_source_merge_runner_merges_files_and_chunks_concurrently(tmp_path: Path) -> None:
+    store = BookSourceProcessor(path=str(tmp_path), cate1="book")
+    source_dir = Path(store.path_bok) / "10000000-10000100"
+    versions = {10000001: 2, 10000002: 2, 10000003: 6, 10000004: 2}
+    for url_id, count in versions.items():
+        hostname = f"h{url_id}.example.com"
+        store._save_json_safely(
+            str(source_dir / f"{url_id}.json"),
+            {
+                "available": True,
+                "merged": [],
+                "candidate": [
+                    {
+                        "md5_list": [f"{url_id}-{i}"],
+                        "source": {
+                            "bookSourceName": f"{url_id}-{i}",
+                            "bookSourceUrl": f"https://{hostname}/",
+                        },
+                    }
+                    for i in range(count)
+                ],
+                "final": False,
+                "url_id": url_id,
+                "hostname": hostname,
+            },
+        )
+
+    lock = threading.Lock()
+    state = {"active": 0, "peak": 0, "calls": 0}
+
+    class SlowMerger:
+        def merge_sources(self, source_type, hostname, versions):
+            with lock:
+                state["active"] += 1
+                state["calls"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            try:
+                time.sleep(0.05)
+                if hostname == "h10000004.example.com":
+                    raise ValueError("merge failed")
+                return versions[0]
+            finally:
+                with lock:
+                    state["active"] -= 1
+
+    runner = SourceMergeRunner(
+        store=store, merger=SlowMerger(), max_versions_per_merge=2, workers=3
+    )
+    stats = runner.run()
+
+    assert stats == {"processed": 4, "merged": 3, "skipped": 0, "failed": 1}
+    assert 1 < state["peak"] <= 3
+    assert state["calls"] == 1 + 1 + 1 + (3 + 1 + 1)
+    merged = LocalSourceStore._load_json_safely(str(source_dir / "10000003.json"))
+    assert merged["candidate"] == []
+    assert {f"10000003-{i}" for i in range(6)} <= set(merged["merged"][0]["md5_list"])
+    failed = LocalSourceStore._load_json_safely(str(source_dir / "10000004.json"))
+    assert len(failed["candidate"]) == 2
+
+
+def test_source_merge_runner_reuses_cached_merge_results(tmp_path: Path) -> None:
+    store = BookSourceProcessor(path=str(tmp_path), cate1="book")
+    source_path = Path(store.path_bok) / "10000000-10000100" / "10000001.json"
+    document = {
+        "available": True,
+        "merged": [],
+        "candidate": [
+            {
+                "md5_list": [f"m{i}"],
+                "source": {"bookSourceName": f"S{i}", "bookSourceUrl": "https://a.example.com/"},
+            }
+            for i in range(2)
+        ],
+        "final": False,
+        "url_id": 10000001,
+        "hostname": "a.example.com",
+    }
+    calls = []
+
+    class FakeMerger:
+        cache_identity = "fake-model:prompt-v1"
+
+        def merge_sources(self, source_type, hostname, versions):
+            calls.append(len(versions))
+            return versions[-1]
+
+    for _ in range(2):
+        store._save_json_safely(str(source_path), document)
+        runner = SourceMergeRunner(store=store, merger=FakeMerger())
+        assert runner.run()["merged"] == 1
+    assert calls == [2]
+    assert runner.cache.stats["hits"] == 1
+    merged = LocalSourceStore._load_json_safely(str(source_path))["merged"][0]
+    assert merged["source"]["bookSourceName"] == "S1"
+
+    FakeMerger.cache_identity = "fake-model:prompt-v2"
+    store._save_json_safely(str(source_path), document)
+    SourceMergeRunner(store=store, merger=FakeMerger()).run()
+    assert calls == [2, 2]
+
+
+def test_source_merge_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    cache = merge_module.SourceMergeCache(str(tmp_path / "cache.sqlite3"), max_bytes=60)
+    key_a = cache.make_key(["b", "a"], "book", "a.example.com", "model")
+    assert key_a == cache.make_key(["a", "b"], "book", "a.example.com", "model")
+    assert key_a != cache.make_key(["a", "b"], "book", "a.example.com", "other-model")
+
+    cache.put(key_a, {"name": "a" * 10})
+    cache.put("key-b", {"name": "b" * 10})
+    assert cache.get(key_a) == {"name": "a" * 10}
+    cache.put("key-c", {"name": "c" * 10})
+
+    assert cache.get("key-b") is None
+    assert cache.get("key-c") == {"name": "c" * 10}
+    assert cache.stats == {"hits": 2, "misses": 1, "stores": 3, "evictions": 1}
+
+    reopened = merge_module.SourceMergeCache(str(tmp_path / "cache.sqlite3"), max_bytes=60)
+    assert len(reopened) == 2
+
+
+def test_dedupe_version_items_collapses_equivalent_and_subset_versions() -> None:
+    base = {
+        "bookSourceName": "A",
+        "bookSourceUrl": "https://a.example.com",
+        "header": '{"User-Agent": "x", "Referer": "y"}',
+        "ruleSearch": {"url": "/search?q={{key}}", "name": "h3 a@text"},
+    }
+    noisy = {
+        "bookSourceName": "A",
+        "bookSourceUrl": "https://a.example.com",
+        "header": '{"Referer": "y", "User-Agent": "x"}',
+        "ruleSearch": {"url": "/search?q={{key}}  \r\n", "name": "h3 a@text"},
+        "ruleExplore": {"url": ""},
+        "lastUpdateTime": 1700000000,
+    }
+    subset = {"bookSourceName": "A", "bookSourceUrl": "https://a.example.com"}
+    richer = dict(base, ruleToc={"chapterList": "li"})
+    other = dict(subset, ruleSearch={"url": "/s?k={{key}}"})
+
+    items = [
+        {"md5_list": ["subset"], "source": subset},
+        {"md5_list": ["base"], "source": base},
+        {"md5_list": ["noisy", "base"], "source": noisy},
+        {"md5_list": ["richer"], "source": richer},
+        {"md5_list": ["other"], "source": other},
+    ]
+    deduped = merge_module.dedupe_version_items(items)
+
+    assert deduped == [
+        {"md5_list": ["richer", "base", "noisy", "subset"], "source": richer},
+        {"md5_list": ["other"], "source": other},
+    ]
+    reordered = merge_module.dedupe_version_items(list(reversed(items)))
+    assert [item["source"] for item in reordered] == [other, richer]
+
+
+def test_source_merge_runner_skips_llm_when_versions_collapse(tmp_path: Path) -> None:
+    store = BookSourceProcessor(path=str(tmp_path), cate1="book")
+    source_path = Path(store.path_bok) / "10000000-10000100" / "10000001.json"
+    source = {"bookSourceName": "A", "bookSourceUrl": "https://a.example.com/"}
+    store._save_json_safely(
+        str(source_path),
+        {
+            "available": True,
+            "merged": [],
+            "candidate": [
+                {"md5_list": ["m1"], "source": source},
+                {"md5_list": ["m2"], "source": dict(source, lastUpdateTime=1)},
+            ],
+            "final": False,
+            "url_id": 10000001,
+            "hostname": "a.example.com",
+        },
+    )
+
+    class FailingMerger:
+        def merge_sources(self, source_type, hostname, versions):
+            raise AssertionError("identical versions must not reach the LLM")
+
+    stats = SourceMergeRunner(store=store, merger=FailingMerger()).run()
+
+    data = LocalSourceStore._load_json_safely(str(source_path))
+    assert stats["merged"] == 1
+    assert data["candidate"] == []
+    assert data["merged"][0]["md5_list"][1:] == ["m1", "m2"]
+    assert data["merged"][0]["source"]["bookSourceUrl"] == "https://a.example.com"
+
+
+def test_merge_chunk_planner_balances_chunks_by_tokens() -> None:
+    def version(name: str, size: int):
+        return {"md5_list": [name], "source": {"r": "x" * (size * 4 - 10)}}
+
+    planner = merge_module.MergeChunkPlanner(max_versions=4, max_tokens=100)
+    items = [version(str(index), size) for index, size in enumerate([60, 10, 10, 10, 50, 40, 30])]
+    measured = []
+    original = planner.measure
+
+    def counting_measure(item):
+        if id(item) not in planner._sizes:
+            measured.append(item["md5_list"][0])
+        return original(item)
+
+    planner.measure = counting_measure
+    chunks = planner.plan(items)
+
+    assert [sum(planner.measure(item) for item in chunk) for chunk in chunks] == [70, 70, 70]
+    assert [item for chunk in chunks for item in chunk] == items
+    assert all(planner.fits(chunk) for chunk in chunks)
+    assert not planner.fits(items)
+    planner.plan(items)
+    assert sorted(measured) == sorted(item["md5_list"][0] for item in items)
+
+    oversized = [version(str(index), 150) for index in range(5)]
+    assert [len(chunk) for chunk in planner.plan(oversized)] == [3, 2]
+
+
+def test_source_merge_runner_resumes_from_journal_after_crash(tmp_path: Path) -> None:
+    store = BookSourceProcessor(path=str(tmp_path), cate1="book")
+    source_path = Path(store.path_bok) / "10000000-10000100" / "10000001.json"
+    document = {
+        "available": True,
+        "merged": [],
+        "candidate": [
+            {
+                "md5_list": [f"m{i}"],
+                "source": {"bookSourceName": f"{i}", "bookSourceUrl": "https://a.example.com/"},
+            }
+            for i in range(4)
+        ],
+        "final": False,
+        "url_id": 10000001,
+        "hostname": "a.example.com",
+    }
+    store._save_json_safely(str(source_path), document)
+
+    calls = []
+
+    class SimulatedCrash(BaseException):
+        pass
+
+    class CrashingMerger:
+        def __init__(self, crash_at=None):
+            self.crash_at = crash_at
+
+        def merge_sources(self, source_type, hostname, versions):
+            calls.append([version["bookSourceName"] for version in versions])
+            if len(calls) == self.crash_at:
+                raise SimulatedCrash()
+            return versions[0]
+
+    def make_runner(merger):
+        return SourceMergeRunner(
+            store=store, merger=merger, max_versions_per_merge=2, use_cache=False
+        )
+
+    runner = make_runner(CrashingMerger(crash_at=2))
+    with pytest.raises(SimulatedCrash):
+        runner.run()
+    journal_path = Path(runner.journal_path(str(source_path)))
+    assert journal_path.read_text(encoding="utf-8").count("\n") == 1
+    assert LocalSourceStore._load_json_safely(str(source_path)) == document
+
+    calls.clear()
+    saved = []
+    save_document = store.save_document
+    store.save_document = lambda *args, **kwargs: saved.append(args[0]) or save_document(
+        *args, **kwargs
+    )
+    stats = make_runner(CrashingMerger()).run()
+
+    data = LocalSourceStore._load_json_safely(str(source_path))
+    assert stats["merged"] == 1
+    # The journaled merge of 0 and 1 replays as one version; nothing merges it again.
+    assert calls == [["0", "2"], ["0", "3"]]
+    assert saved == [str(source_path)]
+    assert not journal_path.exists()
+    assert set(data["merged"][0]["md5_list"]) >= {"m0", "m1", "m2", "m3"}
+
+
+def test_source_merge_runner_resumes_journal_after_new_candidates(tmp_path: Path) -> None:
+    store = BookSourceProcessor(path=str(tmp_path), cate1="book")
+    source_path = Path(store.path_bok) / "10000000-10000100" / "10000001.json"
+
+    def version(name):
+        return {
+            "md5_list": [f"m{name}"],
+            "source": {"bookSourceName": name, "bookSourceUrl": "https://a.example.com/"},
+        }
+
+    document = {
+        "available": True,
+        "merged": [],
+        "candidate": [version(str(i)) for i in range(4)],
+        "final": False,
+        "url_id": 10000001,
+        "hostname": "a.example.com",
+    }
+    store._save_json_safely(str(source_path), document)
+    calls = []
+
+    class SimulatedCrash(BaseException):
+        pass
+
+    class CrashingMerger:
+        def __init__(self, crash_at=None):
+            self.crash_at = crash_at
+
+        def merge_sources(self, source_type, hostname, versions):
+            calls.append(sorted(version["bookSourceName"] for version in versions))
+            if len(calls) == self.crash_at:
+                raise SimulatedCrash()
+            return versions[0]
+
+    def make_runner(merger):
+        return SourceMergeRunner(
+            store=store, merger=merger, max_versions_per_merge=2, use_cache=False
+        )
+
+    with pytest.raises(SimulatedCrash):
+        make_runner(CrashingMerger(crash_at=2)).run()
+    assert calls == [["0", "1"], ["2", "3"]]
+
+    # New candidates arrive before the rerun and shift every chunk boundary.
+    document["candidate"] = [version("new")] + document["candidate"] + [version("4")]
+    document["candidate"][2]["md5_list"].append("m1-again")
+    store._save_json_safely(str(source_path), document)
+    calls.clear()
+
+    stats = make_runner(CrashingMerger()).run()
+
+    data = LocalSourceStore._load_json_safely(str(source_path))
+    assert stats["merged"] == 1
+    assert ["0", "1"] not in calls
+    assert len(calls) == 4
+    assert set(data["merged"][0]["md5_list"]) >= {
+        "m0",
+        "m1",
+        "m1-again",
+        "m2",
+        "m3",
+        "m4",
+        "mnew",
+    }
+
+
+def test_source_merge_runner_validation_leaves_shared_sources_untouched(tmp_path: Path) -> None:
+    store = BookSourceProcessor(path=str(tmp_path), cate1="book")
+    runner = SourceMergeRunner(store=store, merger=object(), use_cache=False)
+    source = {
+        "bookSourceName": "A!",
+        "bookSourceUrl": "https://a.example.com/",
+        "ruleSearch": {"name": "h3@text"},
+        "ruleSearchUrl": "/search",
+        "ruleContent": {"content": "@js:" + "x" * 1000},
+        "lastUpdateTime": 1,
+    }
+    snapshot = json.loads(json.dumps(source))
+
+    normalized = runner._validate_merged_source(source, "a.example.com")
+
+    assert source == snapshot
+    assert normalized["bookSourceUrl"] == "https://a.example.com"
+    assert normalized["ruleSearch"] == {"name": "h3@text", "url": "/search"}
+    assert normalized["ruleContent"]["content"] is source["ruleContent"]["content"]
+
+
+def test_source_merge_runner_batches_small_hosts_with_per_host_fallback(tmp_path: Path) -> None:
+    store = BookSourceProcessor(path=str(tmp_path), cate1="book")
+    source_dir = Path(store.path_bok) / "10000000-10000100"
+    versions = {10000001: 2, 10000002: 2, 10000003: 3, 10000004: 5}
+    for url_id, count in versions.items():
+        hostname = f"h{url_id}.example.com"
+        store._save_json_safely(
+            str(source_dir / f"{url_id}.json"),
+            {
+                "available": True,
+                "merged": [],
+                "candidate": [
+                    {
+                        "md5_list": [f"{url_id}-{i}"],
+                        "source": {
+                            "bookSourceName": f"{url_id}-{i}",
+                            "bookSourceUrl": f"https://{hostname}/",
+                        },
+                    }
+                    for i in range(count)
+                ],
+                "final": False,
+                "url_id": url_id,
+                "hostname": hostname,
+            },
+        )
+
+    batch_calls = []
+    single_calls = []
+
+    class BatchMerger:
+        def merge_sources(self, source_type, hostname, versions):
+            single_calls.append(hostname)
+            return versions[0]
+
+        def merge_sources_batch(self, source_type, versions_by_host):
+            batch_calls.append(sorted(versions_by_host))
+            return {
+                "h10000001.example.com": versions_by_host["h10000001.example.com"][0],
+                "h10000002.example.com": {"bookSourceUrl": "https://elsewhere.example.com"},
+            }
+
+    stats = SourceMergeRunner(
+        store=store,
+        merger=BatchMerger(),
+        max_versions_per_merge=4,
+        batch_hosts=4,
+        use_cache=False,
+    ).run()
+
+    assert stats == {"processed": 4, "merged": 4, "skipped": 0, "failed": 0}
+    assert batch_calls == [
+        ["h10000001.example.com", "h10000002.example.com", "h10000003.example.com"]
+    ]
+    assert sorted(single_calls) == [
+        "h10000002.example.com",
+        "h10000003.example.com",
+        "h10000004.example.com",
+        "h10000004.example.com",
+        "h10000004.example.com",
+    ]
+    for url_id in versions:
+        data = LocalSourceStore._load_json_safely(str(source_dir / f"{url_id}.json"))
+        assert data["candidate"] == []
+        assert data["merged"][0]["source"]["bookSourceUrl"] == f"https://h{url_id}.example.com"
+
+
+def test_source_merge_runner_keeps_batch_results_out_of_single_host_cache(
+    tmp_path: Path,
+) -> None:
+    store = BookSourceProcessor(path=str(tmp_path), cate1="book")
+    source_dir = Path(store.path_bok) / "10000000-10000100"
+    items_by_host = {}
+    for url_id in (10000001, 10000002):
+        hostname = f"h{url_id}.example.com"
+        items = [
+            {
+                "md5_list": [f"{url_id}-{i}"],
+                "source": {
+                    "bookSourceName": f"{url_id}-{i}",
+                    "bookSourceUrl": f"https://{hostname}/",
+                },
+            }
+            for i in range(2)
+        ]
+        items_by_host[hostname] = items
+        store._save_json_safely(
+            str(source_dir / f"{url_id}.json"),
+            {
+                "available": True,
+                "merged": [],
+                "candidate": items,
+                "final": False,
+                "url_id": url_id,
+                "hostname": hostname,
+            },
+        )
+
+    class BatchMerger:
+        def merge_sources(self, source_type, hostname, versions):
+            raise AssertionError("batch hosts must not fall back")
+
+        def merge_sources_batch(self, source_type, versions_by_host):
+            return {hostname: versions[0] for hostname, versions in versions_by_host.items()}
+
+    runner = SourceMergeRunner(store=store, merger=BatchMerger(), batch_hosts=2)
+    assert runner.run()["merged"] == 2
+
+    assert len(runner.cache) == 2
+    for hostname, items in items_by_host.items():
+        assert runner.cache.get(runner._merge_cache_key(hostname, items)) is None
+        batch_key = runner._merge_cache_key(hostname, items, runner.batch_merger_identity)
+        assert runner.cache.get(batch_key)["bookSourceUrl"] == f"https://{hostname}"
+
+
+def test_source_merge_runner_closes_cache_kept_out_of_backups(tmp_path: Path) -> None:
+    store = BookSourceProcessor(path=str(tmp_path), cate1="book")
+    source = {"bookSourceName": "A", "bookSourceUrl": "https://a.example.com/"}
+    store._save_json_safely(
+        str(Path(store.path_bok) / "10000000-10000100" / "10000001.json"),
+        {
+            "available": True,
+            "merged": [],
+            "candidate": [
+                {"md5_list": ["m1"], "source": source},
+                {"md5_list": ["m2"], "source": dict(source, bookSourceName="B")},
+            ],
+            "final": False,
+            "url_id": 10000001,
+            "hostname": "a.example.com",
+        },
+    )
+
+    class FakeMerger:
+        def merge_sources(self, source_type, hostname, versions):
+            return versions[0]
+
+    runner = SourceMergeRunner(store=store, merger=FakeMerger())
+    assert runner.run()["merged"] == 1
+
+    assert runner.cache._connection is None
+    assert Path(runner.cache.path).parent == Path(store.path_cache)
+    assert len(runner.cache) == 1
+    runner.cache.close()
+    with tarfile.open(store.dumps_zip(), "r:*") as tar:
+        assert not any("merge-cache" in name for name in tar.getnames())
@@ -1,3 +1,6 @@
+import json
+import threading
+import time
 from datetime import datetime
 
 import requests
@@ -5,15 +8,21 @@ import requests
 from sqlalchemy import create_engine, select
 from sqlalchemy.orm import Session
 
+import funread.legado.manage.source.storage as storage_module
 from funread.legado.manage.source.storage import (
     Base,
     SourceListRecord,
     SourceDetailRecord,
+    SourceIndexRecord,
+    SourceListStatusWriter,
     add_source_list_url,
     add_source_detail_url,
+    get_source_list_record,
     load_source_detail_url_map,
     list_source_detail_records,
     iter_source_list_data,
+    replace_source_detail_records,
+    replace_source_index_records,
     upsert_source_list_record,
 )
 
@@ -63,8 +72,11 @@ def test_add_source_list_url_defaults_count_to_negative_one(tmp_path):
 
 
 class _FakeResponse:
-    def __init__(self, payload):
+    def __init__(self, payload, status_code=200, headers=None):
         self.payload = payload
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = json.dumps(payload).encode("utf-8")
 
     def raise_for_status(self):
         return None
@@ -73,6 +85,14 @@ class _FakeResponse:
         return self.payload
 
 
+class _FakeHttpClient:
+    def __init__(self, get):
+        self._get = get
+
+    def get(self, url, **kwargs):
+        return self._get(url, **kwargs)
+
+
 def test_iter_source_list_data_orders_by_last_queried_at_desc(tmp_path, monkeypatch):
     db_url = f"sqlite:///{tmp_path / 'source_iter.db'}"
     add_source_list_url(
@@ -98,7 +118,7 @@ def test_iter_source_list_data_orders_by_last_queried_at_desc(tmp_path, monkeypa
             return _FakeResponse([{"id": 1}, {"id": 2}])
         return _FakeResponse({"list": [{"id": 3}]})
 
-    monkeypatch.setattr(requests, "get", fake_get)
+    monkeypatch.setattr(storage_module, "get_http_client", lambda: _FakeHttpClient(fake_get))
 
     items = list(iter_source_list_data(source_type="rss", database_url=db_url))
 
@@ -196,6 +216,58 @@ def test_list_source_detail_records_filters_by_source_type(tmp_path):
     }
 
 
+def test_replace_source_records_in_chunks_with_staging(tmp_path):
+    db_url = f"sqlite:///{tmp_path / 'source_replace.db'}"
+
+    add_source_detail_url(url="https://example.com/old", source_type="book", database_url=db_url)
+    rss = add_source_detail_url(
+        url="https://example.com/rss", source_type="rss", database_url=db_url
+    )
+    for use_staging in (False, True):
+        replace_source_detail_records(
+            records=[
+                {"id": 1, "url": "a.example.com", "version": 2},
+                {"id": 2, "url": "b.example.com"},
+                {"id": 3, "url": ""},
+                {"id": 2, "url": "b2.example.com", "version": 1},
+            ],
+            source_type="book",
+            database_url=db_url,
+            chunk_size=1,
+            use_staging=use_staging,
+        )
+        replace_source_index_records(
+            records=[
+                {"md5": f"md5-{i}", "url_id": 1, "hostname": "a.example.com", "cate1": 0}
+                for i in range(5)
+            ],
+            source_type="book",
+            database_url=db_url,
+            chunk_size=2,
+            use_staging=use_staging,
+        )
+
+        assert [
+            (record.id, record.url, record.version)
+            for record in list_source_detail_records(source_type="book", database_url=db_url)
+        ] == [(1, "a.example.com", 2), (2, "b2.example.com", 1)]
+        assert load_source_detail_url_map(source_type="rss", database_url=db_url) == {
+            "https://example.com/rss": rss.id
+        }
+        engine = create_engine(db_url, future=True)
+        with Session(engine) as session:
+            md5s = session.execute(select(SourceIndexRecord.md5)).scalars().all()
+            staged = (
+                session.execute(
+                    select(storage_module._staging_table(SourceIndexRecord.__table__))
+                ).all()
+                if use_staging
+                else []
+            )
+        assert sorted(md5s) == [f"md5-{i}" for i in range(5)]
+        assert staged == []
+
+
 def test_iter_source_list_data_skips_recent_records_by_default(tmp_path, monkeypatch):
     db_url = f"sqlite:///{tmp_path / 'source_iter_stale.db'}"
     add_source_list_url(
@@ -207,13 +279,136 @@ def test_iter_source_list_data_skips_recent_records_by_default(tmp_path, monkeyp
     )
 
     monkeypatch.setattr(
-        requests,
-        "get",
-        lambda *args, **kwargs: (_ for _ in ()).throw(
-            AssertionError("should not fetch recent record")
+        storage_module,
+        "get_http_client",
+        lambda: _FakeHttpClient(
+            lambda *args, **kwargs: (_ for _ in ()).throw(
+                AssertionError("should not fetch recent record")
+            )
         ),
     )
 
     items = list(iter_source_list_data(source_type="rss", database_url=db_url))
 
     assert items == []
+
+
+def test_iter_source_list_data_fetches_concurrently_with_host_limit(tmp_path, monkeypatch):
+    db_url = f"sqlite:///{tmp_path / 'source_iter_concurrent.db'}"
+    urls = [f"https://a.example.com/{i}.json" for i in range(6)] + [
+        f"https://b.example.com/{i}.json" for i in range(3)
+    ]
+    for url in urls:
+        add_source_list_url(
+            url=url,
+            source_type="book",
+            queried_at=datetime(2024, 1, 1, 0, 0, 0),
+            database_url=db_url,
+        )
+
+    lock = threading.Lock()
+    in_flight = {}
+    peak = {}
+
+    def fake_get(url, timeout, **kwargs):
+        host = url.split("/")[2]
+        with lock:
+            in_flight[host] = in_flight.get(host, 0) + 1
+            peak[host] = max(peak.get(host, 0), in_flight[host])
+        time.sleep(0.02)
+        with lock:
+            in_flight[host] -= 1
+        if url.endswith("/0.json"):
+            raise requests.ConnectionError("dead host")
+        return _FakeResponse([{"url": url}])
+
+    monkeypatch.setattr(storage_module, "get_http_client", lambda: _FakeHttpClient(fake_get))
+
+    items = list(
+        iter_source_list_data(
+            source_type="book", database_url=db_url, max_workers=4, max_per_host=2
+        )
+    )
+
+    assert sorted(item[1][0]["url"] for item in items) == sorted(
+        url for url in urls if not url.endswith("/0.json")
+    )
+    assert peak["a.example.com"] <= 2
+    assert peak["b.example.com"] <= 2
+
+    engine = create_engine(db_url, future=True)
+    with Session(engine) as session:
+        counts = {
+            row.url: row.source_count
+            for row in session.execute(select(SourceListRecord)).scalars().all()
+        }
+    assert counts["https://a.example.com/0.json"] == -1
+    assert counts["https://b.example.com/1.json"] == 1
+
+
+def test_source_list_status_writer_flushes_in_batches(tmp_path):
+    db_url = f"sqlite:///{tmp_path / 'source_writer.db'}"
+    add_source_list_url(url="https://example.com/0.json", source_type="rss", database_url=db_url)
+    engine = create_engine(db_url, future=True)
+
+    def read_counts():
+        with Session(engine) as session:
+            return {
+                row.url: row.source_count
+                for row in session.execute(select(SourceListRecord)).scalars().all()
+            }
+
+    with SourceListStatusWriter(database_url=db_url, flush_size=3, flush_interval=3600) as writer:
+        writer.add("https://example.com/0.json", "rss", 5)
+        writer.add("https://example.com/1.json", "rss", 6)
+        assert read_counts() == {"https://example.com/0.json": -1}
+
+        writer.add("https://example.com/2.json", "rss", 7)
+        assert len(writer) == 0
+        assert read_counts() == {
+            "https://example.com/0.json": 5,
+            "https://example.com/1.json": 6,
+            "https://example.com/2.json": 7,
+        }
+
+        writer.add("https://example.com/1.json", "rss", 8)
+
+    assert read_counts()["https://example.com/1.json"] == 8
+
+
+def test_iter_source_list_data_skips_unchanged_lists(tmp_path, monkeypatch):
+    db_url = f"sqlite:///{tmp_path / 'source_iter_conditional.db'}"
+    for name in ("etag", "hash"):
+        add_source_list_url(
+            url=f"https://example.com/{name}.json",
+            source_type="rss",
+            queried_at=datetime(2024, 1, 1, 0, 0, 0),
+            database_url=db_url,
+        )
+
+    requests_seen = []
+
+    def fake_get(url, timeout, headers=None):
+        requests_seen.append((url, dict(headers or {})))
+        if url.endswith("etag.json"):
+            if (headers or {}).get("If-None-Match") == '"v1"':
+                return _FakeResponse(None, status_code=304)
+            return _FakeResponse([{"id": 1}], headers={"ETag": '"v1"'})
+        return _FakeResponse([{"id": 2}, {"id": 3}])
+
+    monkeypatch.setattr(storage_module, "get_http_client", lambda: _FakeHttpClient(fake_get))
+
+    first = list(iter_source_list_data(source_type="rss", stale_seconds=0, database_url=db_url))
+    second = list(iter_source_list_data(source_type="rss", stale_seconds=0, database_url=db_url))
+
+    assert sorted(item[0].url for item in first) == [
+        "https://example.com/etag.json",
+        "https://example.com/hash.json",
+    ]
+    assert second == []
+    assert ("https://example.com/etag.json", {"If-None-Match": '"v1"'}) in requests_seen
+
+    record = get_source_list_record("https://example.com/hash.json", database_url=db_url)
+    assert record.source_count == 2
+    assert record.content_md5 is not None
+    assert record.last_queried_at > datetime(2024, 1, 1, 0, 0, 0)